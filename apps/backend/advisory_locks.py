@@ -0,0 +1,30 @@
+# Path: apps/backend/advisory_locks.py
+from contextlib import contextmanager
+from sqlalchemy import select, func
+
+from .app import db
+
+# Lock namespaces: the first key of Postgres' two-key advisory lock, so lock families never collide.
+COMPANY_ENRICHMENT = 1
+ADMIN_OPERATION = 2
+SCHEDULER_LEADER = 3
+MAINTENANCE_TASK = 4
+JOB_SUBMISSION = 5
+JOB_IMPORT = 6
+
+@contextmanager
+def try_advisory_lock(namespace: int, key: int):
+    """
+    Tries to take a session-level Postgres advisory lock without waiting and yields whether it was acquired.
+    The lock lives on a dedicated pooled connection (not the ORM session, which may commit and hand its
+    connection back mid-block) and is released when the block exits, or by Postgres if the process dies.
+    """
+    with db.engine.connect() as conn:
+        acquired = conn.scalar(select(func.pg_try_advisory_lock(namespace, key)))
+        conn.commit() # Don't sit idle in a transaction while the caller works.
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.scalar(select(func.pg_advisory_unlock(namespace, key)))
+                conn.commit()
@@ -18,9 +18,16 @@ def create_app():
     from . import config
     app.config.from_object(config.Config)
 
+    # Encode all JSON responses with orjson (native datetime/enum/dataclass support)
+    from .json_provider import OrjsonProvider, dumps_str
+    import orjson
+    app.json = OrjsonProvider(app)
+
     # Configure SQLAlchemy
     app.config['SQLALCHEMY_DATABASE_URI'] = app.config['DATABASE_URL']
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # JSONB columns (cached recommendation payloads, analyses) are (de)serialized with orjson too
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'json_serializer': dumps_str, 'json_deserializer': orjson.loads}
     db.init_app(app) # Initialize db with the Flask app
 
     # Initialize Flask-Migrate
@@ -48,6 +55,7 @@ def create_app():
     from .routes.onboarding import onboarding_bp
     from .routes.recommendations import reco_bp
     from .routes.companies import companies_bp
+    from .routes.events import events_bp
 
     # Register all blueprints with a consistent /api prefix
     app.register_blueprint(profile_bp, url_prefix='/api')
@@ -56,6 +64,19 @@ def create_app():
     app.register_blueprint(onboarding_bp, url_prefix='/api')
     app.register_blueprint(reco_bp, url_prefix='/api')
     app.register_blueprint(companies_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+
+    # Compress large JSON responses (gzip, or brotli when available and accepted)
+    from . import compression
+    compression.init_app(app)
+
+    # Periodic maintenance tasks (URL checks, expiry sweeps), run by one leader-elected worker
+    from .scheduler import scheduler
+    scheduler.init_app(app)
+
+    # Register Flask CLI commands (run via `flask --app run <command>`)
+    from .commands import register_commands
+    register_commands(app)
 
     @app.route('/')
     def index(): return "Backend server is running."
@@ -0,0 +1,28 @@
+# Path: apps/backend/background.py
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+from .app import db
+from .config import config
+
+# A single process-wide pool. Each gunicorn worker gets its own pool after fork.
+_executor = ThreadPoolExecutor(max_workers=config.BACKGROUND_WORKER_THREADS, thread_name_prefix='tt-background')
+
+def submit_background_task(fn, *args, **kwargs):
+    """
+    Runs `fn(*args, **kwargs)` on the background pool inside a fresh application context,
+    so it gets its own SQLAlchemy session. Must be called from within an app context.
+    Returns the Future; exceptions are logged rather than propagated.
+    """
+    app = current_app._get_current_object()
+
+    def _run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Background task {getattr(fn, '__name__', fn)} failed: {e}", exc_info=True)
+                return None
+
+    return _executor.submit(_run)
@@ -0,0 +1,217 @@
+# Path: apps/backend/commands.py
+import click
+import resource
+import tracemalloc
+from flask import current_app
+
+def register_commands(app):
+    """Attaches the backend's maintenance commands to the Flask CLI."""
+
+    @app.cli.command('rebuild-job-index')
+    @click.option('--batch-size', default=500, show_default=True, help='Jobs tokenized per committed batch.')
+    def rebuild_job_index(batch_size):
+        """Re-tokenizes every canonical job into the BM25 discovery index."""
+        from .services.job_discovery_service import JobDiscoveryService
+        indexed = JobDiscoveryService(current_app.logger).rebuild_index(batch_size=batch_size)
+        click.echo(f"Indexed {indexed} jobs.")
+
+    @app.cli.command('measure-list-payloads')
+    @click.option('--user-id', type=int, required=True, help='User whose dashboard lists are measured.')
+    def measure_list_payloads(user_id):
+        """Reports text bytes hydrated and peak memory for the dashboard list endpoints."""
+        from sqlalchemy import func, select
+        from .app import db
+        from .models import Job, JobOpportunity, TrackedJob, JobAnalysis
+        from .services.tracked_job_service import TrackedJobService
+        from .services.job_matching_service import JobMatchingService
+
+        def hydrated_text_bytes():
+            # Only attributes actually loaded appear in an instance's __dict__; deferred ones don't.
+            return sum(
+                len(value.encode('utf-8'))
+                for obj in db.session.identity_map.values()
+                for value in vars(obj).values() if isinstance(value, str)
+            )
+
+        def measure(label, fn):
+            db.session.expunge_all()
+            tracemalloc.start()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            click.echo(f"{label}: {hydrated_text_bytes():,} text bytes hydrated, "
+                       f"{peak / 1024:,.0f} KiB peak Python allocation, "
+                       f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss:,} KiB max RSS so far")
+
+        measure("GET /tracked-jobs", lambda: TrackedJobService(current_app.logger).get_tracked_jobs(user_id, limit=1000))
+        measure("GET /jobs/recommendations", lambda: JobMatchingService(current_app.logger).rank_jobs_for_user(user_id))
+
+        # What the same lists would have transferred with Job.notes loaded eagerly (the previous behaviour).
+        tracked_notes = db.session.scalar(
+            select(func.coalesce(func.sum(func.octet_length(Job.notes)), 0))
+            .where(Job.id.in_(select(JobOpportunity.job_id).join(TrackedJob).where(TrackedJob.user_id == user_id)))
+        )
+        analyzed_notes = db.session.scalar(
+            select(func.coalesce(func.sum(func.octet_length(Job.notes)), 0))
+            .where(Job.id.in_(select(JobAnalysis.job_id).where(JobAnalysis.user_id == user_id)))
+        )
+        click.echo(f"Deferred Job.notes bytes no longer transferred: {tracked_notes:,} (tracked jobs), {analyzed_notes:,} (recommendations)")
+
+    @app.cli.command('reextract-archive')
+    @click.option('--apply', 'apply_changes', is_flag=True, help='Write changed descriptions back to jobs (default is a dry run).')
+    @click.option('--workers', type=int, default=None, help='Extraction processes (defaults to CPU count).')
+    @click.option('--batch-size', default=200, show_default=True, help='Archived pages per committed batch.')
+    def reextract_archive(apply_changes, workers, batch_size):
+        """Re-runs text extraction over archived job pages without fetching anything."""
+        from .services.content_archive_service import ContentArchiveService
+        stats = ContentArchiveService(current_app.logger).reextract_archive(
+            apply_changes=apply_changes, workers=workers, batch_size=batch_size
+        )
+        click.echo(f"Processed {stats['processed']} archived pages: {stats['changed']} would change, {stats['updated']} updated.")
+
+    @app.cli.command('benchmark-read-path')
+    @click.option('--user-id', type=int, required=True, help='User whose dashboard reads are benchmarked.')
+    @click.option('--iterations', default=20, show_default=True, help='Requests simulated per path.')
+    def benchmark_read_path(user_id, iterations):
+        """Compares per-request CPU time of ORM + to_dict + stdlib json against the row-based orjson read path."""
+        import json
+        import time
+        from sqlalchemy.orm import joinedload
+        from .app import db
+        from .json_provider import dumps_bytes
+        from .models import Job, JobAnalysis, TrackedJob, User, UserProfile
+        from .services.tracked_job_service import TrackedJobService
+        from .services.job_matching_service import JobMatchingService
+        from .services.profile_service import ProfileService
+
+        tracked_job_service = TrackedJobService(current_app.logger)
+        job_matching_service = JobMatchingService(current_app.logger)
+        profile_service = ProfileService(current_app.logger)
+
+        def legacy_tracked_jobs():
+            query = tracked_job_service._base_tracked_jobs_query(user_id)
+            rows = query.order_by(TrackedJob.updated_at.desc(), TrackedJob.id.desc()).limit(1000).all()
+            return json.dumps({"jobs": [tracked_job_service._serialize_tracked_job(tj, user_id) for tj in rows]})
+
+        def legacy_recommendations():
+            # The ORM load the previous ranking performed and the dicts it built, minus scoring
+            # (which both paths share), so this understates the old cost slightly.
+            analyses = db.session.query(JobAnalysis).options(
+                joinedload(JobAnalysis.job).joinedload(Job.company),
+                joinedload(JobAnalysis.job).joinedload(Job.opportunities)
+            ).filter(JobAnalysis.user_id == user_id).all()
+            return json.dumps({"jobs": [{
+                "id": a.job_id, "job_id": a.job_id, "job_title": a.job.job_title, "company_id": a.job.company_id,
+                "company_name": a.job.company.name if a.job.company else "N/A", "matrix_rating": a.matrix_rating,
+                "job_modality": a.job.job_modality.value if a.job.job_modality else None,
+                "deduced_job_level": a.job.deduced_job_level.value if a.job.deduced_job_level else None,
+                "summary": a.summary,
+                "job_url": next((o.url for o in a.job.opportunities if o.is_active), None)
+            } for a in analyses]})
+
+        def legacy_profile():
+            profile_dict = UserProfile.query.filter_by(user_id=user_id).first().to_dict()
+            user = db.session.get(User, user_id)
+            profile_dict.update(full_name=user.full_name, login_email=user.email)
+            return json.dumps(profile_dict)
+
+        paths = [
+            ("GET /tracked-jobs", legacy_tracked_jobs,
+             lambda: dumps_bytes(tracked_job_service.get_tracked_jobs(user_id, limit=1000))),
+            ("GET /jobs/recommendations", legacy_recommendations,
+             lambda: dumps_bytes({"jobs": job_matching_service.rank_jobs_for_user(user_id) or []})),
+            ("GET /profile", legacy_profile, lambda: dumps_bytes(profile_service.get_profile(user_id))),
+        ]
+
+        def cpu_ms_per_request(fn):
+            fn() # Warm-up: connection checkout, statement compilation cache.
+            total = 0.0
+            for _ in range(iterations):
+                db.session.expunge_all()
+                start = time.process_time()
+                fn()
+                total += time.process_time() - start
+            db.session.rollback()
+            return total / iterations * 1000
+
+        for label, legacy, row_based in paths:
+            before, after = cpu_ms_per_request(legacy), cpu_ms_per_request(row_based)
+            click.echo(f"{label}: {before:.2f} ms -> {after:.2f} ms CPU per request "
+                       f"({(1 - after / before) * 100 if before else 0:.0f}% less)")
+
+    @app.cli.command('run-maintenance-sweeps')
+    @click.option('--batch-size', type=int, default=None, help='Primary-key range per UPDATE (default: MAINTENANCE_SWEEP_BATCH_SIZE).')
+    def run_maintenance_sweeps(batch_size):
+        """Expires stale tracked applications and old job postings with set-based updates."""
+        from .services.admin_service import AdminService
+        results = AdminService(current_app.logger).run_maintenance_sweeps(batch_size)
+        for name, count in results.items():
+            click.echo(f"{name}: {count}")
+
+    @app.cli.command('run-scheduler')
+    def run_scheduler():
+        """Runs the maintenance scheduler in the foreground (for hosts that set SCHEDULER_ENABLED=false on web workers)."""
+        from .scheduler import scheduler
+        click.echo("Maintenance scheduler started; waiting for leadership.")
+        scheduler.run_forever(current_app._get_current_object())
+
+    @app.cli.command('run-maintenance-task')
+    @click.argument('name')
+    def run_maintenance_task(name):
+        """Runs one registered maintenance task now and records the run."""
+        from .scheduler import scheduler
+        if not scheduler.get_task(name):
+            raise click.BadParameter(f"Unknown task '{name}'.", param_hint='NAME')
+        run = scheduler.run_task(name)
+        if run is None:
+            click.echo(f"{name} is already running elsewhere.")
+        else:
+            click.echo(f"{name} {run.status} in {run.duration_ms} ms: {run.result or run.error}")
+
+    @app.cli.command('merge-duplicate-companies')
+    @click.option('--apply', 'apply_changes', is_flag=True, help='Merge and backfill name keys (default is a dry run).')
+    def merge_duplicate_companies(apply_changes):
+        """Merges companies whose names normalize to the same key ("Acme, Inc." / "ACME") and fills name keys."""
+        from .services.company_service import CompanyService
+        merges = CompanyService(current_app.logger).merge_duplicate_companies(apply_changes=apply_changes)
+        for survivor_id, survivor_name, merged_names in merges:
+            click.echo(f"{survivor_name} (#{survivor_id}) <- {', '.join(merged_names)}")
+        click.echo(f"{len(merges)} duplicate groups {'merged' if apply_changes else 'found (dry run)'}.")
+
+    @app.cli.command('backfill-company-profiles')
+    @click.option('--workers', default=4, show_default=True, help='Companies researched concurrently (also capped by GEMINI_MAX_CONCURRENT_REQUESTS).')
+    @click.option('--chunk-size', default=50, show_default=True, help='Companies per checkpointed chunk.')
+    @click.option('--checkpoint', 'checkpoint_path', default='.backfill_company_profiles.json', show_default=True,
+                  help='File recording the last fully processed company id.')
+    @click.option('--restart', is_flag=True, help='Ignore any existing checkpoint and start from the first company.')
+    def backfill_company_profiles(workers, chunk_size, checkpoint_path, restart):
+        """Researches every incomplete company profile in parallel, resuming from the last checkpoint."""
+        import json
+        import os
+        import time
+        from .services.company_service import CompanyService
+
+        after_id = 0
+        if not restart and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                after_id = json.load(f).get('last_company_id', 0)
+            click.echo(f"Resuming after company #{after_id}.")
+
+        started = time.monotonic()
+
+        def checkpoint(last_id, stats):
+            tmp_path = f"{checkpoint_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'last_company_id': last_id, **stats}, f)
+            os.replace(tmp_path, checkpoint_path) # Atomic, so a crash never leaves a torn checkpoint.
+            elapsed = time.monotonic() - started
+            rate = stats['processed'] / elapsed if elapsed else 0
+            remaining = max(stats['total'] - stats['processed'], 0)
+            eta = f"{remaining / rate / 60:.1f} min" if rate else "unknown"
+            click.echo(f"{stats['processed']}/{stats['total']} processed ({stats['succeeded']} ok, {stats['failed']} failed), "
+                       f"{rate * 60:.1f}/min, ETA {eta}, checkpoint #{last_id}")
+
+        stats = CompanyService(current_app.logger).backfill_incomplete_profiles(
+            workers=workers, chunk_size=chunk_size, after_id=after_id, on_chunk=checkpoint
+        )
+        click.echo(f"Backfill complete: {stats['succeeded']} enriched, {stats['failed']} failed or skipped.")
@@ -0,0 +1,48 @@
+# Path: apps/backend/compression.py
+import gzip
+from flask import request
+
+from .config import config
+
+try:
+    import brotli
+except ImportError: # Brotli is optional; fall back to gzip only.
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html'}
+
+def _choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_response(response):
+    """after_request hook: compresses large, non-streamed text responses the client accepts."""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    body = response.get_data()
+    if len(body) < config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=config.BROTLI_COMPRESSION_QUALITY)
+    elif encoding == 'gzip':
+        compressed = gzip.compress(body, compresslevel=config.GZIP_COMPRESSION_LEVEL)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    return response
+
+def init_app(app):
+    app.after_request(compress_response)
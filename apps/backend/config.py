@@ -33,6 +33,104 @@ class Config:
     MAX_JOB_TEXT_LENGTH = int(os.getenv('MAX_JOB_TEXT_LENGTH', '200000')) # Increased significantly for initial ingest
     MAX_CLASSIFICATION_TEXT_LENGTH = int(os.getenv('MAX_CLASSIFICATION_TEXT_LENGTH', '2000')) # Remains small for cheap classification
 
+    # --- Gemini API Limits (per process, shared by requests, background tasks and CLI backfills) ---
+    GEMINI_MAX_CONCURRENT_REQUESTS = int(os.getenv('GEMINI_MAX_CONCURRENT_REQUESTS', '4'))
+    GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60'))
+    # Waiting calls are granted slots fairly across users; a request a user is waiting on counts this many times a background call.
+    GEMINI_INTERACTIVE_WEIGHT = float(os.getenv('GEMINI_INTERACTIVE_WEIGHT', '4'))
+
+    # --- Per-user Quotas (token buckets shared across workers; burst = bucket size) ---
+    RATE_LIMITS_ENABLED = os.getenv('RATE_LIMITS_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_JOB_SUBMIT_PER_HOUR = int(os.getenv('RATE_LIMIT_JOB_SUBMIT_PER_HOUR', '60'))
+    RATE_LIMIT_JOB_SUBMIT_BURST = int(os.getenv('RATE_LIMIT_JOB_SUBMIT_BURST', '10'))
+    RATE_LIMIT_JOB_IMPORT_PER_HOUR = int(os.getenv('RATE_LIMIT_JOB_IMPORT_PER_HOUR', '4'))
+    RATE_LIMIT_JOB_IMPORT_BURST = int(os.getenv('RATE_LIMIT_JOB_IMPORT_BURST', '2'))
+    RATE_LIMIT_RESUME_PARSE_PER_HOUR = int(os.getenv('RATE_LIMIT_RESUME_PARSE_PER_HOUR', '10'))
+    RATE_LIMIT_RESUME_PARSE_BURST = int(os.getenv('RATE_LIMIT_RESUME_PARSE_BURST', '3'))
+    RATE_LIMIT_REANALYSIS_PER_HOUR = int(os.getenv('RATE_LIMIT_REANALYSIS_PER_HOUR', '6'))
+    RATE_LIMIT_REANALYSIS_BURST = int(os.getenv('RATE_LIMIT_REANALYSIS_BURST', '2'))
+
+    # --- Background Work ---
+    BACKGROUND_WORKER_THREADS = int(os.getenv('BACKGROUND_WORKER_THREADS', '4'))
+
+    # --- Maintenance Sweeps ---
+    MAINTENANCE_SWEEP_BATCH_SIZE = int(os.getenv('MAINTENANCE_SWEEP_BATCH_SIZE', '5000')) # Primary-key range per UPDATE
+
+    # --- Maintenance Scheduler ---
+    # One gunicorn worker wins a Postgres advisory lock and runs the tasks; the rest stand by.
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_POLL_SECONDS = int(os.getenv('SCHEDULER_POLL_SECONDS', '30'))
+    SCHEDULER_JITTER_FRACTION = float(os.getenv('SCHEDULER_JITTER_FRACTION', '0.1')) # Up to +10% of each interval
+    URL_VALIDITY_CHECK_INTERVAL_SECONDS = int(os.getenv('URL_VALIDITY_CHECK_INTERVAL_SECONDS', '900'))
+    MAINTENANCE_SWEEP_INTERVAL_SECONDS = int(os.getenv('MAINTENANCE_SWEEP_INTERVAL_SECONDS', '21600'))
+
+    # --- Admin Operations ---
+    ADMIN_OPERATION_CHUNK_SIZE = int(os.getenv('ADMIN_OPERATION_CHUNK_SIZE', '25')) # Targets per committed chunk
+
+    # --- Re-analysis Debounce ---
+    # Profile edits within this window collapse into one re-analysis, run once the user stops editing.
+    REANALYSIS_DEBOUNCE_SECONDS = int(os.getenv('REANALYSIS_DEBOUNCE_SECONDS', '60'))
+    REANALYSIS_SWEEP_INTERVAL_SECONDS = int(os.getenv('REANALYSIS_SWEEP_INTERVAL_SECONDS', '300')) # Picks up requests whose timer was lost
+
+    # --- Job Submission ---
+    JOB_SUBMISSION_WAIT_SECONDS = int(os.getenv('JOB_SUBMISSION_WAIT_SECONDS', '90')) # How long a duplicate submission waits on the in-flight one
+    JOB_SUBMISSION_POLL_SECONDS = float(os.getenv('JOB_SUBMISSION_POLL_SECONDS', '1.0'))
+    JOB_SUBMISSION_LEASE_SECONDS = int(os.getenv('JOB_SUBMISSION_LEASE_SECONDS', '300')) # Renewed by long-running leaders
+    JOB_SUBMISSION_RECORD_TTL_HOURS = int(os.getenv('JOB_SUBMISSION_RECORD_TTL_HOURS', '24')) # Finished in-flight records and idempotency keys
+    IDEMPOTENCY_KEY_STALE_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_STALE_SECONDS', '300')) # An in-progress key older than this was abandoned by a dead worker
+
+    # --- Bulk Job Import ---
+    JOB_IMPORT_MAX_URLS = int(os.getenv('JOB_IMPORT_MAX_URLS', '500'))
+    JOB_IMPORT_FETCH_WORKERS = int(os.getenv('JOB_IMPORT_FETCH_WORKERS', '8'))
+    JOB_IMPORT_EXTRACT_WORKERS = int(os.getenv('JOB_IMPORT_EXTRACT_WORKERS', '2'))
+    JOB_IMPORT_ANALYZE_WORKERS = int(os.getenv('JOB_IMPORT_ANALYZE_WORKERS', '4')) # Gemini calls are still capped by the process-wide limiter
+    JOB_IMPORT_QUEUE_SIZE = int(os.getenv('JOB_IMPORT_QUEUE_SIZE', '16')) # Items buffered between stages before the upstream stage blocks
+    JOB_IMPORT_SWEEP_INTERVAL_SECONDS = int(os.getenv('JOB_IMPORT_SWEEP_INTERVAL_SECONDS', '300')) # Resumes imports orphaned by a dead worker
+
+    # --- Recommendation Cache ---
+    # Entries are invalidated by profile/analysis/opportunity events; the TTL is only a safety net.
+    RECOMMENDATION_CACHE_TTL_SECONDS = int(os.getenv('RECOMMENDATION_CACHE_TTL_SECONDS', '21600'))
+
+    # --- Job Discovery Index (BM25) ---
+    # Each worker holds the index in memory and pulls documents indexed by other workers at most this often.
+    JOB_INDEX_SYNC_INTERVAL_SECONDS = int(os.getenv('JOB_INDEX_SYNC_INTERVAL_SECONDS', '60'))
+    # Descriptions are compacted to their leading tokens; titles carry most of the signal.
+    JOB_INDEX_MAX_DESCRIPTION_TOKENS = int(os.getenv('JOB_INDEX_MAX_DESCRIPTION_TOKENS', '400'))
+
+    # --- Analysis Triage ---
+    # Local pre-scores (0-100) decide which tracked jobs get a Gemini re-analysis first.
+    TRIAGE_MIN_SCORE = int(os.getenv('TRIAGE_MIN_SCORE', '15')) # Below this, re-analysis is skipped
+    TRIAGE_MAX_ANALYSES_PER_RUN = int(os.getenv('TRIAGE_MAX_ANALYSES_PER_RUN', '25')) # Per-user budget; the rest is deferred
+    TRIAGE_STREAM_BATCH_SIZE = int(os.getenv('TRIAGE_STREAM_BATCH_SIZE', '200')) # Jobs (with text) fetched per server-side cursor batch
+
+    # --- HTTP Response Compression ---
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+    GZIP_COMPRESSION_LEVEL = int(os.getenv('GZIP_COMPRESSION_LEVEL', '6'))
+    BROTLI_COMPRESSION_QUALITY = int(os.getenv('BROTLI_COMPRESSION_QUALITY', '5'))
+
+    # --- Tracked Jobs Delta Sync ---
+    DELTA_SYNC_SAFETY_WINDOW_SECONDS = int(os.getenv('DELTA_SYNC_SAFETY_WINDOW_SECONDS', '5'))
+    DELTA_SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('DELTA_SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+    # --- Server-Sent Events ---
+    # Streams hold a worker thread while open, so run gunicorn with threaded workers (e.g. -k gthread).
+    SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+    SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+    SSE_RETRY_MILLISECONDS = int(os.getenv('SSE_RETRY_MILLISECONDS', '3000'))
+
+    # --- Company Profile Cache ---
+    # Per worker process. Bounded by the encoded JSON size of cached profiles; invalidated via LISTEN/NOTIFY.
+    COMPANY_CACHE_MAX_BYTES = int(os.getenv('COMPANY_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+    COMPANY_CACHE_TTL_SECONDS = int(os.getenv('COMPANY_CACHE_TTL_SECONDS', '3600'))
+
+    # --- Company Enrichment ---
+    # Enrichment runs in the background; analyses written before it landed are re-run with the new context.
+    COMPANY_ENRICHMENT_REFRESH_ANALYSES = os.getenv('COMPANY_ENRICHMENT_REFRESH_ANALYSES', 'true').lower() == 'true'
+    COMPANY_ENRICHMENT_MAX_REFRESHES = int(os.getenv('COMPANY_ENRICHMENT_MAX_REFRESHES', '20'))
+
+    # --- Content Archive ---
+    ARCHIVE_ZSTD_LEVEL = int(os.getenv('ARCHIVE_ZSTD_LEVEL', '10'))
+
     # --- Domain Whitelist/Blacklist for Job Postings ---
     # Domains from which job posts are considered high quality and bypass AI classification.
     # Add company career sites and major reputable job boards.
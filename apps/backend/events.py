@@ -0,0 +1,74 @@
+# Path: apps/backend/events.py
+import queue
+import threading
+from collections import defaultdict
+from flask import current_app
+
+from .notifications import notify, listener
+
+USER_EVENTS_CHANNEL = 'tt_user_events'
+
+# Event types pushed to clients over /api/events/stream
+ANALYSIS_UPDATED = 'analysis.updated'
+COMPANY_ENRICHED = 'company.enriched'
+REANALYSIS_COMPLETED = 'reanalysis.completed'
+JOB_IMPORT_COMPLETED = 'job_import.completed'
+
+# Bytes of user ids per notification; with the envelope this keeps payloads under Postgres' 8000-byte limit.
+USER_IDS_BYTE_BUDGET = 6000
+
+def publish_user_event(user_ids, event_type: str, data: dict):
+    """
+    Queues an event for the given users; it is delivered to every worker when the session commits.
+    Large audiences are split across several notifications so no payload exceeds Postgres' limit.
+    """
+    user_ids = sorted(set(user_ids))
+    chunk, chunk_bytes = [], 0
+    for user_id in user_ids:
+        id_bytes = len(str(user_id)) + 1 # Digits plus the separating comma
+        if chunk and chunk_bytes + id_bytes > USER_IDS_BYTE_BUDGET:
+            notify(USER_EVENTS_CHANNEL, {"user_ids": chunk, "type": event_type, "data": data})
+            chunk, chunk_bytes = [], 0
+        chunk.append(user_id)
+        chunk_bytes += id_bytes
+    if chunk:
+        notify(USER_EVENTS_CHANNEL, {"user_ids": chunk, "type": event_type, "data": data})
+
+class UserEventBroker:
+    """Fans events received from Postgres out to the SSE streams open in this worker process."""
+
+    def __init__(self, max_queue_size=100):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._max_queue_size = max_queue_size
+        self._registered = False
+
+    def subscribe(self, user_id: int):
+        if not self._registered:
+            with self._lock:
+                if not self._registered:
+                    listener.add_handler(USER_EVENTS_CHANNEL, self._dispatch, current_app.logger)
+                    self._registered = True
+        subscription = queue.Queue(maxsize=self._max_queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions: del self._subscribers[user_id]
+
+    def _dispatch(self, payload):
+        event = {"type": payload.get("type"), "data": payload.get("data", {})}
+        with self._lock:
+            targets = [s for uid in payload.get("user_ids", []) for s in self._subscribers.get(uid, ())]
+        for subscription in targets:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                pass # A stalled client misses events; it resyncs via the delta endpoint on reconnect.
+
+broker = UserEventBroker()
@@ -0,0 +1,99 @@
+# Path: apps/backend/gemini_limits.py
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import config
+
+# Whose work the current Gemini calls are: (user_id or None for system work, weight).
+_current_ai_work = ContextVar('current_ai_work', default=(None, 1.0))
+
+@contextmanager
+def ai_work_for(user_id: int, interactive: bool = False):
+    """
+    Attributes Gemini calls made inside the block to `user_id` for fair queueing. Interactive work (a
+    request the user is waiting on) is weighted GEMINI_INTERACTIVE_WEIGHT times background work.
+    Context variables don't cross threads, so worker threads must enter this themselves.
+    """
+    token = _current_ai_work.set((user_id, config.GEMINI_INTERACTIVE_WEIGHT if interactive else 1.0))
+    try:
+        yield
+    finally:
+        _current_ai_work.reset(token)
+
+class GeminiRateLimiter:
+    """
+    Process-wide limits on Gemini calls, shared by every service and background thread:
+    at most `max_concurrent` requests in flight and a token bucket of `per_minute` starts.
+    Use as a context manager around the HTTP request.
+
+    When calls are waiting, slots go out by start-time fair queueing across users: each call is tagged
+    with the virtual time at which its user's previous call finishes, so a user with fifty queued
+    analyses gets one slot in turn with everyone else instead of all fifty ahead of them. Heavier-weighted calls advance their user's
+    virtual time less, and an idle user restarts at the current virtual time rather than banking credit.
+    """
+
+    def __init__(self, max_concurrent: int, per_minute: int):
+        self._max_concurrent = max_concurrent
+        self._in_flight = 0
+        self._waiting = [] # Heap of [virtual start tag, sequence, user]
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags = {}
+        self._slots = threading.Condition()
+        self._rate = per_minute / 60.0
+        self._capacity = max(1.0, float(per_minute) / 6) # Allow ~10s worth of burst
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _acquire_slot(self):
+        user_id, weight = _current_ai_work.get()
+        with self._slots:
+            start = max(self._virtual_time, self._finish_tags.get(user_id, 0.0))
+            self._finish_tags[user_id] = start + 1.0 / weight
+            ticket = [start, next(self._sequence), user_id]
+            heapq.heappush(self._waiting, ticket)
+            while self._in_flight >= self._max_concurrent or self._waiting[0] is not ticket:
+                self._slots.wait()
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            self._virtual_time = max(self._virtual_time, start)
+            if len(self._finish_tags) > 1024: # Users at or behind the virtual clock gain nothing from their entry
+                self._finish_tags = {user: tag for user, tag in self._finish_tags.items() if tag > self._virtual_time}
+            self._slots.notify_all() # The next ticket may fit in a remaining slot
+
+    def _release_slot(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _take_token(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self._acquire_slot()
+        try:
+            self._take_token()
+        except BaseException:
+            self._release_slot()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self._release_slot()
+        return False
+
+gemini_limiter = GeminiRateLimiter(config.GEMINI_MAX_CONCURRENT_REQUESTS, config.GEMINI_REQUESTS_PER_MINUTE)
@@ -0,0 +1,33 @@
+# Path: apps/backend/http_caching.py
+import hashlib
+from flask import request, jsonify, make_response
+
+def make_etag(*parts):
+    """Builds an opaque ETag value from data version stamps (timestamps, counters, query args)."""
+    raw = '|'.join('' if part is None else (part.isoformat() if hasattr(part, 'isoformat') else str(part)) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def not_modified_response(etag):
+    """
+    Returns a 304 response if the request's If-None-Match already holds `etag`, else None.
+    Call this before running the heavy query so a match costs only the version-stamp lookup.
+    """
+    if etag and request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+def json_response_with_etag(payload, etag, status=200):
+    """`payload` is anything jsonify accepts, or already-encoded JSON bytes (e.g. from a cache)."""
+    if isinstance(payload, bytes):
+        response = make_response(payload, status)
+        response.mimetype = 'application/json'
+    else:
+        response = make_response(jsonify(payload), status)
+    if etag:
+        response.set_etag(etag, weak=True)
+    # Clients may keep the body but must revalidate before reusing it.
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
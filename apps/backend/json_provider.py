@@ -0,0 +1,38 @@
+# Path: apps/backend/json_provider.py
+import decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    # orjson handles str/int/float/bool/None, dict/list, datetime, date, enum, UUID and dataclasses natively.
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+def dumps_str(obj) -> str:
+    """str variant for APIs that require text, e.g. SQLAlchemy's JSONB serializer."""
+    return dumps_bytes(obj).decode('utf-8')
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, so jsonify() and every JSON response encode in C.
+    Datetimes are emitted as ISO 8601 and enums as their value, so read paths can hand rows
+    straight to jsonify() without a per-field isoformat()/.value pass.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps_str(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
@@ -0,0 +1,24 @@
+"""Add job url submission leases
+
+Revision ID: 0b7d3e9a4c52
+Revises: f2c84a6d1e39
+Create Date: 2026-10-19 10:03:17.662804
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7d3e9a4c52'
+down_revision = 'f2c84a6d1e39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('job_url_submissions', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('job_url_submissions', 'lease_expires_at')
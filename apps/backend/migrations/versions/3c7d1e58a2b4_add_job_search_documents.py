@@ -0,0 +1,33 @@
+"""Add job search documents for the BM25 discovery index
+
+Revision ID: 3c7d1e58a2b4
+Revises: 912159590455
+Create Date: 2026-10-18 10:03:17.554902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3c7d1e58a2b4'
+down_revision = '912159590455'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_search_documents',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('term_freqs', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('indexed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_job_search_documents_indexed_at', 'job_search_documents', ['indexed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_search_documents_indexed_at', table_name='job_search_documents')
+    op.drop_table('job_search_documents')
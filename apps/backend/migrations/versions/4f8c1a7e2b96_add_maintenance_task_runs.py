@@ -0,0 +1,37 @@
+"""Add maintenance task runs
+
+Revision ID: 4f8c1a7e2b96
+Revises: e2a95c7b4d18
+Create Date: 2026-10-19 00:32:47.503219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8c1a7e2b96'
+down_revision = 'e2a95c7b4d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('maintenance_task_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_name', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_maintenance_task_runs_task_name_started_at', 'maintenance_task_runs', ['task_name', 'started_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_maintenance_task_runs_task_name_started_at', table_name='maintenance_task_runs')
+    op.drop_table('maintenance_task_runs')
@@ -0,0 +1,26 @@
+"""Add updated_at to user_profiles for profile version stamps
+
+Revision ID: 5b2e8f1c9d40
+Revises: a41f09c6d7e3
+Create Date: 2026-10-18 12:40:52.117604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8f1c9d40'
+down_revision = 'a41f09c6d7e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_profiles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_profiles', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,51 @@
+"""Add job url submissions and idempotency keys
+
+Revision ID: 5c8e1f4a9d62
+Revises: d47b2e8c6f31
+Create Date: 2026-10-19 03:42:09.518236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e1f4a9d62'
+down_revision = 'd47b2e8c6f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_url_submissions',
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('leader_user_id', sa.Integer(), nullable=True),
+    sa.Column('job_opportunity_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['leader_user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['job_opportunity_id'], ['job_opportunities.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('url')
+    )
+    op.create_index('ix_job_url_submissions_finished_at', 'job_url_submissions', ['finished_at'], unique=False)
+    op.create_table('idempotency_keys',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'key')
+    )
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_index('ix_job_url_submissions_finished_at', table_name='job_url_submissions')
+    op.drop_table('job_url_submissions')
@@ -0,0 +1,41 @@
+"""Add company name keys and aliases
+
+Revision ID: 7d4f2b9e6a13
+Revises: c8a3d6e2f715
+Create Date: 2026-10-18 23:02:17.412398
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4f2b9e6a13'
+down_revision = 'c8a3d6e2f715'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # name_key starts out NULL; `flask merge-duplicate-companies --apply` merges existing duplicates and fills it.
+    op.add_column('companies', sa.Column('name_key', sa.String(length=255), nullable=True))
+    op.create_index('uq_companies_name_key', 'companies', ['name_key'], unique=True)
+    op.create_table('company_aliases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('alias_key', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_company_aliases_kind_alias_key', 'company_aliases', ['kind', 'alias_key'], unique=True)
+    op.create_index('ix_company_aliases_company_id', 'company_aliases', ['company_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_company_aliases_company_id', table_name='company_aliases')
+    op.drop_index('uq_company_aliases_kind_alias_key', table_name='company_aliases')
+    op.drop_table('company_aliases')
+    op.drop_index('uq_companies_name_key', table_name='companies')
+    op.drop_column('companies', 'name_key')
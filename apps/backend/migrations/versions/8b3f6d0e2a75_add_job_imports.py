@@ -0,0 +1,54 @@
+"""Add job imports
+
+Revision ID: 8b3f6d0e2a75
+Revises: 5c8e1f4a9d62
+Create Date: 2026-10-19 05:07:31.240663
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3f6d0e2a75'
+down_revision = '5c8e1f4a9d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_imports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_imports_user_id_created_at', 'job_imports', ['user_id', 'created_at'], unique=False)
+    op.create_table('job_import_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('import_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('canonical_url', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('tracked_job_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['import_id'], ['job_imports.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tracked_job_id'], ['tracked_jobs.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_import_items_import_id_position', 'job_import_items', ['import_id', 'position'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_import_items_import_id_position', table_name='job_import_items')
+    op.drop_table('job_import_items')
+    op.drop_index('ix_job_imports_user_id_created_at', table_name='job_imports')
+    op.drop_table('job_imports')
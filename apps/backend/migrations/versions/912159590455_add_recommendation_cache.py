@@ -0,0 +1,32 @@
+"""Add recommendation cache
+
+Revision ID: 912159590455
+Revises: e457dccf315f
+Create Date: 2026-10-18 09:12:41.201733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '912159590455'
+down_revision = 'e457dccf315f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recommendation_cache',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('recommendation_cache')
@@ -0,0 +1,24 @@
+"""Index job analyses by protocol version
+
+Revision ID: 9a3e5c2d7f14
+Revises: b61d3e9f0a27
+Create Date: 2026-10-19 02:04:51.370166
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e5c2d7f14'
+down_revision = 'b61d3e9f0a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_job_analyses_protocol_version_user_id', 'job_analyses', ['analysis_protocol_version', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_analyses_protocol_version_user_id', table_name='job_analyses')
@@ -0,0 +1,40 @@
+"""Add content-addressed blob archive for job pages
+
+Revision ID: a41f09c6d7e3
+Revises: 3c7d1e58a2b4
+Create Date: 2026-10-18 11:26:05.918340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f09c6d7e3'
+down_revision = '3c7d1e58a2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('content_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('content_encoding', sa.String(length=20), nullable=False),
+    sa.Column('raw_size', sa.Integer(), nullable=False),
+    sa.Column('compressed_size', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    with op.batch_alter_table('job_opportunities', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('raw_html_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('job_opportunities_raw_html_sha256_fkey', 'content_blobs', ['raw_html_sha256'], ['sha256'])
+
+
+def downgrade():
+    with op.batch_alter_table('job_opportunities', schema=None) as batch_op:
+        batch_op.drop_constraint('job_opportunities_raw_html_sha256_fkey', type_='foreignkey')
+        batch_op.drop_column('raw_html_sha256')
+
+    op.drop_table('content_blobs')
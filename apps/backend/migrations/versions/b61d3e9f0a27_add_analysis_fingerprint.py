@@ -0,0 +1,34 @@
+"""Add analysis fingerprint and pending reanalyses
+
+Revision ID: b61d3e9f0a27
+Revises: 4f8c1a7e2b96
+Create Date: 2026-10-19 01:15:22.684910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61d3e9f0a27'
+down_revision = '4f8c1a7e2b96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('job_analyses', sa.Column('analysis_fingerprint', sa.String(length=64), nullable=True))
+    op.create_table('pending_reanalyses',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('requested_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_pending_reanalyses_due_at', 'pending_reanalyses', ['due_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_pending_reanalyses_due_at', table_name='pending_reanalyses')
+    op.drop_table('pending_reanalyses')
+    op.drop_column('job_analyses', 'analysis_fingerprint')
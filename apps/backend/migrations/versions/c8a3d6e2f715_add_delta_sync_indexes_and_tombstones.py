@@ -0,0 +1,37 @@
+"""Add delta-sync indexes and tracked job tombstones
+
+Revision ID: c8a3d6e2f715
+Revises: 5b2e8f1c9d40
+Create Date: 2026-10-18 13:35:44.870129
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a3d6e2f715'
+down_revision = '5b2e8f1c9d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tracked_job_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tracked_job_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tracked_job_tombstones_user_id_deleted_at', 'tracked_job_tombstones', ['user_id', 'deleted_at'], unique=False)
+    op.create_index('ix_tracked_jobs_user_id_updated_at', 'tracked_jobs', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_job_analyses_user_id_updated_at', 'job_analyses', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_analyses_user_id_updated_at', table_name='job_analyses')
+    op.drop_index('ix_tracked_jobs_user_id_updated_at', table_name='tracked_jobs')
+    op.drop_index('ix_tracked_job_tombstones_user_id_deleted_at', table_name='tracked_job_tombstones')
+    op.drop_table('tracked_job_tombstones')
@@ -0,0 +1,65 @@
+"""Unique canonical jobs and tracked jobs
+
+Merges duplicate canonical jobs (same company and description hash, left behind by racing submissions
+and company merges) and duplicate tracked jobs, then adds the unique indexes job submission upserts on.
+
+Revision ID: d47b2e8c6f31
+Revises: 9a3e5c2d7f14
+Create Date: 2026-10-19 03:12:40.928315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd47b2e8c6f31'
+down_revision = '9a3e5c2d7f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # --- Canonical jobs: keep the oldest of each (company_id, job_description_hash) group ---
+    op.execute("""
+        CREATE TEMPORARY TABLE job_duplicates ON COMMIT DROP AS
+        SELECT id AS duplicate_id, keeper_id FROM (
+            SELECT id, min(id) OVER (PARTITION BY company_id, job_description_hash) AS keeper_id
+            FROM jobs WHERE company_id IS NOT NULL AND job_description_hash IS NOT NULL
+        ) grouped
+        WHERE id <> keeper_id
+    """)
+    op.execute("UPDATE job_opportunities o SET job_id = d.keeper_id FROM job_duplicates d WHERE o.job_id = d.duplicate_id")
+    # A user keeps one analysis per merged job: the keeper's, else the one on the lowest duplicate id.
+    op.execute("""
+        DELETE FROM job_analyses a USING job_duplicates d
+        WHERE a.job_id = d.duplicate_id AND EXISTS (
+            SELECT 1 FROM job_analyses b LEFT JOIN job_duplicates bd ON bd.duplicate_id = b.job_id
+            WHERE COALESCE(bd.keeper_id, b.job_id) = d.keeper_id AND b.user_id = a.user_id AND b.job_id < a.job_id
+        )
+    """)
+    op.execute("UPDATE job_analyses a SET job_id = d.keeper_id FROM job_duplicates d WHERE a.job_id = d.duplicate_id")
+    op.execute("DELETE FROM jobs j USING job_duplicates d WHERE j.id = d.duplicate_id")
+    op.create_index('uq_jobs_company_id_description_hash', 'jobs', ['company_id', 'job_description_hash'], unique=True)
+
+    # --- Tracked jobs: keep the oldest per (user, opportunity); offers move to it, clients get tombstones ---
+    op.execute("""
+        CREATE TEMPORARY TABLE tracked_job_duplicates ON COMMIT DROP AS
+        SELECT id AS duplicate_id, user_id, keeper_id FROM (
+            SELECT id, user_id, min(id) OVER (PARTITION BY user_id, job_opportunity_id) AS keeper_id FROM tracked_jobs
+        ) grouped
+        WHERE id <> keeper_id
+    """)
+    op.execute("UPDATE job_offers o SET tracked_job_id = d.keeper_id FROM tracked_job_duplicates d WHERE o.tracked_job_id = d.duplicate_id")
+    op.execute("""
+        INSERT INTO tracked_job_tombstones (user_id, tracked_job_id, deleted_at)
+        SELECT user_id, duplicate_id, now() FROM tracked_job_duplicates
+    """)
+    op.execute("DELETE FROM tracked_jobs t USING tracked_job_duplicates d WHERE t.id = d.duplicate_id")
+    op.create_index('uq_tracked_jobs_user_id_job_opportunity_id', 'tracked_jobs', ['user_id', 'job_opportunity_id'], unique=True)
+
+
+def downgrade():
+    # Merged duplicates are not restored.
+    op.drop_index('uq_tracked_jobs_user_id_job_opportunity_id', table_name='tracked_jobs')
+    op.drop_index('uq_jobs_company_id_description_hash', table_name='jobs')
@@ -0,0 +1,31 @@
+"""Add user rate limits
+
+Revision ID: e93a7c1b5f08
+Revises: 8b3f6d0e2a75
+Create Date: 2026-10-19 06:21:48.903117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a7c1b5f08'
+down_revision = '8b3f6d0e2a75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_rate_limits',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.String(length=50), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'bucket')
+    )
+
+
+def downgrade():
+    op.drop_table('user_rate_limits')
@@ -0,0 +1,25 @@
+"""Add admin operation sub cursor
+
+Revision ID: f2c84a6d1e39
+Revises: e93a7c1b5f08
+Create Date: 2026-10-19 09:12:40.357921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c84a6d1e39'
+down_revision = 'e93a7c1b5f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('admin_operations', sa.Column('sub_cursor', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('admin_operations', 'sub_cursor')
@@ -4,6 +4,7 @@ from datetime import datetime
 import pytz
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import text, Index
+from sqlalchemy.orm import deferred
 import enum
 
 def get_utc_now():
@@ -74,6 +75,9 @@ class TrackedJobStatusEnum(enum.Enum):
     WITHDRAWN = 'WITHDRAWN'
     EXPIRED = 'EXPIRED'
 
+# Statuses in which the user is still pursuing the job; the rest are terminal.
+OPEN_TRACKED_JOB_STATUSES = (TrackedJobStatusEnum.SAVED, TrackedJobStatusEnum.APPLIED, TrackedJobStatusEnum.INTERVIEWING, TrackedJobStatusEnum.OFFER_NEGOTIATIONS)
+
 
 # --- Model Definitions ---
 
@@ -126,6 +130,7 @@ class UserProfile(db.Model):
     personality_16_personalities = db.Column(db.String(50), nullable=True)
     other_personal_attributes = db.Column(db.Text, nullable=True)
     has_completed_onboarding = db.Column(db.Boolean, default=False, nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=True)
 
     user = db.relationship('User', backref=db.backref('profile', uselist=False))
 
@@ -158,7 +163,8 @@ class UserProfile(db.Model):
             'work_experience': self.work_experience,
             'personality_16_personalities': self.personality_16_personalities,
             'other_personal_attributes': self.other_personal_attributes,
-            'has_completed_onboarding': self.has_completed_onboarding
+            'has_completed_onboarding': self.has_completed_onboarding,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class Company(db.Model):
@@ -174,9 +180,15 @@ class Company(db.Model):
     headquarters = db.Column(db.String(255), nullable=True)
     founded_year = db.Column(db.Integer, nullable=True)
     website_url = db.Column(db.Text, nullable=True)
+    # normalize_company_name(name): "Acme, Inc.", "ACME Inc" and "Acmé" all share one key. Null until backfilled.
+    name_key = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=True)
 
+    __table_args__ = (
+        Index('uq_companies_name_key', 'name_key', unique=True),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -204,6 +216,7 @@ class JobOpportunity(db.Model):
     extracted_location = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     last_checked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    raw_html_sha256 = db.Column(db.String(64), db.ForeignKey('content_blobs.sha256'), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=False)
 
@@ -219,6 +232,7 @@ class JobOpportunity(db.Model):
             'extracted_location': self.extracted_location,
             'is_active': self.is_active,
             'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None,
+            'raw_html_sha256': self.raw_html_sha256,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -230,7 +244,9 @@ class Job(db.Model):
     company_name = db.Column(db.String(255), nullable=True)
     job_title = db.Column(db.Text, nullable=False)
     source = db.Column(db.String(255), nullable=True)
-    notes = db.Column(db.Text, nullable=True)
+    # The full scraped description (up to MAX_JOB_TEXT_LENGTH). Deferred so list queries never pull it;
+    # load it explicitly with undefer_group('job_text') where the text is actually needed.
+    notes = deferred(db.Column(db.Text, nullable=True), group='job_text')
     found_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=True)
     status = db.Column(db.String(50), nullable=False, default='Active')
     last_checked_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=True)
@@ -241,16 +257,20 @@ class Job(db.Model):
     deduced_job_level = db.Column(db.Enum(JobLevelEnum, name='job_level_enum', native_enum=True), nullable=True)
     job_description_hash = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        # One canonical job per posting text per company; submissions upsert against it.
+        Index('uq_jobs_company_id_description_hash', 'company_id', 'job_description_hash', unique=True),
+    )
+
     company = db.relationship('Company', backref=db.backref('jobs', lazy=True))
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_notes=False):
+        job_dict = {
             'id': self.id,
             'company_id': self.company_id,
             'company_name': self.company_name,
             'job_title': self.job_title,
             'source': self.source,
-            'notes': self.notes,
             'found_at': self.found_at.isoformat() if self.found_at else None,
             'status': self.status,
             'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None,
@@ -261,6 +281,9 @@ class Job(db.Model):
             'deduced_job_level': self.deduced_job_level.value if self.deduced_job_level else None,
             'job_description_hash': self.job_description_hash,
         }
+        if include_notes:
+            job_dict['notes'] = self.notes
+        return job_dict
 
 class TrackedJob(db.Model):
     __tablename__ = 'tracked_jobs'
@@ -280,6 +303,11 @@ class TrackedJob(db.Model):
     next_action_at = db.Column(db.DateTime(timezone=True), nullable=True)
     next_action_notes = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        Index('ix_tracked_jobs_user_id_updated_at', 'user_id', 'updated_at'),
+        Index('uq_tracked_jobs_user_id_job_opportunity_id', 'user_id', 'job_opportunity_id', unique=True),
+    )
+
     user = db.relationship('User', backref=db.backref('tracked_jobs', lazy=True))
     job_opportunity = db.relationship('JobOpportunity', backref=db.backref('tracked_by_users', lazy=True))
 
@@ -316,6 +344,13 @@ class JobAnalysis(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=True)
     analysis_protocol_version = db.Column(db.String(20), nullable=False)
+    # Hash of the profile, active resume and company context the analysis was produced from (NULL for older rows).
+    analysis_fingerprint = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (
+        Index('ix_job_analyses_user_id_updated_at', 'user_id', 'updated_at'),
+        Index('ix_job_analyses_protocol_version_user_id', 'analysis_protocol_version', 'user_id'),
+    )
 
     job = db.relationship('Job', backref=db.backref('analyses', lazy=True))
     user = db.relationship('User', backref=db.backref('job_analyses', lazy=True))
@@ -340,7 +375,7 @@ class ResumeSubmission(db.Model):
     __tablename__ = 'resume_submissions'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    raw_text = db.Column(db.Text, nullable=False)
+    raw_text = deferred(db.Column(db.Text, nullable=False), group='resume_text')
     submitted_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
     source = db.Column(db.String(50), nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
@@ -352,15 +387,17 @@ class ResumeSubmission(db.Model):
 
     user = db.relationship('User', backref=db.backref('resume_submissions', lazy=True))
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_raw_text=False):
+        resume_dict = {
             'id': self.id,
             'user_id': self.user_id,
-            'raw_text': self.raw_text,
             'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
             'source': self.source,
             'is_active': self.is_active
         }
+        if include_raw_text:
+            resume_dict['raw_text'] = self.raw_text
+        return resume_dict
 
 class JobOffer(db.Model):
     __tablename__ = 'job_offers'
@@ -391,4 +428,288 @@ class JobOffer(db.Model):
             'notes': self.notes,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+class RecommendationCache(db.Model):
+    __tablename__ = 'recommendation_cache'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    # Bumped on every invalidation; a computed payload is only stored if the version is unchanged.
+    version = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(JSONB, nullable=True)
+    computed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'version': self.version,
+            'payload': self.payload,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class JobSearchDocument(db.Model):
+    __tablename__ = 'job_search_documents'
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    # Pre-tokenized term frequencies so workers can load the BM25 index without re-tokenizing descriptions.
+    term_freqs = db.Column(JSONB, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    indexed_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_job_search_documents_indexed_at', 'indexed_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'term_freqs': self.term_freqs,
+            'length': self.length,
+            'indexed_at': self.indexed_at.isoformat() if self.indexed_at else None
+        }
+
+class ContentBlob(db.Model):
+    __tablename__ = 'content_blobs'
+    # SHA-256 of the uncompressed content, so identical pages fetched via different URLs are stored once.
+    sha256 = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False) # 'raw_html' or 'extracted_text'
+    content_encoding = db.Column(db.String(20), nullable=False, default='zstd')
+    raw_size = db.Column(db.Integer, nullable=False)
+    compressed_size = db.Column(db.Integer, nullable=False)
+    data = deferred(db.Column(db.LargeBinary, nullable=False), group='blob_data')
+    created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'kind': self.kind,
+            'content_encoding': self.content_encoding,
+            'raw_size': self.raw_size,
+            'compressed_size': self.compressed_size,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class TrackedJobTombstone(db.Model):
+    __tablename__ = 'tracked_job_tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tracked_job_id = db.Column(db.Integer, nullable=False) # No FK: the tracked job row is gone
+    deleted_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_tracked_job_tombstones_user_id_deleted_at', 'user_id', 'deleted_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'tracked_job_id': self.tracked_job_id,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
+
+class CompanyAlias(db.Model):
+    __tablename__ = 'company_aliases'
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False) # 'name' (normalized name key) or 'domain' (registrable domain)
+    alias_key = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+
+    __table_args__ = (
+        Index('uq_company_aliases_kind_alias_key', 'kind', 'alias_key', unique=True),
+        Index('ix_company_aliases_company_id', 'company_id'),
+    )
+
+    company = db.relationship('Company', backref=db.backref('aliases', lazy=True, cascade='all, delete-orphan'))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'kind': self.kind,
+            'alias_key': self.alias_key,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class AdminOperation(db.Model):
+    __tablename__ = 'admin_operations'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending') # pending, running, completed, failed, cancelled
+    params = db.Column(JSONB, nullable=False, default=dict)
+    # Keyset cursor: every target with an id <= cursor has been attempted. Resuming continues after it.
+    cursor = db.Column(db.Integer, nullable=False, default=0)
+    # Resume point inside the first target after the cursor, for kinds that process a target in several steps.
+    sub_cursor = db.Column(JSONB, nullable=True)
+    total = db.Column(db.Integer, nullable=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    succeeded = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    active_seconds = db.Column(db.Float, nullable=False, default=0.0) # Time spent processing, summed over runs
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_admin_operations_created_at', 'created_at'),
+    )
+
+    def to_dict(self):
+        throughput = self.processed / self.active_seconds if self.active_seconds else None
+        remaining = max(self.total - self.processed, 0) if self.total is not None else None
+        eta_seconds = round(remaining / throughput) if throughput and remaining is not None and self.status == 'running' else None
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.params,
+            'cursor': self.cursor,
+            'sub_cursor': self.sub_cursor,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'throughput_per_minute': round(throughput * 60, 2) if throughput else None,
+            'eta_seconds': eta_seconds,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class MaintenanceTaskRun(db.Model):
+    __tablename__ = 'maintenance_task_runs'
+    id = db.Column(db.Integer, primary_key=True)
+    task_name = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running') # running, succeeded, failed
+    started_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    result = db.Column(JSONB, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        Index('ix_maintenance_task_runs_task_name_started_at', 'task_name', 'started_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_name': self.task_name,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_ms': self.duration_ms,
+            'result': self.result,
+            'error': self.error
+        }
+
+class PendingReanalysis(db.Model):
+    """A debounced re-analysis request; every profile edit pushes due_at back, and the run claims the row."""
+    __tablename__ = 'pending_reanalyses'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    requested_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    due_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_pending_reanalyses_due_at', 'due_at'),
+    )
+
+class JobUrlSubmission(db.Model):
+    """The in-flight record for a canonical job URL being ingested; followers wait on its leader instead of redoing the work."""
+    __tablename__ = 'job_url_submissions'
+    url = db.Column(db.Text, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='running') # running, succeeded, failed
+    leader_user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    job_opportunity_id = db.Column(db.Integer, db.ForeignKey('job_opportunities.id', ondelete='SET NULL'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    lease_expires_at = db.Column(db.DateTime(timezone=True), nullable=True) # A running leader that died stops blocking others here
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_job_url_submissions_finished_at', 'finished_at'),
+    )
+
+class IdempotencyKey(db.Model):
+    """A client-supplied Idempotency-Key and the outcome of the first request that used it."""
+    __tablename__ = 'idempotency_keys'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress') # in_progress, completed
+    resource_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+
+class JobImport(db.Model):
+    """A bulk import of job URLs for one user; per-URL progress lives in job_import_items."""
+    __tablename__ = 'job_imports'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending') # pending, running, completed, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_job_imports_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobImportItem(db.Model):
+    __tablename__ = 'job_import_items'
+    id = db.Column(db.Integer, primary_key=True)
+    import_id = db.Column(db.Integer, db.ForeignKey('job_imports.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False) # Row in the submitted list, from 0
+    url = db.Column(db.Text, nullable=False) # As submitted
+    canonical_url = db.Column(db.Text, nullable=True)
+    # queued, fetching, extracting, analyzing, storing, succeeded, duplicate, failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    tracked_job_id = db.Column(db.Integer, db.ForeignKey('tracked_jobs.id', ondelete='SET NULL'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_job_import_items_import_id_position', 'import_id', 'position'),
+    )
+
+    def to_dict(self):
+        return {
+            'position': self.position,
+            'url': self.url,
+            'status': self.status,
+            'tracked_job_id': self.tracked_job_id,
+            'error': self.error
+        }
+
+class UserRateLimit(db.Model):
+    """A per-user token bucket, shared by every worker; tokens refill continuously from updated_at."""
+    __tablename__ = 'user_rate_limits'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    bucket = db.Column(db.String(50), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=False)
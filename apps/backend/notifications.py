@@ -0,0 +1,100 @@
+# Path: apps/backend/notifications.py
+import json
+import select
+import threading
+import time
+from collections import defaultdict
+import psycopg2
+import psycopg2.extensions
+
+from .app import db
+from .config import config
+
+def notify(channel: str, payload: dict):
+    """
+    Queues a Postgres NOTIFY on the current session. Postgres only delivers it when the surrounding
+    transaction commits, so listeners never see events for work that was rolled back.
+    Payloads must stay well under Postgres' 8000-byte limit; send ids, not documents.
+    """
+    db.session.execute(db.text("SELECT pg_notify(:channel, :payload)"), {
+        "channel": channel, "payload": json.dumps(payload, separators=(',', ':'))
+    })
+
+class PostgresListener:
+    """
+    One LISTEN connection per worker process, shared by every channel handler in that process.
+    Handlers run on the listener thread and must be quick and non-blocking.
+    """
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+        self._connect_callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._logger = None
+
+    def add_handler(self, channel: str, handler, logger, on_connect=None):
+        """
+        Registers `handler(payload)` for `channel`. `on_connect()` runs every time the listener
+        (re)connects; notifications sent while it was disconnected are lost, so caches use it to flush.
+        """
+        with self._lock:
+            self._handlers[channel].append(handler)
+            if on_connect: self._connect_callbacks.append(on_connect)
+            self._logger = self._logger or logger
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='tt-pg-listener', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                self._logger.error(f"Postgres listener disconnected: {e}. Reconnecting in {backoff}s.", exc_info=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _listen(self):
+        conn = psycopg2.connect(config.DATABASE_URL)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        listening = set()
+        connected_callbacks = 0
+        try:
+            while True:
+                with self._lock:
+                    channels = set(self._handlers)
+                    new_callbacks = self._connect_callbacks[connected_callbacks:]
+                with conn.cursor() as cur:
+                    for channel in channels - listening:
+                        cur.execute(f'LISTEN "{channel}"')
+                        listening.add(channel)
+                for callback in new_callbacks:
+                    callback()
+                connected_callbacks += len(new_callbacks)
+
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    self._dispatch(notification.channel, notification.payload)
+        finally:
+            conn.close()
+
+    def _dispatch(self, channel, raw_payload):
+        try:
+            payload = json.loads(raw_payload)
+        except ValueError:
+            self._logger.warning(f"Ignoring malformed notification on {channel}: {raw_payload[:200]}")
+            return
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                self._logger.error(f"Notification handler for {channel} failed: {e}", exc_info=True)
+
+listener = PostgresListener()
@@ -0,0 +1,88 @@
+# Path: apps/backend/rate_limits.py
+import math
+from dataclasses import dataclass
+from functools import wraps
+from flask import g, jsonify, current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .app import db
+from .config import config
+from .gemini_limits import ai_work_for
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: int # Burst size
+    per_hour: int # Steady-state refill
+
+    @property
+    def rate(self):
+        return self.per_hour / 3600.0
+
+# Per-user quotas on AI-heavy work, by bucket name.
+RATE_LIMITS = {
+    'job-submit': RateLimit(config.RATE_LIMIT_JOB_SUBMIT_BURST, config.RATE_LIMIT_JOB_SUBMIT_PER_HOUR),
+    'job-import': RateLimit(config.RATE_LIMIT_JOB_IMPORT_BURST, config.RATE_LIMIT_JOB_IMPORT_PER_HOUR),
+    'resume-parse': RateLimit(config.RATE_LIMIT_RESUME_PARSE_BURST, config.RATE_LIMIT_RESUME_PARSE_PER_HOUR),
+    'reanalysis': RateLimit(config.RATE_LIMIT_REANALYSIS_BURST, config.RATE_LIMIT_REANALYSIS_PER_HOUR),
+}
+
+def consume_quota(user_id: int, bucket: str, cost: int = 1):
+    """
+    Takes `cost` tokens from the user's bucket. Returns 0 if they were available, otherwise the whole
+    number of seconds until they will be. The refill and the take happen in a single upsert on
+    user_rate_limits, so concurrent requests on any worker can't both spend the last token. Commits.
+    """
+    if not config.RATE_LIMITS_ENABLED: return 0
+    from .models import UserRateLimit
+    limit = RATE_LIMITS[bucket]
+    available = func.least(
+        limit.capacity, UserRateLimit.tokens + func.extract('epoch', func.now() - UserRateLimit.updated_at) * limit.rate
+    )
+    stmt = pg_insert(UserRateLimit).values(user_id=user_id, bucket=bucket, tokens=limit.capacity - cost, updated_at=func.now())
+    taken = db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserRateLimit.user_id, UserRateLimit.bucket],
+            set_={'tokens': available - cost, 'updated_at': func.now()},
+            where=available >= cost
+        ).returning(UserRateLimit.tokens)
+    ).first()
+    if taken:
+        db.session.commit()
+        return 0
+    tokens = db.session.scalar(db.select(available).where(UserRateLimit.user_id == user_id, UserRateLimit.bucket == bucket))
+    db.session.commit()
+    return max(1, math.ceil((cost - (tokens or 0)) / limit.rate))
+
+def over_quota_response(user_id: int, bucket: str):
+    """
+    For routes that only charge on some paths: spends one token from the user's `bucket` and returns
+    None, or the 429 response with Retry-After to send when it's empty.
+    """
+    try:
+        retry_after = consume_quota(user_id, bucket)
+    except Exception as e:
+        # Fail open: a quota-store hiccup shouldn't take the endpoint down with it.
+        db.session.rollback()
+        current_app.logger.error(f"Rate limit check for {bucket} failed: {e}", exc_info=True)
+        return None
+    if not retry_after: return None
+    current_app.logger.info(f"User {user_id} is over the {bucket} quota; retry in {retry_after}s.")
+    return jsonify({"message": "Too many requests. Please try again later.", "retry_after": retry_after}), 429, {'Retry-After': str(retry_after)}
+
+def rate_limited(bucket: str):
+    """
+    Route decorator, applied below @token_required: spends one token from the current user's `bucket`,
+    answering 429 with Retry-After when it's empty, and attributes the request's Gemini calls to the
+    user at interactive weight.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user_id = g.current_user.id
+            over_quota = over_quota_response(user_id, bucket)
+            if over_quota: return over_quota
+            with ai_work_for(user_id, interactive=True):
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
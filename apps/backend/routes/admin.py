@@ -1,37 +1,48 @@
 # Path: apps/backend/routes/admin.py
-from flask import Blueprint, jsonify, g, current_app, request
+from flask import Blueprint, jsonify, g, current_app, request, url_for
 from ..auth import token_required, admin_required
 from ..app import db
 from ..models import User, Company, Job, JobOpportunity, TrackedJob, JobAnalysis
-from ..services.job_service import JobService
 from ..services.company_service import CompanyService
+from ..services.admin_operation_service import AdminOperationService
+from ..services.admin_service import AdminService
+from ..scheduler import scheduler
+from ..background import submit_background_task
 import requests
 from ..config import config
 
 # CORRECTED: The url_prefix should not contain '/api' as it's added during registration in app.py
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+def _start_operation(kind, params=None):
+    """Creates and queues an admin operation, answering 202 with its id and a URL to poll for progress."""
+    logger = current_app.logger
+    try:
+        operation = AdminOperationService(logger).create_operation(kind, params, created_by=g.current_user.id)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to start admin operation {kind}: {e}", exc_info=True)
+        return jsonify({"message": "An unexpected error occurred."}), 500
+    logger.info(f"Admin user {g.current_user.id} started operation {operation.id} ({kind}).")
+    return jsonify({
+        "message": f"Operation {operation.id} queued.",
+        "operation": operation.to_dict(),
+        "status_url": url_for('admin.get_operation', operation_id=operation.id)
+    }), 202
+
 # This is the new endpoint to fix the "Jobs For You" data regression
 @admin_bp.route('/trigger-reanalysis/user/<int:user_id>', methods=['POST'])
 @token_required
 @admin_required
 def trigger_user_reanalysis(user_id):
     """
-    Manually triggers a full re-analysis of all tracked jobs for a specific user.
+    Queues a re-analysis of a user's tracked jobs as an admin operation.
     This is useful for backfilling data after AI protocol changes.
     """
-    logger = current_app.logger
-    logger.info(f"Admin user {g.current_user.id} triggering re-analysis for user {user_id}.")
-
-    try:
-        job_service = JobService(logger)
-        job_service.trigger_reanalysis_for_user(user_id)
-        
-        logger.info(f"Successfully queued re-analysis for user {user_id}.")
-        return jsonify({"message": f"Successfully triggered re-analysis for user {user_id}."}), 200
-    except Exception as e:
-        logger.error(f"Failed to trigger re-analysis for user {user_id}: {e}", exc_info=True)
-        return jsonify({"message": "An unexpected error occurred."}), 500
+    budget = request.args.get('budget', type=int) # Optional override of TRIAGE_MAX_ANALYSES_PER_RUN
+    return _start_operation('reanalyze_user_jobs', {"user_id": user_id, "budget": budget})
 
 
 @admin_bp.route('/list-models', methods=['GET'])
@@ -82,41 +93,97 @@ def db_reset():
 @token_required
 @admin_required
 def reprocess_malformed_job_data():
-    job_service = JobService(current_app.logger)
-    reprocessed_count = 0; failed_count = 0
-    # Assuming user_id=None is handled gracefully in create_or_get_canonical_job
-    # for system-level reprocessing. Let's use g.current_user.id for attribution.
-    admin_user_id = g.current_user.id
-    jobs_to_reprocess = Job.query.filter(db.or_(Job.job_title.ilike('%job not found at url%'), Job.job_description_hash == None, Job.salary_min == None)).limit(100).all()
-    for job in jobs_to_reprocess:
-        opportunity = db.session.query(JobOpportunity).filter_by(job_id=job.id).first()
-        if not opportunity:
-            failed_count += 1
-            continue
-        try:
-            re_processed_canonical_job, _ = job_service.create_or_get_canonical_job(url=opportunity.url, user_id=admin_user_id, commit=True)
-            if re_processed_canonical_job: reprocessed_count += 1
-            else: failed_count += 1
-        except Exception as e:
-            failed_count += 1
-            db.session.rollback()
-            current_app.logger.error(f"Error re-processing job ID: {job.id}: {e}", exc_info=True)
-    return jsonify({"message": "Job data re-processing initiated.", "reprocessed_count": reprocessed_count, "failed_count": failed_count}), 200
+    return _start_operation('reprocess_malformed_jobs')
 
 @admin_bp.route('/reprocess-incomplete-company-profiles', methods=['POST'])
 @token_required
 @admin_required
 def reprocess_incomplete_company_profiles():
-    company_service = CompanyService(current_app.logger)
-    reprocessed_count = 0; failed_count = 0
-    companies_to_reprocess = Company.query.filter(db.or_(Company.industry == None, Company.description == None, Company.mission == None)).limit(50).all()
-    for company in companies_to_reprocess:
-        try:
-            updated_company = company_service.research_and_update_company_profile(company.id)
-            if updated_company: reprocessed_count += 1
-            else: failed_count += 1
-        except Exception as e:
-            failed_count += 1
-            db.session.rollback()
-            current_app.logger.error(f"Error re-processing company ID: {company.id}: {e}", exc_info=True)
-    return jsonify({"message": "Company profile re-processing initiated.", "reprocessed_count": reprocessed_count, "failed_count": failed_count}), 200
\ No newline at end of file
+    return _start_operation('reprocess_incomplete_companies')
+
+@admin_bp.route('/analysis-protocol', methods=['GET'])
+@token_required
+@admin_required
+def analysis_protocol_status():
+    return jsonify(AdminService(current_app.logger).get_analysis_protocol_status()), 200
+
+@admin_bp.route('/analysis-protocol/migrate', methods=['POST'])
+@token_required
+@admin_required
+def migrate_analysis_protocol():
+    """Queues a system-wide re-analysis of every analysis below ANALYSIS_PROTOCOL_VERSION."""
+    return _start_operation('migrate_analysis_protocol')
+
+@admin_bp.route('/maintenance/sweeps', methods=['POST'])
+@token_required
+@admin_required
+def run_maintenance_sweeps():
+    """Expires stale tracked applications and old job postings. Set-based, so it finishes within the request."""
+    try:
+        results = AdminService(current_app.logger).run_maintenance_sweeps(request.args.get('batch_size', type=int))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Maintenance sweeps failed: {e}", exc_info=True)
+        return jsonify({"message": "An unexpected error occurred."}), 500
+    return jsonify(results), 200
+
+@admin_bp.route('/maintenance/tasks', methods=['GET'])
+@token_required
+@admin_required
+def list_maintenance_tasks():
+    """Each scheduled task's interval, next due time, last-run duration and recent runs."""
+    history = min(max(request.args.get('history', 10, type=int), 1), 100)
+    return jsonify(scheduler.get_status(history)), 200
+
+@admin_bp.route('/maintenance/tasks/<name>/run', methods=['POST'])
+@token_required
+@admin_required
+def run_maintenance_task(name):
+    """Runs a scheduled task now, on the background pool; overlapping runs are skipped."""
+    if not scheduler.get_task(name): return jsonify({"message": f"Unknown task '{name}'."}), 404
+    submit_background_task(scheduler.run_task, name)
+    return jsonify({"message": f"Task '{name}' queued."}), 202
+
+@admin_bp.route('/operations', methods=['GET'])
+@token_required
+@admin_required
+def list_operations():
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    operations = AdminOperationService(current_app.logger).list_operations(limit)
+    return jsonify([operation.to_dict() for operation in operations]), 200
+
+@admin_bp.route('/operations/<int:operation_id>', methods=['GET'])
+@token_required
+@admin_required
+def get_operation(operation_id):
+    operation = AdminOperationService(current_app.logger).get_operation(operation_id)
+    if not operation: return jsonify({"message": "Operation not found."}), 404
+    return jsonify(operation.to_dict()), 200
+
+@admin_bp.route('/operations/<int:operation_id>/cancel', methods=['POST'])
+@token_required
+@admin_required
+def cancel_operation(operation_id):
+    """Stops the operation at its next chunk boundary. Progress so far is kept."""
+    operation = AdminOperationService(current_app.logger).cancel_operation(operation_id)
+    if not operation: return jsonify({"message": "Operation not found."}), 404
+    return jsonify(operation.to_dict()), 200
+
+@admin_bp.route('/operations/<int:operation_id>/resume', methods=['POST'])
+@token_required
+@admin_required
+def resume_operation(operation_id):
+    """Re-queues a failed, cancelled or orphaned operation from its cursor."""
+    try:
+        operation = AdminOperationService(current_app.logger).resume_operation(operation_id)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 409
+    if not operation: return jsonify({"message": "Operation not found."}), 404
+    return jsonify(operation.to_dict()), 202
+
+@admin_bp.route('/company-cache/stats', methods=['GET'])
+@token_required
+@admin_required
+def company_cache_stats():
+    """Hit rate and size of the company profile cache in the worker process that serves this request."""
+    return jsonify(CompanyService(current_app.logger).get_cache_stats()), 200
@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify, current_app
 from ..auth import token_required
 from ..services.company_service import CompanyService # NEW: Import CompanyService
 from ..models import Company # NEW: Import Company model
+from ..http_caching import make_etag, not_modified_response, json_response_with_etag
 
 companies_bp = Blueprint('companies', __name__)
 
@@ -15,10 +16,15 @@ def get_company_profile(company_id):
     company_service = CompanyService(current_app.logger)
     
     try:
-        company_profile = company_service.get_company(company_id)
-        if company_profile:
-            return jsonify(company_profile.to_dict()), 200
-        return jsonify({"message": "Company profile not found."}), 404
+        # Served from the per-process profile cache; a hit costs no database round trip.
+        cached = company_service.get_company_profile_json(company_id)
+        if not cached:
+            return jsonify({"message": "Company profile not found."}), 404
+        encoded_profile, version = cached
+        etag = make_etag('company', company_id, version)
+        not_modified = not_modified_response(etag)
+        if not_modified: return not_modified
+        return json_response_with_etag(encoded_profile, etag)
     except Exception as e:
         current_app.logger.error(f"Error fetching company profile for company_id {company_id}: {e}", exc_info=True)
         return jsonify({"message": "Error fetching company profile."}), 500
\ No newline at end of file
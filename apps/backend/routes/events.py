@@ -0,0 +1,44 @@
+# Path: apps/backend/routes/events.py
+import json
+import queue
+import time
+from flask import Blueprint, Response, g, current_app, stream_with_context
+from ..auth import token_required
+from ..app import db
+from ..config import config
+from ..events import broker
+
+events_bp = Blueprint('events', __name__)
+
+@events_bp.route('/events/stream', methods=['GET'])
+@token_required
+def stream_events():
+    """
+    Server-sent events for the current user: analysis updates, company enrichment and
+    reanalysis completion. The stream closes after SSE_MAX_STREAM_SECONDS and clients reconnect,
+    so each open stream only briefly occupies a worker thread.
+    """
+    user_id = g.current_user.id
+    subscription = broker.subscribe(user_id)
+    # The stream never touches the database; give the connection back to the pool now.
+    db.session.remove()
+    current_app.logger.info(f"Opened event stream for user {user_id}.")
+
+    def generate():
+        deadline = time.monotonic() + config.SSE_MAX_STREAM_SECONDS
+        try:
+            yield f"retry: {config.SSE_RETRY_MILLISECONDS}\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.get(timeout=config.SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            broker.unsubscribe(user_id, subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no' # Stop reverse proxies from buffering the stream
+    })
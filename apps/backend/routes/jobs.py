@@ -1,45 +1,83 @@
 # Path: apps/backend/routes/jobs.py
-from flask import Blueprint, request, jsonify, g, current_app
+from flask import Blueprint, request, jsonify, g, current_app, url_for
 from ..auth import token_required
+from ..rate_limits import rate_limited, over_quota_response
+from ..gemini_limits import ai_work_for
 from ..services.profile_service import ProfileService
-from ..services.job_service import JobService
-from ..services.tracked_job_service import TrackedJobService
+from ..services.job_service import JobService, canonicalize_job_url
+from ..services.tracked_job_service import TrackedJobService, parse_list_fields
+from ..services.job_import_service import JobImportService, parse_import_urls
+from ..services.idempotency_service import IdempotencyService, request_fingerprint, MAX_IDEMPOTENCY_KEY_LENGTH
+from ..config import config
 from ..app import db
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import csv
+import pytz
 from ..models import JobAnalysis
+from ..http_caching import make_etag, not_modified_response, json_response_with_etag
 
 jobs_bp = Blueprint('jobs', __name__)
 
 @jobs_bp.route('/jobs/submit', methods=['POST'])
 @token_required
 def submit_job():
+    """
+    Submits a job URL for tracking. An optional Idempotency-Key header makes client retries free:
+    a retry with the same key and URL returns the tracked job from the first request without redoing any work.
+    Only a URL that has to be fetched and analyzed spends a job-submit token; replays, already-known
+    postings and invalid requests cost nothing.
+    """
     user_id = g.current_user.id
     data = request.json
     job_url = data.get('job_url')
 
-    if not job_url:
+    if not job_url or not isinstance(job_url, str):
         return jsonify({"message": "Job URL is required."}), 400
 
     job_service = JobService(current_app.logger)
     tracked_job_service = TrackedJobService(current_app.logger)
-
+    idempotency_service = IdempotencyService(current_app.logger)
+    idempotency_key = request.headers.get('Idempotency-Key')
+    retry_after = {'Retry-After': str(max(1, round(config.JOB_SUBMISSION_POLL_SECONDS * 5)))}
+
+    if idempotency_key:
+        if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({"message": f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters."}), 400
+        state, tracked_job_id = idempotency_service.begin(user_id, idempotency_key, request_fingerprint({'job_url': job_url}))
+        if state == 'mismatch':
+            return jsonify({"message": "Idempotency-Key was already used for a different request."}), 422
+        if state == 'in_progress':
+            return jsonify({"message": "A request with this Idempotency-Key is still being processed."}), 409, retry_after
+        if state == 'replay':
+            tracked_job_data = tracked_job_service.get_tracked_job(user_id, tracked_job_id) if tracked_job_id else None
+            if tracked_job_data:
+                return jsonify(tracked_job_data), 201
+            # The tracked job was deleted since; treat the key as spent and submit afresh.
+            idempotency_service.complete(user_id, idempotency_key, None)
+
+    submission = None
     try:
-        canonical_job, job_opportunity = job_service.create_or_get_canonical_job(job_url, user_id=user_id, commit=True)
-        
-        if not canonical_job or not job_opportunity:
+        submission = job_service.track_known_url(job_url.strip(), canonicalize_job_url(job_url), user_id, True)
+        if not submission:
+            over_quota = over_quota_response(user_id, 'job-submit')
+            if over_quota: return over_quota
+            with ai_work_for(user_id, interactive=True):
+                # One unit of work: the company, canonical job, opportunity, analysis and tracked job commit together.
+                submission = job_service.submit_job_url(job_url, user_id=user_id)
+
+        if not submission:
             return jsonify({"message": "Failed to process job URL. Could not extract core details."}), 500
 
-        tracked_job = tracked_job_service.track_job(user_id, job_opportunity.id)
-        
-        if not tracked_job:
-            return jsonify({"message": "Failed to track job opportunity (internal error). Please try again."}), 500
-        
-        jobs_data = tracked_job_service.get_tracked_jobs(user_id, job_id_filter=tracked_job.id)
-        if jobs_data and jobs_data.get("jobs"):
-             return jsonify(jobs_data["jobs"][0]), 201
+        tracked_job_data = tracked_job_service.get_tracked_job(user_id, submission.tracked_job_id)
+        if tracked_job_data:
+             return jsonify(tracked_job_data), 201
         
         return jsonify({"message": "Job tracked successfully, but failed to retrieve full details."}), 201
 
+    except TimeoutError:
+        db.session.rollback()
+        return jsonify({"message": "This job URL is already being processed. Please retry shortly."}), 409, retry_after
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Job already tracked or other database conflict."}), 409
@@ -47,7 +85,52 @@ def submit_job():
         db.session.rollback()
         current_app.logger.error(f"Error submitting job for user {user_id}: {e}", exc_info=True)
         return jsonify({"message": "An unexpected error occurred while submitting the job."}), 500
+    finally:
+        if idempotency_key:
+            if submission:
+                idempotency_service.complete(user_id, idempotency_key, submission.tracked_job_id)
+            else:
+                idempotency_service.abandon(user_id, idempotency_key)
+
 
+@jobs_bp.route('/jobs/import', methods=['POST'])
+@token_required
+@rate_limited('job-import')
+def import_jobs():
+    """
+    Bulk import: accepts {"urls": [...]}, a text/csv body or a multipart CSV `file`, and answers 202
+    with the import and a URL to poll for per-URL status. The request itself spends a job-import token;
+    each URL the import actually analyzes spends a job-submit token as it runs.
+    """
+    user_id = g.current_user.id
+    try:
+        if 'file' in request.files:
+            urls = parse_import_urls(csv_text=request.files['file'].read().decode('utf-8-sig', errors='replace'))
+        elif request.mimetype == 'text/csv':
+            urls = parse_import_urls(csv_text=request.get_data(as_text=True))
+        else:
+            urls = parse_import_urls((request.get_json(silent=True) or {}).get('urls'))
+        job_import = JobImportService(current_app.logger).create_import(user_id, urls)
+    except (ValueError, csv.Error) as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error creating job import for user {user_id}: {e}", exc_info=True)
+        return jsonify({"message": "An unexpected error occurred while starting the import."}), 500
+    return jsonify({
+        "message": f"Import {job_import.id} queued.",
+        "import": job_import.to_dict(),
+        "status_url": url_for('jobs.get_job_import', import_id=job_import.id)
+    }), 202
+
+@jobs_bp.route('/jobs/import/<int:import_id>', methods=['GET'])
+@token_required
+def get_job_import(import_id):
+    user_id = g.current_user.id
+    job_import = JobImportService(current_app.logger).get_import(user_id, import_id)
+    if not job_import:
+        return jsonify({"message": "Import not found."}), 404
+    return jsonify(job_import), 200
 
 @jobs_bp.route('/tracked-jobs', methods=['GET'])
 @token_required
@@ -57,16 +140,71 @@ def get_tracked_jobs():
     search_query = request.args.get('search_query')
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 1000))
+    fields_param = request.args.get('fields')
+    try:
+        fields = parse_list_fields(fields_param)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
     tracked_job_service = TrackedJobService(current_app.logger)
 
     try:
-        jobs_data = tracked_job_service.get_tracked_jobs(user_id, status_filter, search_query, page, limit)
-        return jsonify(jobs_data), 200
+        version = tracked_job_service.get_tracked_jobs_version(user_id)
+        etag = make_etag('tracked-jobs', user_id, *version, status_filter, search_query, page, limit, fields_param)
+        not_modified = not_modified_response(etag)
+        if not_modified: return not_modified
+
+        jobs_data = tracked_job_service.get_tracked_jobs(user_id, status_filter, search_query, page, limit, fields=fields)
+        return json_response_with_etag(jobs_data, etag)
     except Exception as e:
         current_app.logger.error(f"Error getting tracked jobs for user {user_id}: {e}", exc_info=True)
         return jsonify({"message": "Error fetching tracked jobs."}), 500
 
+@jobs_bp.route('/tracked-jobs/changes', methods=['GET'])
+@token_required
+def get_tracked_job_changes():
+    """
+    Delta sync: returns tracked jobs changed and deleted since the `since` cursor returned by a
+    previous call (or by GET /tracked-jobs), along with the next cursor.
+    """
+    user_id = g.current_user.id
+    since_param = request.args.get('since')
+    if not since_param:
+        return jsonify({"message": "The 'since' cursor is required."}), 400
+    try:
+        since = datetime.fromisoformat(since_param)
+        if since.tzinfo is None: since = since.replace(tzinfo=pytz.utc)
+    except ValueError:
+        return jsonify({"message": "Invalid 'since' cursor."}), 400
+    try:
+        fields = parse_list_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    tracked_job_service = TrackedJobService(current_app.logger)
+
+    try:
+        return jsonify(tracked_job_service.get_tracked_job_changes(user_id, since, fields=fields)), 200
+    except Exception as e:
+        current_app.logger.error(f"Error syncing tracked jobs for user {user_id}: {e}", exc_info=True)
+        return jsonify({"message": "Error syncing tracked jobs."}), 500
+
+@jobs_bp.route('/tracked-jobs/<int:tracked_job_id>', methods=['GET'])
+@token_required
+def get_tracked_job(tracked_job_id):
+    """Full record for one tracked job, including the analysis narrative the list projection omits."""
+    user_id = g.current_user.id
+    tracked_job_service = TrackedJobService(current_app.logger)
+
+    try:
+        tracked_job = tracked_job_service.get_tracked_job(user_id, tracked_job_id)
+        if tracked_job:
+            return jsonify(tracked_job), 200
+        return jsonify({"message": "Tracked job not found."}), 404
+    except Exception as e:
+        current_app.logger.error(f"Error getting tracked job {tracked_job_id} for user {user_id}: {e}", exc_info=True)
+        return jsonify({"message": "Error fetching tracked job."}), 500
+
 @jobs_bp.route('/tracked-jobs/<int:tracked_job_id>', methods=['PUT'])
 @token_required
 def update_tracked_job(tracked_job_id):
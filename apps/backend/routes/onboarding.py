@@ -1,6 +1,7 @@
 # Path: apps/backend/routes/onboarding.py
 from flask import Blueprint, request, jsonify, g, current_app
 from ..auth import token_required
+from ..rate_limits import rate_limited
 from ..services.profile_service import ProfileService
 from ..services.job_service import JobService, GEMINI_FLASH_MODEL, GEMINI_PRO_MODEL
 from ..app import db
@@ -13,6 +14,7 @@ onboarding_bp = Blueprint('onboarding', __name__)
 
 @onboarding_bp.route('/onboarding/parse-resume', methods=['POST'])
 @token_required
+@rate_limited('resume-parse')
 def parse_resume():
     user_id = g.current_user.id
     data = request.get_json()
@@ -76,8 +78,8 @@ def parse_resume():
             if profile and not profile.has_completed_onboarding:
                 profile.has_completed_onboarding = True
                 db.session.commit() # Commit this change first
-                current_app.logger.info(f"User {user_id} completed onboarding. Triggering re-analysis.")
-                job_service.trigger_reanalysis_for_user(user_id)
+                current_app.logger.info(f"User {user_id} completed onboarding. Requesting re-analysis.")
+                job_service.request_reanalysis_for_user(user_id)
 
         latest_profile_data = profile_service.get_profile(user_id)
         return jsonify({"message": "Resume processed successfully.", "profile": latest_profile_data}), 200
@@ -4,6 +4,7 @@ from ..auth import token_required
 from ..services.profile_service import ProfileService
 from ..app import db
 from ..models import UserProfile
+from ..http_caching import make_etag, not_modified_response, json_response_with_etag
 
 profile_bp = Blueprint('profile', __name__)
 
@@ -19,8 +20,16 @@ def get_profile():
     user_id = g.current_user.id
     
     try:
+        version = profile_service.get_profile_version(user_id)
+        etag = make_etag('profile', user_id, *version) if version else None
+        not_modified = not_modified_response(etag)
+        if not_modified: return not_modified
+
         profile_data = profile_service.get_profile(user_id)
-        return jsonify(profile_data), 200
+        if not etag:
+            # The profile row was just created; stamp the response with its initial version.
+            etag = make_etag('profile', user_id, *profile_service.get_profile_version(user_id))
+        return json_response_with_etag(profile_data, etag)
     except Exception as e:
         current_app.logger.error(f"Error getting profile for user {user_id}: {e}")
         return jsonify({"message": "Error fetching profile."}), 500
@@ -44,10 +53,11 @@ def update_profile():
         # both the initial profile completion and all subsequent updates.
         if profile_service.has_completed_required_profile_fields(user_id):
             
-            # Action 1: Trigger re-analysis for the user.
-            current_app.logger.info(f"Profile updated for onboarded user {user_id}. Triggering re-analysis.")
+            # Action 1: Request a (debounced) re-analysis. It only re-runs analyses whose inputs changed,
+            # so edits to contact details cost nothing.
+            current_app.logger.info(f"Profile updated for onboarded user {user_id}. Requesting re-analysis.")
             from ..services.job_service import JobService # Import here to avoid circular dependencies
-            JobService(current_app.logger).trigger_reanalysis_for_user(user_id)
+            JobService(current_app.logger).request_reanalysis_for_user(user_id)
 
             # Action 2: Ensure the `has_completed_onboarding` flag is set to True.
             # This is an idempotent check; it's safe to run even if the flag is already True.
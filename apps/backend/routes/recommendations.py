@@ -1,7 +1,9 @@
 # Path: apps/backend/routes/recommendations.py
 from flask import Blueprint, request, jsonify, g, current_app
 from ..auth import token_required
-from ..services.job_matching_service import JobMatchingService
+from ..services.recommendation_cache_service import RecommendationCacheService
+from ..services.job_discovery_service import JobDiscoveryService
+from ..http_caching import make_etag, not_modified_response, json_response_with_etag
 from ..app import db # Added for potential future session rollback if service does not handle it fully
 
 reco_bp = Blueprint('recommendations', __name__)
@@ -12,13 +14,41 @@ def get_job_recommendations():
     user_id = g.current_user.id
     limit = int(request.args.get('limit', 10))
 
-    job_matching_service = JobMatchingService(current_app.logger)
+    recommendation_cache_service = RecommendationCacheService(current_app.logger)
 
     try:
-        recommendations = job_matching_service.get_job_recommendations(user_id, limit)
+        # Only a fresh cache entry has a stable version; otherwise the list is recomputed below.
+        stamp = recommendation_cache_service.get_version_stamp(user_id)
+        if stamp:
+            not_modified = not_modified_response(make_etag('recommendations', user_id, *stamp, limit))
+            if not_modified: return not_modified
+
+        recommendations = recommendation_cache_service.get_recommendations(user_id, limit)
         # Service handles commit/rollback
-        return jsonify(recommendations), 200
+        stamp = recommendation_cache_service.get_version_stamp(user_id)
+        etag = make_etag('recommendations', user_id, *stamp, limit) if stamp else None
+        return json_response_with_etag(recommendations, etag)
     except Exception as e:
         current_app.logger.error(f"Error getting job recommendations for user {user_id}: {e}", exc_info=True)
         db.session.rollback() # Ensure rollback on route level if exception happens
-        return jsonify({"message": "Error fetching recommendations."}), 500
\ No newline at end of file
+        return jsonify({"message": "Error fetching recommendations."}), 500
+
+@reco_bp.route('/jobs/discover', methods=['GET'])
+@token_required
+def discover_jobs():
+    """
+    Returns canonical jobs the user hasn't tracked yet, ranked locally against their
+    desired job titles and skills. No AI analysis is involved.
+    """
+    user_id = g.current_user.id
+    limit = min(int(request.args.get('limit', 20)), 100)
+
+    job_discovery_service = JobDiscoveryService(current_app.logger)
+
+    try:
+        jobs = job_discovery_service.discover_jobs_for_user(user_id, limit)
+        return jsonify({"jobs": jobs}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error discovering jobs for user {user_id}: {e}", exc_info=True)
+        db.session.rollback()
+        return jsonify({"message": "Error discovering jobs."}), 500
@@ -0,0 +1,197 @@
+# Path: apps/backend/scheduler.py
+import os
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import timedelta
+from flask import current_app
+
+from .app import db
+from .config import config
+from .advisory_locks import try_advisory_lock, SCHEDULER_LEADER, MAINTENANCE_TASK
+
+@dataclass
+class ScheduledTask:
+    name: str
+    interval_seconds: int
+    fn: object # Zero-argument callable, run inside an app context; its return value is stored as the run's result.
+    jitter_seconds: float = 0.0
+
+    @property
+    def lock_key(self):
+        return zlib.crc32(self.name.encode('utf-8')) & 0x7fffffff
+
+class MaintenanceScheduler:
+    """
+    Runs registered maintenance tasks on fixed intervals. Every worker process starts a scheduler
+    thread, but only the one holding the SCHEDULER_LEADER advisory lock runs tasks; if it dies,
+    Postgres releases the lock and a standby takes over. A task is due once its interval (plus a
+    random jitter, so tasks don't fire in lockstep) has passed since its last recorded run, so
+    schedules survive restarts and leader changes. A per-task advisory lock prevents overlapping
+    runs, including manual runs from the CLI or admin API.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def task(self, name: str, interval_seconds: int):
+        """Decorator registering `fn` as a maintenance task."""
+        def register(fn):
+            self._tasks[name] = ScheduledTask(name, interval_seconds, fn, self._jitter(interval_seconds))
+            return fn
+        return register
+
+    def get_task(self, name: str):
+        return self._tasks.get(name)
+
+    def _jitter(self, interval_seconds):
+        return random.uniform(0, interval_seconds * config.SCHEDULER_JITTER_FRACTION)
+
+    def init_app(self, app):
+        if config.SCHEDULER_ENABLED:
+            # Started on the first request rather than at import, so the thread is created after gunicorn forks.
+            app.before_request(self._ensure_started)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            app = current_app._get_current_object()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.run_forever, args=(app,), name='tt-scheduler', daemon=True)
+            self._thread.start()
+
+    def run_forever(self, app):
+        """Competes for leadership and, while leader, runs due tasks. Used by the worker thread and `flask run-scheduler`."""
+        while True:
+            try:
+                with app.app_context():
+                    with try_advisory_lock(SCHEDULER_LEADER, 0) as leader:
+                        if leader:
+                            app.logger.info(f"Maintenance scheduler leader elected (pid {os.getpid()}).")
+                            while True:
+                                self.run_due_tasks()
+                                time.sleep(config.SCHEDULER_POLL_SECONDS)
+            except Exception as e:
+                app.logger.error(f"Maintenance scheduler loop failed: {e}", exc_info=True)
+            time.sleep(config.SCHEDULER_POLL_SECONDS)
+
+    def _last_started_at(self, name: str):
+        from .models import MaintenanceTaskRun
+        return db.session.scalar(db.select(db.func.max(MaintenanceTaskRun.started_at)).where(MaintenanceTaskRun.task_name == name))
+
+    def run_due_tasks(self):
+        from .models import get_utc_now
+        for task in list(self._tasks.values()):
+            last_started_at = self._last_started_at(task.name)
+            db.session.commit()
+            due_at = last_started_at + timedelta(seconds=task.interval_seconds + task.jitter_seconds) if last_started_at else None
+            if due_at is None or due_at <= get_utc_now():
+                self.run_task(task.name)
+
+    def run_task(self, name: str):
+        """
+        Runs one task now and records it in maintenance_task_runs. Returns the run, or None if the task
+        is unknown or already running elsewhere. Task exceptions are recorded, not raised.
+        """
+        from .models import MaintenanceTaskRun, get_utc_now
+        task = self._tasks.get(name)
+        if not task: return None
+        logger = current_app.logger
+
+        with try_advisory_lock(MAINTENANCE_TASK, task.lock_key) as acquired:
+            if not acquired:
+                logger.info(f"Maintenance task {name} is already running elsewhere. Skipping.")
+                return None
+            run = MaintenanceTaskRun(task_name=name, status='running', started_at=get_utc_now())
+            db.session.add(run)
+            db.session.commit()
+            run_id = run.id
+
+            started = time.monotonic()
+            try:
+                result = task.fn()
+                status, error = 'succeeded', None
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Maintenance task {name} failed: {e}", exc_info=True)
+                result, status, error = None, 'failed', str(e)[:2000]
+
+            run = db.session.get(MaintenanceTaskRun, run_id)
+            run.status = status
+            run.error = error
+            run.result = result if isinstance(result, (dict, list, int, float)) else None
+            run.finished_at = get_utc_now()
+            run.duration_ms = round((time.monotonic() - started) * 1000)
+            db.session.commit()
+            task.jitter_seconds = self._jitter(task.interval_seconds)
+            logger.info(f"Maintenance task {name} {status} in {run.duration_ms} ms: {run.result}")
+            return run
+
+    def get_status(self, history: int = 10):
+        """Each task's schedule, last-run duration and recent run history."""
+        from .models import MaintenanceTaskRun
+        statuses = []
+        for task in self._tasks.values():
+            runs = db.session.scalars(
+                db.select(MaintenanceTaskRun).where(MaintenanceTaskRun.task_name == task.name)
+                .order_by(MaintenanceTaskRun.started_at.desc()).limit(history)
+            ).all()
+            last_finished = next((run for run in runs if run.finished_at), None)
+            next_run_at = runs[0].started_at + timedelta(seconds=task.interval_seconds + task.jitter_seconds) if runs else None
+            statuses.append({
+                "name": task.name,
+                "interval_seconds": task.interval_seconds,
+                "next_run_at": next_run_at.isoformat() if next_run_at else None,
+                "last_run_duration_ms": last_finished.duration_ms if last_finished else None,
+                "runs": [run.to_dict() for run in runs]
+            })
+        return statuses
+
+scheduler = MaintenanceScheduler()
+
+@scheduler.task('check-job-url-validity', config.URL_VALIDITY_CHECK_INTERVAL_SECONDS)
+def check_job_url_validity():
+    from .services.admin_service import AdminService
+    return AdminService(current_app.logger).check_job_url_validity()
+
+@scheduler.task('expire-stale-applications', config.MAINTENANCE_SWEEP_INTERVAL_SECONDS)
+def expire_stale_applications():
+    from .services.admin_service import AdminService
+    return AdminService(current_app.logger).check_stale_applications()
+
+@scheduler.task('run-due-reanalyses', config.REANALYSIS_SWEEP_INTERVAL_SECONDS)
+def run_due_reanalyses():
+    from .services.job_service import JobService
+    return JobService(current_app.logger).run_due_reanalyses()
+
+@scheduler.task('purge-job-submission-records', config.MAINTENANCE_SWEEP_INTERVAL_SECONDS)
+def purge_job_submission_records():
+    from .services.job_service import JobService
+    from .services.idempotency_service import IdempotencyService
+    return {
+        'url_submissions': JobService(current_app.logger).purge_finished_url_submissions(),
+        'idempotency_keys': IdempotencyService(current_app.logger).purge_expired()
+    }
+
+@scheduler.task('resume-job-imports', config.JOB_IMPORT_SWEEP_INTERVAL_SECONDS)
+def resume_job_imports():
+    from .services.job_import_service import JobImportService
+    return JobImportService(current_app.logger).resume_unfinished_imports()
+
+@scheduler.task('purge-tracked-job-tombstones', config.MAINTENANCE_SWEEP_INTERVAL_SECONDS)
+def purge_tracked_job_tombstones():
+    from .services.tracked_job_service import TrackedJobService
+    return TrackedJobService(current_app.logger).purge_expired_tombstones()
+
+@scheduler.task('expire-old-job-postings', config.MAINTENANCE_SWEEP_INTERVAL_SECONDS)
+def expire_old_job_postings():
+    from .services.admin_service import AdminService
+    return AdminService(current_app.logger).expire_old_job_postings()
@@ -0,0 +1,380 @@
+# Path: apps/backend/services/admin_operation_service.py
+import time
+from flask import current_app
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from ..app import db
+from ..models import AdminOperation, Job, JobOpportunity, JobAnalysis, TrackedJob, OPEN_TRACKED_JOB_STATUSES, get_utc_now
+from ..config import config
+from ..advisory_locks import try_advisory_lock, ADMIN_OPERATION
+from ..background import submit_background_task
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+class OperationKind:
+    """
+    One kind of bulk admin operation. Targets are integer ids walked in ascending order, so the
+    operation's cursor (the last id attempted) is a keyset resume point.
+    """
+    name = None
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def validate_params(self, params: dict):
+        """Checks and normalizes the request params, raising ValueError on bad input. Runs once, at creation."""
+        return {}
+
+    def targets_query(self, params: dict, after_id: int):
+        """A select of target ids greater than `after_id`, in ascending id order."""
+        raise NotImplementedError
+
+    def prepare(self, params: dict):
+        """Builds per-run state shared by every item, e.g. services or a loaded profile."""
+        return {}
+
+    def check_runnable(self, params: dict):
+        """
+        Raises if the operation can no longer run as created. Checked before every chunk, so the
+        operation fails as a whole instead of every remaining target failing one by one.
+        """
+        pass
+
+    def process(self, target_id: int, params: dict, context: dict):
+        """Processes one target. Returns True on success; False or an exception counts as a failure."""
+        raise NotImplementedError
+
+    def process_step(self, target_id: int, params: dict, context: dict, resume_from):
+        """
+        Does a bounded slice of one target, for targets too large to process between two cancel checks.
+        `resume_from` is the state returned by the previous step of this target (None on the first).
+        Returns (done, ok, state): when not done, `state` is committed as the operation's sub-cursor and
+        the next step picks the target up from it. By default the whole target is one step.
+        """
+        return True, self.process(target_id, params, context), None
+
+    def finish(self, operation: AdminOperation, context: dict):
+        """Runs once the whole target set has been processed."""
+        pass
+
+class ReprocessMalformedJobs(OperationKind):
+    name = 'reprocess_malformed_jobs'
+
+    def targets_query(self, params, after_id):
+        return (
+            db.select(Job.id)
+            .where(Job.id > after_id, db.or_(Job.job_title.ilike('%job not found at url%'), Job.job_description_hash == None, Job.salary_min == None))
+            .order_by(Job.id)
+        )
+
+    def prepare(self, params):
+        from .job_service import JobService
+        return {"job_service": JobService(self.logger)}
+
+    def process(self, target_id, params, context):
+        opportunity = db.session.query(JobOpportunity).filter_by(job_id=target_id).first()
+        if not opportunity: return False
+        job, _ = context["job_service"].create_or_get_canonical_job(url=opportunity.url, user_id=params.get("requested_by"))
+        return job is not None
+
+class ReprocessIncompleteCompanies(OperationKind):
+    name = 'reprocess_incomplete_companies'
+
+    def targets_query(self, params, after_id):
+        from .company_service import CompanyService
+        return CompanyService(self.logger).incomplete_companies_query(after_id)
+
+    def prepare(self, params):
+        from .company_service import CompanyService
+        return {"company_service": CompanyService(self.logger)}
+
+    def process(self, target_id, params, context):
+        return context["company_service"].enrich_company_single_flight(target_id) is not None
+
+class ReanalyzeUserJobs(OperationKind):
+    """Triage runs once at creation; the planned job ids are stored on the operation so resumes don't re-plan."""
+    name = 'reanalyze_user_jobs'
+
+    def validate_params(self, params):
+        from .job_service import JobService
+        user_id = params.get("user_id")
+        if not isinstance(user_id, int):
+            raise ValueError("'user_id' must be an integer.")
+        budget = params.get("budget")
+        if budget is not None and (not isinstance(budget, int) or budget < 0):
+            raise ValueError("'budget' must be a non-negative integer.")
+
+        user_profile_data, to_analyze, summary = JobService(self.logger).plan_reanalysis_for_user(user_id, budget)
+        return {
+            "user_id": user_id, "budget": budget, "has_profile": user_profile_data is not None,
+            "job_ids": sorted(job_id for job_id, _ in to_analyze),
+            "unchanged": summary["unchanged"], "deferred": summary["deferred"], "skipped": summary["skipped"]
+        }
+
+    def targets_query(self, params, after_id):
+        return db.select(Job.id).where(Job.id > after_id, Job.id.in_(params.get("job_ids") or [])).order_by(Job.id)
+
+    def prepare(self, params):
+        from .job_service import JobService
+        job_service = JobService(self.logger)
+        return {"job_service": job_service, "user_profile_data": job_service.profile_service.get_profile_for_analysis(params["user_id"])}
+
+    def process(self, target_id, params, context):
+        if not context["user_profile_data"]: return False
+        return context["job_service"].reanalyze_job_for_user(params["user_id"], target_id, context["user_profile_data"])
+
+    def finish(self, operation, context):
+        if not context["user_profile_data"]: return
+        summary = {"analyzed": operation.succeeded, **{k: operation.params.get(k, 0) for k in ("unchanged", "deferred", "skipped")}}
+        context["job_service"].finish_reanalysis_for_user(operation.params["user_id"], summary)
+
+def outdated_protocol_versions():
+    """Protocol versions other than the current one that still have analyses (a handful of values, read off the index)."""
+    return db.session.scalars(
+        db.select(JobAnalysis.analysis_protocol_version).distinct()
+        .where(JobAnalysis.analysis_protocol_version != config.ANALYSIS_PROTOCOL_VERSION)
+    ).all()
+
+class MigrateAnalysisProtocol(OperationKind):
+    """
+    Re-runs every analysis written under an older ANALYSIS_PROTOCOL_VERSION. Users are queued at creation,
+    those with open tracked jobs and recent activity first; each target is a 1-based position in that
+    queue. Within a user, analyses of jobs still being pursued go first, at most a chunk of analyses per
+    step, so progress is committed and cancels are seen between steps even for users with thousands of
+    analyses. The old analysis keeps being served until its replacement is written over it, and Gemini
+    calls go through the process-wide limiter.
+    """
+    name = 'migrate_analysis_protocol'
+
+    def validate_params(self, params):
+        versions = outdated_protocol_versions()
+        open_jobs = db.func.count().filter(TrackedJob.status.in_(OPEN_TRACKED_JOB_STATUSES))
+        activity = (
+            db.select(TrackedJob.user_id, open_jobs.label('open_jobs'), db.func.max(TrackedJob.updated_at).label('last_active_at'))
+            .group_by(TrackedJob.user_id).subquery()
+        )
+        outdated_users = db.select(JobAnalysis.user_id).distinct().where(JobAnalysis.analysis_protocol_version.in_(versions)).subquery()
+        user_ids = db.session.scalars(
+            db.select(outdated_users.c.user_id)
+            .outerjoin(activity, activity.c.user_id == outdated_users.c.user_id)
+            .order_by(
+                (db.func.coalesce(activity.c.open_jobs, 0) > 0).desc(),
+                activity.c.last_active_at.desc().nulls_last(),
+                outdated_users.c.user_id
+            )
+        ).all() if versions else []
+        return {"target_version": config.ANALYSIS_PROTOCOL_VERSION, "from_versions": versions, "user_ids": user_ids}
+
+    def targets_query(self, params, after_id):
+        queue = db.func.unnest(db.cast(params.get("user_ids") or [], ARRAY(db.Integer))).table_valued('user_id', with_ordinality='position')
+        return db.select(queue.c.position).where(queue.c.position > after_id).order_by(queue.c.position)
+
+    def prepare(self, params):
+        from .job_service import JobService
+        return {"job_service": JobService(self.logger)}
+
+    def check_runnable(self, params):
+        if params["target_version"] != config.ANALYSIS_PROTOCOL_VERSION:
+            raise RuntimeError(f"ANALYSIS_PROTOCOL_VERSION changed to {config.ANALYSIS_PROTOCOL_VERSION} mid-migration; start a new operation.")
+
+    def process_step(self, target_id, params, context, resume_from):
+        user_id = params["user_ids"][target_id - 1]
+        job_service = context["job_service"]
+        if not job_service.profile_service.has_completed_required_profile_fields(user_id):
+            return True, True, None # Nothing to analyze against; the old analyses stay as they are.
+        user_profile_data = job_service.profile_service.get_profile_for_analysis(user_id)
+
+        # Two keyset passes over the user's outdated analyses, pursued jobs first, at most a chunk per step.
+        state = resume_from or {"open": True, "after_job_id": 0, "migrated": 0, "failed": 0}
+        pursued = (
+            db.select(JobOpportunity.job_id, db.func.bool_or(TrackedJob.status.in_(OPEN_TRACKED_JOB_STATUSES)).label('is_open'))
+            .join(TrackedJob, TrackedJob.job_opportunity_id == JobOpportunity.id)
+            .where(TrackedJob.user_id == user_id)
+            .group_by(JobOpportunity.job_id).subquery()
+        )
+        job_ids = db.session.scalars(
+            db.select(JobAnalysis.job_id)
+            .outerjoin(pursued, pursued.c.job_id == JobAnalysis.job_id)
+            .where(
+                JobAnalysis.user_id == user_id, JobAnalysis.analysis_protocol_version != config.ANALYSIS_PROTOCOL_VERSION,
+                db.func.coalesce(pursued.c.is_open, False) == state["open"], JobAnalysis.job_id > state["after_job_id"]
+            )
+            .order_by(JobAnalysis.job_id).limit(config.ADMIN_OPERATION_CHUNK_SIZE)
+        ).all()
+        db.session.commit()
+
+        for job_id in job_ids:
+            try:
+                migrated = job_service.reanalyze_job_for_user(user_id, job_id, user_profile_data)
+            except Exception as e:
+                db.session.rollback()
+                migrated = False
+                self.logger.error(f"Protocol migration failed for user {user_id}, job {job_id}: {e}", exc_info=True)
+            state["migrated" if migrated else "failed"] += 1
+
+        if len(job_ids) == config.ADMIN_OPERATION_CHUNK_SIZE:
+            return False, None, {**state, "after_job_id": job_ids[-1]}
+        if state["open"]:
+            return False, None, {**state, "open": False, "after_job_id": 0}
+        self.logger.info(f"Protocol migration for user {user_id}: {state['migrated']} of {state['migrated'] + state['failed']} analyses migrated.")
+        return True, state["failed"] == 0, None
+
+OPERATION_KINDS = {kind.name: kind for kind in (ReprocessMalformedJobs, ReprocessIncompleteCompanies, ReanalyzeUserJobs, MigrateAnalysisProtocol)}
+
+def _run_operation(operation_id: int):
+    AdminOperationService(current_app.logger).run_operation(operation_id)
+
+class AdminOperationService:
+    """
+    Records bulk admin work in admin_operations and runs it on the background pool in committed
+    chunks. Counters and the keyset cursor are committed after every chunk, so a crash, deploy or
+    cancel loses at most one chunk of progress and resume continues from the cursor.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+
+    def _kind(self, name: str):
+        kind = OPERATION_KINDS.get(name)
+        if not kind:
+            raise ValueError(f"Unknown operation kind '{name}'. Expected one of: {', '.join(sorted(OPERATION_KINDS))}.")
+        return kind(self.logger)
+
+    def _count_targets(self, kind: OperationKind, params: dict, after_id: int):
+        return db.session.scalar(db.select(db.func.count()).select_from(kind.targets_query(params, after_id).subquery()))
+
+    def get_operation(self, operation_id: int):
+        return db.session.get(AdminOperation, operation_id)
+
+    def list_operations(self, limit: int = 50):
+        return db.session.scalars(db.select(AdminOperation).order_by(AdminOperation.created_at.desc()).limit(limit)).all()
+
+    def create_operation(self, kind_name: str, params: dict = None, created_by: int = None, start: bool = True):
+        """Validates params, records a pending operation with its target count and, if `start`, queues it."""
+        kind = self._kind(kind_name)
+        params = {**kind.validate_params(params or {}), "requested_by": created_by}
+        operation = AdminOperation(kind=kind_name, status='pending', params=params, created_by=created_by,
+                                   cursor=0, processed=0, succeeded=0, failed=0, active_seconds=0.0)
+        operation.total = self._count_targets(kind, params, 0)
+        db.session.add(operation)
+        db.session.commit()
+        self.logger.info(f"Created admin operation {operation.id} ({kind_name}) with {operation.total} targets.")
+        if start:
+            submit_background_task(_run_operation, operation.id)
+        return operation
+
+    def cancel_operation(self, operation_id: int):
+        """
+        Requests cancellation. A running operation stops at its next chunk boundary; a pending one is
+        cancelled immediately. Returns the operation, or None if it doesn't exist.
+        """
+        operation = self.get_operation(operation_id)
+        if not operation: return None
+        if operation.status in ACTIVE_STATUSES:
+            operation.cancel_requested = True
+            if operation.status == 'pending':
+                operation.status = 'cancelled'
+                operation.finished_at = get_utc_now()
+            db.session.commit()
+        return operation
+
+    def resume_operation(self, operation_id: int):
+        """
+        Re-queues a failed or cancelled operation (or one left 'running' by a dead worker) from its cursor.
+        Raises ValueError if it has already completed.
+        """
+        operation = self.get_operation(operation_id)
+        if not operation: return None
+        if operation.status == 'completed':
+            raise ValueError(f"Operation {operation_id} has already completed.")
+        operation.status = 'pending'
+        operation.cancel_requested = False
+        operation.error = None
+        operation.finished_at = None
+        db.session.commit()
+        submit_background_task(_run_operation, operation.id)
+        return operation
+
+    def run_operation(self, operation_id: int):
+        """
+        Processes the operation's remaining targets chunk by chunk. Only one process runs a given
+        operation at a time; if another holds it, this returns without doing anything.
+        """
+        with try_advisory_lock(ADMIN_OPERATION, operation_id) as acquired:
+            if not acquired:
+                self.logger.info(f"Admin operation {operation_id} is already running elsewhere. Skipping.")
+                return
+            operation = self.get_operation(operation_id)
+            if not operation or operation.status in ('completed', 'cancelled'):
+                return
+
+            kind = self._kind(operation.kind)
+            operation.status = 'running'
+            operation.started_at = operation.started_at or get_utc_now()
+            # Recount on every run: targets may have been fixed elsewhere (or added) since the last one.
+            operation.total = operation.processed + self._count_targets(kind, operation.params, operation.cursor)
+            db.session.commit()
+
+            try:
+                context = kind.prepare(operation.params)
+                while True:
+                    if self._cancel_requested(operation):
+                        operation.status = 'cancelled'
+                        break
+                    target_ids = db.session.scalars(kind.targets_query(operation.params, operation.cursor).limit(config.ADMIN_OPERATION_CHUNK_SIZE)).all()
+                    db.session.commit() # Don't hold a transaction open while the chunk runs.
+                    if not target_ids:
+                        kind.finish(operation, context)
+                        operation.status = 'completed'
+                        break
+                    kind.check_runnable(operation.params)
+                    operation = self._run_chunk(kind, operation, target_ids, context)
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Admin operation {operation_id} failed: {e}", exc_info=True)
+                operation.status = 'failed'
+                operation.error = str(e)[:2000]
+
+            operation.finished_at = get_utc_now()
+            db.session.commit()
+            self.logger.info(f"Admin operation {operation_id} finished as {operation.status}: {operation.succeeded} succeeded, {operation.failed} failed.")
+
+    def _cancel_requested(self, operation: AdminOperation):
+        db.session.refresh(operation, attribute_names=['cancel_requested'])
+        return operation.cancel_requested
+
+    def _run_chunk(self, kind: OperationKind, operation: AdminOperation, target_ids, context: dict):
+        operation_id = operation.id
+        params = dict(operation.params)
+        sub_cursor = operation.sub_cursor
+        started = time.monotonic()
+        succeeded = failed = 0
+        cursor = operation.cursor
+        for target_id in target_ids:
+            resume_from = sub_cursor["state"] if sub_cursor and sub_cursor.get("target_id") == target_id else None
+            try:
+                done, ok, state = kind.process_step(target_id, params, context, resume_from)
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Admin operation {operation_id} failed on target {target_id}: {e}", exc_info=True)
+                done, ok = True, False
+            if not done:
+                # End the chunk here so the step's progress (and any cancel) is picked up before the next one.
+                sub_cursor = {"target_id": target_id, "state": state}
+                break
+            sub_cursor = None
+            cursor = target_id
+            if ok: succeeded += 1
+            else: failed += 1
+
+        # Items commit (or roll back) their own work, which expires the operation; these writes reload it.
+        operation.cursor = cursor
+        operation.sub_cursor = sub_cursor
+        operation.processed += succeeded + failed
+        operation.succeeded += succeeded
+        operation.failed += failed
+        operation.active_seconds += time.monotonic() - started
+        db.session.commit()
+        # Drop everything the chunk loaded so the identity map doesn't grow with the target set.
+        db.session.expunge_all()
+        return self.get_operation(operation_id)
@@ -1,10 +1,12 @@
 # Path: apps/backend/services/admin_service.py
 from flask import current_app
+import requests
 from ..app import db # NEW: Import db
 from ..config import config
-from ..models import Job, JobOpportunity, TrackedJob, JobAnalysis, Company, User # Import all models
+from ..models import Job, JobOpportunity, TrackedJob, JobAnalysis, Company, User, TrackedJobStatusEnum, OPEN_TRACKED_JOB_STATUSES # Import all models
 from .job_service import JobService # We need the URL validity checker
 from .company_service import CompanyService # NEW: Import CompanyService
+from .recommendation_cache_service import RecommendationCacheService
 from datetime import datetime, timedelta
 import pytz
 import re # for URL patterns
@@ -15,6 +17,7 @@ class AdminService:
         self.logger = logger or current_app.logger
         self.job_service = JobService(self.logger)
         self.company_service = CompanyService(self.logger)
+        self.recommendation_cache = RecommendationCacheService(self.logger)
 
     # Note: DB reset moved to admin route for direct endpoint access and safety
 
@@ -22,9 +25,9 @@ class AdminService:
     def check_job_url_validity(self):
         """
         Checks the validity of job URLs and updates their status.
-        - Marks URLs as expired if unreachable or older than 60 days.
+        - Marks URLs as expired if unreachable (age-based expiry is expire_old_job_postings).
         - Identifies and marks legacy malformed URLs.
-        This operates on JobOpportunity records now.
+        This operates on JobOpportunity records now. Returns a dict of counts.
         """
         self.logger.info("Starting job URL validity check.")
         
@@ -41,6 +44,7 @@ class AdminService:
         checked_count = 0
         marked_unreachable_count = 0
         marked_legacy_malformed_count = 0
+        flipped_job_ids = set() # Jobs whose opportunity changed is_active; their users' recommendations go stale
 
         # Regex for common malformed placeholders from old system
         MALFORMED_URL_PATTERNS = [
@@ -50,6 +54,7 @@ class AdminService:
         ]
 
         for opportunity in opportunities_to_check:
+            was_active = opportunity.is_active
             is_malformed_legacy = any(pattern.match(opportunity.url) for pattern in MALFORMED_URL_PATTERNS)
             
             if is_malformed_legacy:
@@ -78,48 +83,112 @@ class AdminService:
 
             opportunity.last_checked_at = datetime.now(pytz.utc)
             db.session.add(opportunity) # Mark for update
+            if opportunity.is_active != was_active:
+                flipped_job_ids.add(opportunity.job_id)
             checked_count += 1
         
         try:
+            self.recommendation_cache.invalidate_for_jobs(flipped_job_ids)
             db.session.commit()
             self.logger.info(f"URL validity check complete. Checked {checked_count} opportunities. Marked {marked_unreachable_count} unreachable, {marked_legacy_malformed_count} legacy malformed.")
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error during URL validity check commit: {e}", exc_info=True)
+            raise
+        return {"checked": checked_count, "unreachable": marked_unreachable_count, "legacy_malformed": marked_legacy_malformed_count}
 
-    # Method to check for stale tracked applications
-    def check_stale_applications(self):
+    def _sweep_by_id_range(self, label, id_column, build_update, batch_size=None):
         """
-        Checks for tracked jobs that are considered stale (no activity for X days)
-        and marks them as 'EXPIRED' with a 'Stale - No action in X days' reason.
-        This operates on TrackedJob records.
+        Runs a set-based UPDATE over the table one primary-key range at a time, committing after each
+        range so row locks are held only briefly. `build_update(lo, hi)` must return an UPDATE limited
+        to `lo < id <= hi` with a RETURNING clause. Returns all RETURNING rows.
         """
-        self.logger.info("Starting stale application check.")
-        stale_threshold_days = 30 # Configurable threshold
+        batch_size = batch_size or config.MAINTENANCE_SWEEP_BATCH_SIZE
+        max_id = db.session.scalar(db.select(db.func.max(id_column))) or 0
+        touched = []
+        for lo in range(0, max_id, batch_size):
+            try:
+                rows = db.session.execute(build_update(lo, lo + batch_size)).all()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            touched.extend(rows)
+        self.logger.info(f"{label} sweep complete: {len(touched)} rows updated across ids 1-{max_id}.")
+        return touched
 
-        stale_applications = TrackedJob.query.filter(
-            # Exclude already terminal states
-            TrackedJob.status.in_(['SAVED', 'APPLIED', 'INTERVIEWING', 'OFFER_NEGOTIATIONS']),
-            TrackedJob.updated_at < datetime.now(pytz.utc) - timedelta(days=stale_threshold_days),
-            db.or_(
-                TrackedJob.next_action_at == None, # No next action planned
-                TrackedJob.next_action_at < datetime.now(pytz.utc) # Next action date is in the past
+    def check_stale_applications(self, batch_size=None):
+        """
+        Marks tracked jobs with no activity for TRACKED_JOB_STALE_DAYS (and no upcoming next action) as
+        'EXPIRED', in one set-based UPDATE per id range. Bumping updated_at lets delta sync pick them up.
+        Returns the number of tracked jobs expired.
+        """
+        stale_days = config.TRACKED_JOB_STALE_DAYS
+        now = datetime.now(pytz.utc)
+        cutoff = now - timedelta(days=stale_days)
+
+        def build_update(lo, hi):
+            return (
+                db.update(TrackedJob)
+                .where(
+                    TrackedJob.id > lo, TrackedJob.id <= hi,
+                    TrackedJob.status.in_(OPEN_TRACKED_JOB_STATUSES),
+                    TrackedJob.updated_at < cutoff,
+                    db.or_(TrackedJob.next_action_at == None, TrackedJob.next_action_at < now)
+                )
+                .values(status=TrackedJobStatusEnum.EXPIRED, status_reason=f"Stale - No action in {stale_days} days", resolved_at=now, updated_at=now)
+                .returning(TrackedJob.id)
+                .execution_options(synchronize_session=False)
             )
-        ).limit(100).all() # Process in batches
 
-        marked_stale_count = 0
-        for app in stale_applications:
-            app.status = 'EXPIRED' # Set to ENUM member
-            app.status_reason = f"Stale - No action in {stale_threshold_days} days"
-            app.resolved_at = datetime.now(pytz.utc)
-            app.updated_at = datetime.now(pytz.utc)
-            db.session.add(app)
-            marked_stale_count += 1
-            self.logger.info(f"Marked stale tracked job ID: {app.id}")
-        
-        try:
+        return len(self._sweep_by_id_range("Stale application", TrackedJob.id, build_update, batch_size))
+
+    def expire_old_job_postings(self, batch_size=None):
+        """
+        Deactivates job opportunities posted (or, without a posting date, first seen) more than
+        JOB_POSTING_MAX_AGE_DAYS ago, in one set-based UPDATE per id range, and marks stale the
+        recommendations of every user with an analysis of an affected job. Returns the number deactivated.
+        """
+        now = datetime.now(pytz.utc)
+        cutoff = now - timedelta(days=config.JOB_POSTING_MAX_AGE_DAYS)
+
+        def build_update(lo, hi):
+            return (
+                db.update(JobOpportunity)
+                .where(
+                    JobOpportunity.id > lo, JobOpportunity.id <= hi,
+                    JobOpportunity.is_active == True,
+                    db.func.coalesce(JobOpportunity.posted_at, JobOpportunity.created_at) < cutoff
+                )
+                .values(is_active=False, last_checked_at=now)
+                .returning(JobOpportunity.id, JobOpportunity.job_id)
+                .execution_options(synchronize_session=False)
+            )
+
+        expired = self._sweep_by_id_range("Expired posting", JobOpportunity.id, build_update, batch_size)
+        job_ids = {row.job_id for row in expired}
+        if job_ids:
+            self.recommendation_cache.invalidate_for_jobs(job_ids)
             db.session.commit()
-            self.logger.info(f"Stale application check complete. Marked {marked_stale_count} applications as stale.")
-        except Exception as e:
-            db.session.rollback()
-            self.logger.error(f"Error during stale application check commit: {e}", exc_info=True)
\ No newline at end of file
+        return len(expired)
+
+    def run_maintenance_sweeps(self, batch_size=None):
+        """Runs every set-based maintenance sweep. Returns the rows each one touched."""
+        return {
+            "stale_applications_expired": self.check_stale_applications(batch_size),
+            "job_postings_expired": self.expire_old_job_postings(batch_size)
+        }
+
+    def get_analysis_protocol_status(self):
+        """Analysis counts per protocol version, so a migration's remaining work is visible at a glance."""
+        rows = db.session.execute(
+            db.select(JobAnalysis.analysis_protocol_version, db.func.count())
+            .group_by(JobAnalysis.analysis_protocol_version)
+        ).all()
+        counts = {version: count for version, count in rows}
+        current = config.ANALYSIS_PROTOCOL_VERSION
+        return {
+            "current_version": current,
+            "counts_by_version": counts,
+            "outdated": sum(count for version, count in counts.items() if version != current)
+        }
@@ -2,20 +2,172 @@
 import requests
 import json
 import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import urlparse
 from flask import current_app
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 import pytz
 
 from ..app import db
-from ..models import Company
+from ..models import Company, CompanyAlias, Job, JobOpportunity, TrackedJob
+from ..events import publish_user_event, COMPANY_ENRICHED
+from ..notifications import notify, listener
+from ..advisory_locks import try_advisory_lock, COMPANY_ENRICHMENT
+from ..gemini_limits import gemini_limiter
+from ..json_provider import dumps_bytes
 from ..config import config
 
 GEMINI_PRO_MODEL = "gemini-1.5-pro"
+COMPANY_CACHE_CHANNEL = 'tt_company_invalidate'
+
+COMPANY_FIELD_DESCRIPTIONS = {
+    'industry': 'industry (string, e.g., "Software Development", "Financial Services")',
+    'description': 'description (string, a brief overview of what the company does)',
+    'mission': "mission (string, the company's stated mission or core purpose)",
+    'business_model': 'business_model (string, how the company generates revenue)',
+    'company_size_min': 'company_size_min (integer, minimum employee count, nullable)',
+    'company_size_max': 'company_size_max (integer, maximum employee count, nullable)',
+    'headquarters': 'headquarters (string, city, state, country)',
+    'founded_year': 'founded_year (integer, nullable)',
+    'website_url': 'website_url (string, official website, nullable)',
+}
+COMPANY_PROFILE_FIELDS = list(COMPANY_FIELD_DESCRIPTIONS)
+COMPANY_INTEGER_FIELDS = {'company_size_min', 'company_size_max', 'founded_year'}
+# Research is skipped once these are filled, whether by a job posting or an earlier research call.
+COMPANY_RESEARCH_REQUIRED_FIELDS = ['industry', 'description', 'mission']
+
+# Trailing tokens dropped when building a company name key. Only stripped while another token remains.
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'lp', 'pllc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+    'plc', 'gmbh', 'ag', 'kg', 'sa', 'sas', 'sarl', 'srl', 'spa', 'bv', 'nv', 'oy', 'ab', 'as', 'aps', 'pty', 'kk'
+}
+# Hosts that belong to job boards and ATS vendors rather than to the hiring company.
+NON_COMPANY_DOMAINS = {
+    'linkedin.com', 'indeed.com', 'glassdoor.com', 'greenhouse.io', 'lever.co', 'workday.com', 'myworkdayjobs.com',
+    'smartrecruiters.com', 'ashbyhq.com', 'bamboohr.com', 'icims.com', 'jobvite.com', 'workable.com', 'geebo.com'
+}
+# Second-level labels under which registrable domains have three labels (acme.co.uk).
+SECOND_LEVEL_LABELS = {'co', 'com', 'net', 'org', 'ac', 'gov', 'ne', 'or'}
+
+def normalize_company_name(name):
+    """
+    Matching key for a company name: unicode-folded, case-folded, punctuation and whitespace removed,
+    '&' read as 'and', and trailing legal suffixes and a leading 'the' dropped. Returns None if nothing is left.
+    """
+    if not name: return None
+    folded = unicodedata.normalize('NFKD', name)
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch)).casefold().replace('&', ' and ')
+    tokens = re.findall(r"[^\W_]+", folded)
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    if len(tokens) > 1 and tokens[0] == 'the':
+        tokens.pop(0)
+    return ''.join(tokens)[:255] or None
+
+def company_domain_key(url):
+    """Registrable domain of a company website URL ("https://careers.acme.co.uk/x" -> "acme.co.uk"), or None for job boards."""
+    if not url: return None
+    host = urlparse(url if '//' in url else f"//{url}").hostname
+    if not host or '.' not in host: return None
+    labels = host.lower().rstrip('.').split('.')
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS else 2
+    domain = '.'.join(labels[-keep:])
+    return None if domain in NON_COMPANY_DOMAINS else domain
+
+class CompanyProfileCache:
+    """
+    Per-process LRU of serialized company profiles, bounded by the encoded size of its entries.
+    Entries are evicted in every worker through a Postgres NOTIFY sent when a company changes;
+    the TTL only bounds staleness if a notification is ever lost.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # company_id -> (profile_dict, encoded_json, cached_at)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._registered = False
+        # Bumped on every invalidation; a load that raced with one is served but not cached.
+        self._generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def ensure_listening(self, logger):
+        if self._registered: return
+        with self._lock:
+            if self._registered: return
+            self._registered = True
+        listener.add_handler(COMPANY_CACHE_CHANNEL, self._on_notify, logger, on_connect=self.clear)
+
+    def get(self, company_id: int):
+        """Returns (profile_dict, encoded_json) or None. Callers must not mutate the dict."""
+        with self._lock:
+            entry = self._entries.get(company_id)
+            if entry and time.monotonic() - entry[2] < self.ttl_seconds:
+                self._entries.move_to_end(company_id)
+                self.hits += 1
+                return entry[0], entry[1]
+            if entry: self._pop_unlocked(company_id)
+            self.misses += 1
+            return None
+
+    def generation(self):
+        return self._generation
+
+    def put(self, company_id: int, profile: dict, generation: int):
+        encoded = dumps_bytes(profile)
+        if len(encoded) > self.max_bytes: return profile, encoded
+        with self._lock:
+            if generation != self._generation: return profile, encoded
+            self._pop_unlocked(company_id)
+            self._entries[company_id] = (profile, encoded, time.monotonic())
+            self._size += len(encoded)
+            while self._size > self.max_bytes:
+                self._pop_unlocked(next(iter(self._entries)))
+                self.evictions += 1
+        return profile, encoded
+
+    def invalidate(self, company_ids):
+        with self._lock:
+            self._generation += 1
+            for company_id in company_ids:
+                if self._pop_unlocked(company_id): self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions, "invalidations": self.invalidations
+            }
+
+    def _pop_unlocked(self, company_id):
+        entry = self._entries.pop(company_id, None)
+        if entry: self._size -= len(entry[1])
+        return entry
+
+    def _on_notify(self, payload):
+        self.invalidate(payload.get("company_ids", []))
+
+# One cache per worker process; see CompanyService.get_company_profile.
+_profile_cache = CompanyProfileCache(config.COMPANY_CACHE_MAX_BYTES, config.COMPANY_CACHE_TTL_SECONDS)
 
 class CompanyService:
     def __init__(self, logger=None):
         self.logger = logger or current_app.logger
+        _profile_cache.ensure_listening(self.logger)
 
     def _call_gemini_api(self, prompt, model_name=GEMINI_PRO_MODEL):
         api_key = config.GEMINI_API_KEY
@@ -33,7 +185,8 @@ class CompanyService:
 
         try:
             self.logger.info(f"Calling Gemini for company research with model {model_name}")
-            response = requests.post(url, headers=headers, json=payload, timeout=90)
+            with gemini_limiter:
+                response = requests.post(url, headers=headers, json=payload, timeout=90)
             response.raise_for_status()
             data = response.json()
             
@@ -64,6 +217,23 @@ class CompanyService:
             self.logger.error(f"Error in company research Gemini API call: {e}", exc_info=True)
             return None
 
+    def _clean_company_facts(self, data):
+        """Keeps known profile fields with usable values, coercing numbers and trimming strings to column limits."""
+        if not isinstance(data, dict): return {}
+        facts = {}
+        for field in COMPANY_PROFILE_FIELDS:
+            value = data.get(field)
+            if value in (None, '', [], {}): continue
+            try:
+                if field in COMPANY_INTEGER_FIELDS:
+                    value = int(str(value).replace(',', ''))
+                else:
+                    value = str(value).strip()[:255 if field in ('industry', 'headquarters') else None]
+            except (ValueError, TypeError):
+                continue
+            if value or value == 0: facts[field] = value
+        return facts
+
     def _parse_company_ai_response(self, ai_response):
         """Parses and validates the JSON output from company AI research."""
         if not ai_response: return None
@@ -76,48 +246,65 @@ class CompanyService:
             parsed_data = json.loads(json_string)
 
             # Basic validation and cleaning
-            parsed_data['name'] = parsed_data.get('name', 'Unknown Company').strip()
-            parsed_data['company_size_min'] = int(parsed_data['company_size_min']) if parsed_data.get('company_size_min') else None
-            parsed_data['company_size_max'] = int(parsed_data['company_size_max']) if parsed_data.get('company_size_max') else None
-
-            return parsed_data
+            cleaned = self._clean_company_facts(parsed_data)
+            cleaned['name'] = (parsed_data.get('name') or '').strip() or None
+            return cleaned
         except Exception as e:
             self.logger.error(f"Error processing company AI response: {e}. Raw response: {ai_response[:500]}")
             return None
 
+    def missing_profile_fields(self, company: Company):
+        return [field for field in COMPANY_PROFILE_FIELDS if getattr(company, field) is None]
+
+    def needs_research(self, company: Company):
+        """True while any of the fields that make a profile usable are still empty."""
+        return any(getattr(company, field) is None for field in COMPANY_RESEARCH_REQUIRED_FIELDS)
+
+    def apply_company_facts(self, company: Company, facts: dict):
+        """
+        Fills the company's empty profile columns from `facts` (e.g. the company_facts section of a job
+        analysis). Never overwrites existing values. Returns the fields filled. Does not commit.
+        """
+        facts = self._clean_company_facts(facts)
+        filled = [field for field in self.missing_profile_fields(company) if field in facts]
+        for field in filled:
+            setattr(company, field, facts[field])
+        if filled:
+            company.updated_at = datetime.now(pytz.utc)
+            if 'website_url' in filled:
+                self.record_aliases(company.id, website_urls=[company.website_url])
+            self.invalidate_cached_profiles([company.id])
+        return filled
+
     def research_and_update_company_profile(self, company_id: int):
         """
-        Performs AI-driven research to enrich a company's profile.
-        If company does not exist, it will not create it (expects pre-existing company).
+        Performs AI-driven research to enrich a company's profile, asking only for the fields that are
+        still empty (facts taken from job postings are kept). Skips the call entirely once the required
+        fields are filled. If company does not exist, it will not create it (expects pre-existing company).
         """
         company = Company.query.filter_by(id=company_id).first()
         if not company:
             self.logger.warning(f"Company ID {company_id} not found for research. Skipping.")
             return None
 
-        if company.industry and company.description and company.mission:
+        if not self.needs_research(company):
             self.logger.info(f"Company {company.name} (ID: {company.id}) already has sufficient profile data. Skipping research.")
             return company
 
-        self.logger.info(f"Starting AI research for company: {company.name} (ID: {company.id})")
+        missing_fields = self.missing_profile_fields(company)
+        self.logger.info(f"Starting AI research for company: {company.name} (ID: {company.id}); missing {missing_fields}")
+        known_facts = {field: getattr(company, field) for field in COMPANY_PROFILE_FIELDS if field not in missing_fields}
+        requested = "\n".join(f"        - {COMPANY_FIELD_DESCRIPTIONS[field]}" for field in missing_fields)
 
         prompt = f"""
         Research the following company and provide a structured JSON output with key information.
         If a piece of information cannot be found, use null.
         Company Name: {company.name}
-        {f"Company Website (if known): {company.website_url}" if company.website_url else ""}
+        {f"Already known (use to disambiguate, do not repeat): {json.dumps(known_facts)}" if known_facts else ""}
 
         Output a JSON object with the following structure:
         - name (string, exact company name)
-        - industry (string, e.g., "Software Development", "Financial Services")
-        - description (string, a brief overview of what the company does)
-        - mission (string, the company's stated mission or core purpose)
-        - business_model (string, how the company generates revenue)
-        - company_size_min (integer, minimum employee count, nullable)
-        - company_size_max (integer, maximum employee count, nullable)
-        - headquarters (string, city, state, country)
-        - founded_year (integer, nullable)
-        - website_url (string, official website, nullable)
+{requested}
 
         Strictly conform to the JSON structure and wrap the entire response in ```json ... ```.
         """
@@ -126,18 +313,13 @@ class CompanyService:
 
         if ai_response:
             parsed_data = self._parse_company_ai_response(ai_response)
-            if parsed_data:
-                company.name = parsed_data.get('name', company.name)
-                company.industry = parsed_data.get('industry', company.industry)
-                company.description = parsed_data.get('description', company.description)
-                company.mission = parsed_data.get('mission', company.mission)
-                company.business_model = parsed_data.get('business_model', company.business_model)
-                company.company_size_min = parsed_data.get('company_size_min', company.company_size_min)
-                company.company_size_max = parsed_data.get('company_size_max', company.company_size_max)
-                company.headquarters = parsed_data.get('headquarters', company.headquarters)
-                company.founded_year = parsed_data.get('founded_year', company.founded_year)
-                company.website_url = parsed_data.get('website_url', company.website_url)
+            if parsed_data is not None:
+                # name_key stays tied to the name we first saw; the researched name becomes an alias.
+                self.record_aliases(company.id, names=[parsed_data.get('name')])
+                self.apply_company_facts(company, parsed_data)
                 company.updated_at = datetime.now(pytz.utc)
+                self.invalidate_cached_profiles([company.id])
+                publish_user_event(self._get_tracking_user_ids(company.id), COMPANY_ENRICHED, {"company_id": company.id})
 
                 try:
                     db.session.commit()
@@ -154,8 +336,245 @@ class CompanyService:
             self.logger.warning(f"AI company research for {company.name} (ID: {company.id}) received empty response.")
             return None
 
+    def enrich_company_single_flight(self, company_id: int):
+        """
+        Runs research_and_update_company_profile unless another worker is already enriching this company,
+        in which case it returns None immediately. Enrichment is keyed by company id across all processes.
+        """
+        with try_advisory_lock(COMPANY_ENRICHMENT, company_id) as acquired:
+            if not acquired:
+                self.logger.info(f"Enrichment for company {company_id} already in progress elsewhere. Skipping.")
+                return None
+            return self.research_and_update_company_profile(company_id)
+
+    def incomplete_companies_query(self, after_id: int = 0):
+        """Ids of companies that still need research, in id order, for keyset-paged backfills."""
+        return (
+            db.select(Company.id)
+            .where(Company.id > after_id, db.or_(*(getattr(Company, f) == None for f in COMPANY_RESEARCH_REQUIRED_FIELDS)))
+            .order_by(Company.id)
+        )
+
+    def backfill_incomplete_profiles(self, workers: int = 4, chunk_size: int = 50, after_id: int = 0, on_chunk=None):
+        """
+        Researches every incomplete company with id > `after_id`, `workers` at a time, one chunk of ids
+        at a time. Gemini calls go through the shared process limiter and the per-company advisory lock,
+        so this can run alongside live traffic. After each chunk `on_chunk(last_id, stats)` is called;
+        every id up to last_id has been attempted, which makes it a safe resume point.
+        Returns the final stats dict.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        app = current_app._get_current_object()
+
+        def enrich(company_id):
+            with app.app_context():
+                try:
+                    return CompanyService(app.logger).enrich_company_single_flight(company_id) is not None
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Backfill failed for company {company_id}: {e}", exc_info=True)
+                    return False
+
+        stats = {
+            "total": db.session.scalar(db.select(db.func.count()).select_from(self.incomplete_companies_query(after_id).subquery())),
+            "processed": 0, "succeeded": 0, "failed": 0
+        }
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tt-backfill') as pool:
+            while True:
+                company_ids = db.session.scalars(self.incomplete_companies_query(after_id).limit(chunk_size)).all()
+                db.session.rollback() # Don't hold a transaction open while the chunk runs.
+                if not company_ids: break
+                for succeeded in pool.map(enrich, company_ids):
+                    stats["processed"] += 1
+                    stats["succeeded" if succeeded else "failed"] += 1
+                after_id = company_ids[-1]
+                if on_chunk: on_chunk(after_id, stats)
+        return stats
+
+    def _get_tracking_user_ids(self, company_id: int):
+        return db.session.scalars(
+            db.select(TrackedJob.user_id).distinct()
+            .join(JobOpportunity, JobOpportunity.id == TrackedJob.job_opportunity_id)
+            .join(Job, Job.id == JobOpportunity.job_id)
+            .where(Job.company_id == company_id)
+        ).all()
+
+    def get_company_version(self, company_id: int):
+        return db.session.query(Company.updated_at).filter_by(id=company_id).scalar()
+
+    def _load_cached_profile(self, company_id: int):
+        cached = _profile_cache.get(company_id)
+        if cached: return cached
+        generation = _profile_cache.generation()
+        company = db.session.get(Company, company_id)
+        if not company: return None
+        return _profile_cache.put(company_id, company.to_dict(), generation)
+
+    def get_company_profile(self, company_id: int):
+        """Company.to_dict() for `company_id`, served from the per-process cache. None if the company doesn't exist."""
+        cached = self._load_cached_profile(company_id) if company_id else None
+        return dict(cached[0]) if cached else None
+
+    def get_company_profile_json(self, company_id: int):
+        """Returns (encoded_json, updated_at) for the profile endpoint without touching the database on a hit."""
+        cached = self._load_cached_profile(company_id)
+        return (cached[1], cached[0]['updated_at']) if cached else None
+
+    def invalidate_cached_profiles(self, company_ids):
+        """Evicts companies from every worker's profile cache once the current transaction commits. Does not commit."""
+        company_ids = sorted(set(company_ids))
+        if not company_ids: return
+        _profile_cache.invalidate(company_ids)
+        notify(COMPANY_CACHE_CHANNEL, {"company_ids": company_ids})
+
+    def get_cache_stats(self):
+        return _profile_cache.stats()
+
     def get_company(self, company_id: int):
         return Company.query.filter_by(id=company_id).first()
 
     def get_company_by_name(self, company_name: str):
-        return Company.query.filter(db.func.lower(Company.name) == company_name.lower()).first()
\ No newline at end of file
+        return self.resolve_company(company_name)
+
+    def resolve_company(self, company_name: str, alias_names=(), website_url: str = None):
+        """
+        Finds the existing company for a name, checking in order: the normalized name key, name aliases
+        (including `alias_names`, e.g. the JSON-LD hiring organization), the website's domain alias,
+        and finally a case-insensitive name match for rows not yet given a key.
+        """
+        name_keys = [k for k in dict.fromkeys(normalize_company_name(n) for n in (company_name, *alias_names)) if k]
+        if name_keys:
+            company = Company.query.filter(Company.name_key.in_(name_keys)).order_by(Company.id).first()
+            if company: return company
+            company = Company.query.join(CompanyAlias).filter(
+                CompanyAlias.kind == 'name', CompanyAlias.alias_key.in_(name_keys)
+            ).order_by(Company.id).first()
+            if company: return company
+        domain = company_domain_key(website_url)
+        if domain:
+            company = Company.query.join(CompanyAlias).filter(CompanyAlias.kind == 'domain', CompanyAlias.alias_key == domain).first()
+            if company: return company
+        if not company_name: return None
+        return Company.query.filter(db.func.lower(Company.name) == company_name.lower()).first()
+
+    def record_aliases(self, company_id: int, names=(), website_urls=()):
+        """Adds name and domain aliases for a company. Keys already claimed by any company are left alone. Does not commit."""
+        rows = [{'company_id': company_id, 'kind': 'name', 'alias_key': k} for k in {normalize_company_name(n) for n in names} if k]
+        rows += [{'company_id': company_id, 'kind': 'domain', 'alias_key': k} for k in {company_domain_key(u) for u in website_urls} if k]
+        if not rows: return
+        db.session.execute(
+            pg_insert(CompanyAlias).values(rows).on_conflict_do_nothing(index_elements=[CompanyAlias.kind, CompanyAlias.alias_key])
+        )
+
+    def get_or_create_company(self, company_name: str, alias_names=(), website_url: str = None):
+        """
+        Returns (company, created). A new company is written with INSERT ... ON CONFLICT on its normalized
+        name, so a concurrent insert of the same company resolves to the winner instead of a duplicate.
+        Aliases from this sighting are recorded either way. Does not commit.
+        """
+        alias_names = [n for n in alias_names if n]
+        company = self.resolve_company(company_name, alias_names, website_url)
+        created = False
+        if not company:
+            name_key = normalize_company_name(company_name) or None
+            stmt = pg_insert(Company).values(
+                name=company_name, name_key=name_key,
+                website_url=website_url if company_domain_key(website_url) else None
+            )
+            conflict_target = Company.name_key if name_key else Company.name
+            row = db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[conflict_target],
+                    set_={conflict_target.key: getattr(stmt.excluded, conflict_target.key)} # No-op update so RETURNING yields the winner
+                ).returning(Company.id, literal_column('xmax = 0').label('created'))
+            ).one()
+            company, created = db.session.get(Company, row.id), row.created
+        elif company.name_key is None:
+            # Legacy row found by exact name: claim its key unless a merge is still pending for it.
+            key = normalize_company_name(company.name)
+            if key and not Company.query.filter(Company.name_key == key).first():
+                company.name_key = key
+        self.record_aliases(company.id, names=alias_names, website_urls=[website_url] if website_url else [])
+        return company, created
+
+    def _fold_duplicate_jobs(self, company_ids):
+        """
+        Within a group of companies about to be merged, folds jobs with the same description hash into the
+        lowest id, so moving them onto one company can't violate uq_jobs_company_id_description_hash.
+        Returns the ids of the jobs folded away. Does not commit.
+        """
+        from .job_service import merge_duplicate_job
+        keepers = {}
+        folded_job_ids = []
+        for job_id, description_hash in db.session.execute(
+            db.select(Job.id, Job.job_description_hash)
+            .where(Job.company_id.in_(company_ids), Job.job_description_hash != None).order_by(Job.id)
+        ).all():
+            keeper_id = keepers.setdefault(description_hash, job_id)
+            if keeper_id != job_id:
+                merge_duplicate_job(job_id, keeper_id)
+                folded_job_ids.append(job_id)
+        return folded_job_ids
+
+    def merge_duplicate_companies(self, apply_changes=False):
+        """
+        Groups companies by normalized name and merges each group into its most complete member
+        (lowest id on ties): jobs and aliases are moved, empty profile fields are filled from the
+        duplicates, and the duplicates are deleted. Finally every company gets its name key.
+        Returns a list of (survivor_id, survivor_name, [merged names]) and commits per group when applying.
+        """
+        from .recommendation_cache_service import RecommendationCacheService
+        recommendation_cache = RecommendationCacheService(self.logger)
+        profile_fields = COMPANY_PROFILE_FIELDS
+
+        groups = {}
+        for company_id, name in db.session.execute(db.select(Company.id, Company.name).order_by(Company.id)):
+            key = normalize_company_name(name)
+            if key: groups.setdefault(key, []).append(company_id)
+
+        merges = []
+        for key, company_ids in groups.items():
+            if len(company_ids) < 2: continue
+            companies = Company.query.filter(Company.id.in_(company_ids)).all()
+            completeness = lambda c: sum(getattr(c, f) is not None for f in profile_fields)
+            survivor = max(companies, key=lambda c: (completeness(c), -c.id))
+            duplicates = [c for c in companies if c.id != survivor.id]
+            merges.append((survivor.id, survivor.name, [c.name for c in duplicates]))
+            if not apply_changes: continue
+
+            duplicate_ids = [c.id for c in duplicates]
+            try:
+                # One savepoint per group: a group that fails is logged and skipped, not the whole run.
+                with db.session.begin_nested():
+                    folded_job_ids = self._fold_duplicate_jobs(company_ids)
+                    moved_job_ids = db.session.scalars(
+                        db.update(Job).where(Job.company_id.in_(duplicate_ids)).values(company_id=survivor.id).returning(Job.id)
+                    ).all()
+                    for duplicate in duplicates:
+                        for field in profile_fields:
+                            if getattr(survivor, field) is None and getattr(duplicate, field) is not None:
+                                setattr(survivor, field, getattr(duplicate, field))
+                    self.record_aliases(survivor.id, names=[c.name for c in duplicates],
+                                        website_urls=[c.website_url for c in companies if c.website_url])
+                    db.session.execute(db.delete(CompanyAlias).where(CompanyAlias.company_id.in_(duplicate_ids)))
+                    db.session.execute(db.delete(Company).where(Company.id.in_(duplicate_ids)))
+                    db.session.flush()
+                    survivor.name_key = key
+                    survivor.updated_at = datetime.now(pytz.utc)
+                    recommendation_cache.invalidate_for_jobs([*moved_job_ids, *folded_job_ids])
+                    self.invalidate_cached_profiles([survivor.id, *duplicate_ids])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Failed to merge companies {duplicate_ids} into {survivor.id}: {e}", exc_info=True)
+                continue
+            self.logger.info(
+                f"Merged companies {duplicate_ids} into {survivor.id} ({survivor.name}); moved {len(moved_job_ids)} jobs, "
+                f"folded {len(folded_job_ids)} duplicate postings."
+            )
+
+        if apply_changes:
+            for company in Company.query.filter(Company.name_key == None).all():
+                company.name_key = normalize_company_name(company.name)
+            db.session.commit()
+        return merges
\ No newline at end of file
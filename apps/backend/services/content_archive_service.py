@@ -0,0 +1,159 @@
+# Path: apps/backend/services/content_archive_service.py
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import zstandard
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..app import db
+from ..models import ContentBlob, Job, JobOpportunity
+from ..config import config
+
+CHUNK_SIZE = 64 * 1024
+
+def _iter_chunks(content, chunk_size=CHUNK_SIZE):
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        view = memoryview(content)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    else:
+        yield from content
+
+def iter_decompressed(compressed, chunk_size=CHUNK_SIZE):
+    """Yields decompressed chunks of a zstd frame without materializing the whole output."""
+    with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(compressed)) as reader:
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk: break
+            yield chunk
+
+def reextract_html_blob(compressed):
+    """Process-pool worker: decompresses an archived page and runs the current text extractor over it."""
+    from .job_service import extract_text_from_html
+    html = b''.join(iter_decompressed(compressed)).decode('utf-8', errors='replace')
+    return extract_text_from_html(html)
+
+class ContentArchiveService:
+    """
+    Content-addressed, zstd-compressed storage for fetched job pages and extracted descriptions.
+    Blobs are keyed by the SHA-256 of their uncompressed bytes, so the extracted-text key is the
+    same value stored in Job.job_description_hash.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+
+    def store(self, content, kind: str):
+        """
+        Compresses and stores `content` (str, bytes or an iterable of byte chunks) in a single pass,
+        hashing as it goes. Duplicate content is a no-op. Returns the SHA-256 key. Does not commit.
+        """
+        hasher = hashlib.sha256()
+        compressor = zstandard.ZstdCompressor(level=config.ARCHIVE_ZSTD_LEVEL).compressobj()
+        compressed = io.BytesIO()
+        raw_size = 0
+        for chunk in _iter_chunks(content):
+            hasher.update(chunk)
+            raw_size += len(chunk)
+            compressed.write(compressor.compress(chunk))
+        compressed.write(compressor.flush())
+
+        sha256 = hasher.hexdigest()
+        data = compressed.getvalue()
+        db.session.execute(
+            pg_insert(ContentBlob).values(
+                sha256=sha256, kind=kind, content_encoding='zstd',
+                raw_size=raw_size, compressed_size=len(data), data=data
+            ).on_conflict_do_nothing(index_elements=[ContentBlob.sha256])
+        )
+        return sha256
+
+    def store_text(self, text: str):
+        return self.store(text, kind='extracted_text')
+
+    def store_html(self, html: str):
+        return self.store(html, kind='raw_html')
+
+    def _get_compressed(self, sha256: str):
+        return db.session.scalar(select(ContentBlob.data).where(ContentBlob.sha256 == sha256))
+
+    def iter_content(self, sha256: str, chunk_size=CHUNK_SIZE):
+        """Yields the decompressed bytes of a blob in chunks. Yields nothing if the blob is unknown."""
+        compressed = self._get_compressed(sha256)
+        if compressed is None: return
+        yield from iter_decompressed(compressed, chunk_size)
+
+    def read_text(self, sha256: str):
+        compressed = self._get_compressed(sha256)
+        if compressed is None: return None
+        return b''.join(iter_decompressed(compressed)).decode('utf-8', errors='replace')
+
+    def reextract_archive(self, apply_changes=False, workers=None, batch_size=200):
+        """
+        Re-runs the HTML text extractor over every archived page, in parallel and without network I/O.
+        Compares the result to each job's current description hash; with `apply_changes`, archives the
+        new text and updates the job's description, hash and discovery-index document, or folds the job
+        into an existing one of the same company whose description it now matches.
+        Returns a dict of counts.
+        """
+        from .job_discovery_service import JobDiscoveryService
+        from .job_service import merge_duplicate_job
+        job_discovery = JobDiscoveryService(self.logger)
+        stats = {"processed": 0, "changed": 0, "updated": 0, "merged": 0, "failed": 0}
+        workers = workers or os.cpu_count()
+        last_opportunity_id = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                rows = db.session.execute(
+                    select(JobOpportunity.id, JobOpportunity.job_id, JobOpportunity.raw_html_sha256,
+                           Job.job_description_hash, ContentBlob.data)
+                    .join(Job, Job.id == JobOpportunity.job_id)
+                    .join(ContentBlob, ContentBlob.sha256 == JobOpportunity.raw_html_sha256)
+                    .where(JobOpportunity.id > last_opportunity_id)
+                    .order_by(JobOpportunity.id).limit(batch_size)
+                ).all()
+                if not rows: break
+                last_opportunity_id = rows[-1].id
+
+                texts = pool.map(reextract_html_blob, [row.data for row in rows])
+                for row, text in zip(rows, texts):
+                    stats["processed"] += 1
+                    if not text: continue
+                    new_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                    if new_hash == row.job_description_hash: continue
+                    stats["changed"] += 1
+                    if not apply_changes: continue
+
+                    try:
+                        # One savepoint per job, so a bad row doesn't fail the batch commit.
+                        with db.session.begin_nested():
+                            job = db.session.get(Job, row.job_id, options=[undefer_group('job_text')])
+                            if not job: continue # Folded into another job earlier in this run
+                            self.store_text(text)
+                            # Jobs whose texts become identical are one posting; fold this one into the existing job.
+                            keeper_id = db.session.scalar(
+                                select(Job.id).where(Job.company_id == job.company_id, Job.job_description_hash == new_hash, Job.id != job.id)
+                            ) if job.company_id is not None else None
+                            if keeper_id:
+                                merge_duplicate_job(job.id, keeper_id)
+                                stats["merged"] += 1
+                                continue
+                            job.notes = text
+                            job.job_description_hash = new_hash
+                            job_discovery.index_job(job, commit=False)
+                            stats["updated"] += 1
+                    except Exception as e:
+                        stats["failed"] += 1
+                        self.logger.error(f"Re-extraction failed for job {row.job_id}: {e}", exc_info=True)
+
+                if apply_changes: db.session.commit()
+                db.session.expunge_all()
+                self.logger.info(f"Re-extraction progress: {stats}")
+        return stats
@@ -0,0 +1,94 @@
+# Path: apps/backend/services/idempotency_service.py
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import timedelta
+import hashlib
+import orjson
+
+from ..app import db
+from ..models import IdempotencyKey, get_utc_now
+from ..config import config
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+def request_fingerprint(payload: dict):
+    """Hash of a request body, so a reused key with a different request is refused rather than replayed."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+class IdempotencyService:
+    """
+    Client-supplied Idempotency-Key handling. The first request with a key claims it; retries with the
+    same key and body replay the stored outcome instead of redoing the work. A claim left in progress
+    by a worker that died is taken over once it is IDEMPOTENCY_KEY_STALE_SECONDS old.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+
+    def begin(self, user_id: int, key: str, request_hash: str):
+        """
+        Claims `key` for this request. Returns (state, resource_id) where state is 'new' (proceed, then
+        call complete or abandon), 'replay' (already done; resource_id is the result), 'in_progress'
+        (another request holds it) or 'mismatch' (the key was used with a different request).
+        """
+        now = get_utc_now()
+        claimed = db.session.scalar(
+            pg_insert(IdempotencyKey).values(
+                user_id=user_id, key=key, request_hash=request_hash, status='in_progress', created_at=now
+            ).on_conflict_do_nothing(index_elements=[IdempotencyKey.user_id, IdempotencyKey.key])
+            .returning(IdempotencyKey.key)
+        )
+        if claimed:
+            db.session.commit()
+            return 'new', None
+
+        row = db.session.execute(
+            db.select(IdempotencyKey.request_hash, IdempotencyKey.status, IdempotencyKey.resource_id, IdempotencyKey.created_at)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).first()
+        if row is None: # Purged between the insert and the read
+            db.session.commit()
+            return self.begin(user_id, key, request_hash)
+        if row.request_hash != request_hash:
+            db.session.commit()
+            return 'mismatch', None
+        if row.status == 'completed':
+            db.session.commit()
+            return 'replay', row.resource_id
+
+        if row.created_at <= now - timedelta(seconds=config.IDEMPOTENCY_KEY_STALE_SECONDS):
+            taken_over = db.session.execute(
+                db.update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key,
+                       IdempotencyKey.status == 'in_progress', IdempotencyKey.created_at == row.created_at)
+                .values(created_at=now)
+            ).rowcount
+            db.session.commit()
+            if taken_over:
+                self.logger.warning(f"Took over stale idempotency key {key!r} for user {user_id}.")
+                return 'new', None
+            return self.begin(user_id, key, request_hash)
+        db.session.commit()
+        return 'in_progress', None
+
+    def complete(self, user_id: int, key: str, resource_id: int):
+        db.session.execute(
+            db.update(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(status='completed', resource_id=resource_id, completed_at=get_utc_now())
+        )
+        db.session.commit()
+
+    def abandon(self, user_id: int, key: str):
+        """Releases a claim whose request failed, so a retry with the same key runs again."""
+        db.session.execute(
+            db.delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.status == 'in_progress'
+            )
+        )
+        db.session.commit()
+
+    def purge_expired(self):
+        cutoff = get_utc_now() - timedelta(hours=config.JOB_SUBMISSION_RECORD_TTL_HOURS)
+        purged = db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+        db.session.commit()
+        return purged
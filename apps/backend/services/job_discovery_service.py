@@ -0,0 +1,259 @@
+# Path: apps/backend/services/job_discovery_service.py
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import current_app
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
+import pytz
+
+from ..app import db
+from ..models import Job, JobSearchDocument, JobOpportunity, JobAnalysis, TrackedJob, UserProfile
+from ..config import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of',
+    'on', 'or', 'our', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your'
+}
+# Documents committed late (e.g. inside a longer submission transaction) can carry an indexed_at older
+# than the last sync, so each sync re-reads a trailing window. Re-adding a document is idempotent.
+SYNC_OVERLAP = timedelta(minutes=5)
+# Title terms are repeated so a title match outweighs an incidental mention in the description.
+TITLE_WEIGHT = 3
+
+def tokenize(text):
+    if not text: return []
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+class BM25Index:
+    """A thread-safe, in-memory inverted index scored with Okapi BM25."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict) # term -> {doc_id: tf}
+        self._doc_terms = {} # doc_id -> terms, for removal
+        self._doc_lengths = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def idf(self, term):
+        """Smoothed inverse document frequency; unseen terms get the maximum weight."""
+        doc_count = len(self._doc_lengths)
+        return math.log((1 + doc_count) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def add(self, doc_id, term_freqs, length):
+        with self._lock:
+            self._remove_unlocked(doc_id)
+            for term, tf in term_freqs.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = list(term_freqs)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_unlocked(doc_id)
+
+    def _remove_unlocked(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None: return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings: del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def search(self, query_terms, limit=20, exclude=None):
+        exclude = exclude or set()
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count: return []
+            avg_length = self._total_length / doc_count
+            scores = defaultdict(float)
+            for term in set(query_terms):
+                postings = self._postings.get(term)
+                if not postings: continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(((d, s) for d, s in scores.items() if d not in exclude), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+# One index per worker process, kept in sync with the job_search_documents table.
+_index = BM25Index()
+_sync_lock = threading.Lock()
+
+# Documents written in a session's open transaction, added to _index only once it commits. Each is
+# tagged with the savepoint it was written in (None outside one), since after_commit and after_rollback
+# also fire when a savepoint is released or rolled back, while the outer transaction is still open.
+PENDING_DOCUMENTS_KEY = 'pending_search_documents'
+
+def _enclosing_savepoint(transaction):
+    parent = transaction.parent
+    while parent is not None and not parent.nested:
+        parent = parent.parent
+    return parent
+
+@event.listens_for(Session, 'after_commit')
+def _index_committed_documents(session):
+    savepoint = session.get_nested_transaction()
+    if savepoint is not None:
+        # Released into the enclosing transaction, which may still roll back.
+        enclosing = _enclosing_savepoint(savepoint)
+        pending = session.info.get(PENDING_DOCUMENTS_KEY, [])
+        pending[:] = [(enclosing if tag is savepoint else tag, document) for tag, document in pending]
+        return
+    for _, (job_id, term_freqs, length) in session.info.pop(PENDING_DOCUMENTS_KEY, ()):
+        _index.add(job_id, term_freqs, length)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back_documents(session):
+    savepoint = session.get_nested_transaction()
+    if savepoint is not None:
+        pending = session.info.get(PENDING_DOCUMENTS_KEY, [])
+        pending[:] = [(tag, document) for tag, document in pending if tag is not savepoint]
+        return
+    session.info.pop(PENDING_DOCUMENTS_KEY, None)
+_last_synced_at = None
+_last_sync_check = 0.0
+
+class JobDiscoveryService:
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+
+    def build_document(self, job_title, company_name, description):
+        tokens = tokenize(job_title) * TITLE_WEIGHT
+        tokens += tokenize(company_name)
+        tokens += tokenize(description)[:config.JOB_INDEX_MAX_DESCRIPTION_TOKENS]
+        return dict(Counter(tokens)), len(tokens)
+
+    def index_job(self, job: Job, commit=True):
+        """Persists the job's search document and adds it to this worker's index once the transaction commits."""
+        if job.id is None:
+            db.session.flush()
+        self.index_document(job.id, job.job_title, job.company_name, job.notes, commit=commit)
+
+    def index_document(self, job_id: int, job_title: str, company_name: str, description: str, commit=True):
+        """index_job for callers that hold the job's columns rather than an ORM instance."""
+        term_freqs, length = self.build_document(job_title, company_name, description)
+        self._upsert_documents([{'job_id': job_id, 'term_freqs': term_freqs, 'length': length}])
+        # Deferred to the commit, so a unit of work that later rolls back leaves no phantom job in the index.
+        db.session.info.setdefault(PENDING_DOCUMENTS_KEY, []).append(
+            (db.session.get_nested_transaction(), (job_id, term_freqs, length))
+        )
+        if commit: db.session.commit()
+
+    def _upsert_documents(self, rows):
+        now = datetime.now(pytz.utc)
+        for row in rows: row['indexed_at'] = now
+        stmt = pg_insert(JobSearchDocument).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobSearchDocument.job_id],
+            set_={'term_freqs': stmt.excluded.term_freqs, 'length': stmt.excluded.length, 'indexed_at': stmt.excluded.indexed_at}
+        )
+        db.session.execute(stmt)
+
+    def rebuild_index(self, batch_size=500):
+        """Re-tokenizes every canonical job. Used to backfill the table after deploys that change tokenization."""
+        indexed = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(Job.id, Job.job_title, Job.company_name, Job.notes)
+                .where(Job.id > last_id).order_by(Job.id).limit(batch_size)
+            ).all()
+            if not rows: break
+            documents = []
+            for row in rows:
+                term_freqs, length = self.build_document(row.job_title, row.company_name, row.notes)
+                documents.append({'job_id': row.id, 'term_freqs': term_freqs, 'length': length})
+            self._upsert_documents(documents)
+            db.session.commit()
+            for doc in documents:
+                _index.add(doc['job_id'], doc['term_freqs'], doc['length'])
+            indexed += len(documents)
+            last_id = rows[-1].id
+            self.logger.info(f"Indexed {indexed} jobs so far (last job ID {last_id}).")
+        return indexed
+
+    def sync_index(self, force=False):
+        """Loads documents written since the last sync (all of them on first use)."""
+        global _last_synced_at, _last_sync_check
+        if not force and time.monotonic() - _last_sync_check < config.JOB_INDEX_SYNC_INTERVAL_SECONDS:
+            return
+        with _sync_lock:
+            if not force and time.monotonic() - _last_sync_check < config.JOB_INDEX_SYNC_INTERVAL_SECONDS:
+                return
+            query = select(JobSearchDocument.job_id, JobSearchDocument.term_freqs, JobSearchDocument.length, JobSearchDocument.indexed_at)
+            if _last_synced_at:
+                query = query.where(JobSearchDocument.indexed_at > _last_synced_at - SYNC_OVERLAP)
+            loaded = 0
+            for row in db.session.execute(query.execution_options(yield_per=2000)):
+                _index.add(row.job_id, row.term_freqs, row.length)
+                if not _last_synced_at or row.indexed_at > _last_synced_at:
+                    _last_synced_at = row.indexed_at
+                loaded += 1
+            _last_sync_check = time.monotonic()
+            if loaded:
+                self.logger.info(f"Job discovery index synced {loaded} documents ({len(_index)} total).")
+
+    def idf(self, term):
+        return _index.idf(term)
+
+    def get_query_terms_for_user(self, user_id: int):
+        profile = db.session.execute(
+            select(UserProfile.desired_job_titles, UserProfile.skills).where(UserProfile.user_id == user_id)
+        ).first()
+        if not profile: return []
+        return tokenize(profile.desired_job_titles) * TITLE_WEIGHT + tokenize(profile.skills)
+
+    def discover_jobs_for_user(self, user_id: int, limit: int = 20):
+        """
+        Returns canonical jobs the user has not tracked or analyzed yet, ranked by BM25
+        against their desired job titles and skills. No AI calls are made.
+        """
+        query_terms = self.get_query_terms_for_user(user_id)
+        if not query_terms: return []
+
+        self.sync_index()
+        known_job_ids = set(db.session.scalars(
+            select(JobAnalysis.job_id).where(JobAnalysis.user_id == user_id)
+            .union(select(JobOpportunity.job_id).join(TrackedJob).where(TrackedJob.user_id == user_id))
+        ))
+        # Over-fetch so rows filtered out below (deleted or inactive jobs) don't shrink the page.
+        ranked = _index.search(query_terms, limit=limit * 2, exclude=known_job_ids)
+        if not ranked: return []
+
+        scores = dict(ranked)
+        rows = db.session.execute(
+            select(Job.id, Job.job_title, Job.company_id, Job.company_name, Job.job_modality,
+                   Job.deduced_job_level, JobOpportunity.url)
+            .join(JobOpportunity, JobOpportunity.job_id == Job.id)
+            .where(Job.id.in_(list(scores)), JobOpportunity.is_active == True)
+        ).all()
+
+        results = {}
+        for row in rows:
+            if row.id in results: continue
+            results[row.id] = {
+                "job_id": row.id,
+                "job_title": row.job_title,
+                "company_id": row.company_id,
+                "company_name": row.company_name,
+                "job_modality": row.job_modality.value if row.job_modality else None,
+                "deduced_job_level": row.deduced_job_level.value if row.deduced_job_level else None,
+                "job_url": row.url,
+                "relevance_score": round(scores[row.id], 4)
+            }
+        return sorted(results.values(), key=lambda x: x['relevance_score'], reverse=True)[:limit]
@@ -0,0 +1,333 @@
+# Path: apps/backend/services/job_import_service.py
+from flask import current_app
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from datetime import datetime
+import csv
+import io
+import queue
+import threading
+import time
+
+from ..app import db
+from ..models import JobImport, JobImportItem, get_utc_now
+from ..config import config
+from .job_service import JobService, PreparedPosting, canonicalize_job_url, extract_text_from_html
+from ..background import submit_background_task
+from ..advisory_locks import try_advisory_lock, JOB_IMPORT
+from ..events import publish_user_event, JOB_IMPORT_COMPLETED
+from ..gemini_limits import ai_work_for
+from ..rate_limits import consume_quota
+
+# Spreadsheet headers recognized as the URL column of an imported CSV.
+URL_COLUMN_NAMES = ('url', 'job_url', 'job url', 'link', 'job link', 'posting url')
+FINISHED_ITEM_STATUSES = ('succeeded', 'duplicate', 'failed')
+
+def parse_import_urls(urls=None, csv_text: str = None):
+    """
+    The URLs to import from either a JSON list or CSV text. A CSV with a recognized header uses that
+    column; otherwise each row contributes its first cell that looks like an http(s) URL.
+    Raises ValueError on malformed input.
+    """
+    if csv_text is not None:
+        rows = list(csv.reader(io.StringIO(csv_text)))
+        header = [cell.strip().lower() for cell in rows[0]] if rows else []
+        column = next((header.index(name) for name in URL_COLUMN_NAMES if name in header), None)
+        if column is not None:
+            values = [row[column] if column < len(row) else '' for row in rows[1:]]
+        else:
+            values = [next((cell for cell in row if cell.strip().lower().startswith(('http://', 'https://'))), '') for row in rows]
+    else:
+        if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+            raise ValueError("'urls' must be a list of strings.")
+        values = urls
+    return [value.strip() for value in values if value.strip()]
+
+@dataclass(slots=True)
+class ImportWorkItem:
+    """One URL moving through the import pipeline."""
+    item_id: int
+    url: str # As submitted; fetched and stored
+    canonical_url: str # Keys the single-flight with interactive submissions
+    claimed: bool = False
+    waiting_since: datetime = None
+    raw_html: str = None
+    job_description: str = None
+    prepared: PreparedPosting = None
+
+_STAGE_DONE = object()
+
+def run_pipeline(stages, items, queue_size: int, on_error):
+    """
+    Pushes `items` through `stages`, a list of (name, fn, workers). Each stage runs on its own worker
+    threads, each in its own app context, and consecutive stages are joined by bounded queues: a slow
+    stage lets its input queue fill, which blocks the stage before it, so memory stays bounded and
+    throughput settles at the slowest stage's rate instead of the sum of every stage's latency.
+    `fn(item)` returns the item for the next stage, or None to drop it; `on_error(item, exc)` is
+    called for items whose stage raised. Returns once every item has left the pipeline.
+    """
+    app = current_app._get_current_object()
+    inboxes = [queue.Queue(maxsize=queue_size) for _ in stages]
+    threads = []
+    for index, (name, fn, workers) in enumerate(stages):
+        outbox = inboxes[index + 1] if index + 1 < len(stages) else None
+        downstream_workers = stages[index + 1][2] if outbox else 0
+        live = {'workers': workers, 'lock': threading.Lock()}
+        for n in range(workers):
+            thread = threading.Thread(
+                target=_run_stage_worker, args=(app, fn, inboxes[index], outbox, downstream_workers, live, on_error),
+                name=f'tt-import-{name}-{n}', daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+    for item in items:
+        inboxes[0].put(item)
+    for _ in range(stages[0][2]):
+        inboxes[0].put(_STAGE_DONE)
+    for thread in threads:
+        thread.join()
+
+def _run_stage_worker(app, fn, inbox, outbox, downstream_workers, live, on_error):
+    try:
+        with app.app_context():
+            while True:
+                item = inbox.get()
+                if item is _STAGE_DONE: break
+                try:
+                    result = fn(item)
+                except Exception as e:
+                    db.session.rollback()
+                    try:
+                        on_error(item, e)
+                    except Exception as report_error:
+                        db.session.rollback()
+                        app.logger.error(f"Failed to record import pipeline error for {item}: {report_error}", exc_info=True)
+                    continue
+                if result is not None and outbox is not None:
+                    outbox.put(result)
+    finally:
+        # The last worker out tells the next stage's workers to finish once they drain their queue.
+        with live['lock']:
+            live['workers'] -= 1
+            last = live['workers'] == 0
+        if last and outbox is not None:
+            for _ in range(downstream_workers):
+                outbox.put(_STAGE_DONE)
+
+def _run_import(import_id: int):
+    JobImportService(current_app.logger).run_import(import_id)
+
+class JobImportService:
+    """
+    Bulk imports of job URLs. URLs are canonicalized and deduplicated up front, then stream through
+    resolve -> fetch -> extract -> analyze -> store stages on the background pool, each stage with its
+    own worker count (network fetches wide, Gemini analyses bounded by the process-wide limiter, a
+    single writer). Every item's status is committed as it moves, so clients can poll per-URL progress
+    and an import interrupted by a dead worker resumes from its unfinished items.
+
+    Items share JobService's single-flight with interactive submissions: resolve claims the URL's
+    submission lease before anything is fetched, renewing it as the item advances and recording the
+    outcome at the end. A URL another submission is already ingesting is set aside and resolved again
+    once the pipeline drains, by which time it is usually known. Each URL that reaches analysis spends
+    a job-submit token like an interactive submission would; an empty bucket stalls the analyze stage
+    until it refills rather than failing the item.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+
+    def create_import(self, user_id: int, urls: list, start: bool = True):
+        """Records an import and its items and, if `start`, queues it. Raises ValueError on an empty or oversized list."""
+        if not urls:
+            raise ValueError("No job URLs were provided.")
+        if len(urls) > config.JOB_IMPORT_MAX_URLS:
+            raise ValueError(f"At most {config.JOB_IMPORT_MAX_URLS} URLs can be imported at once.")
+
+        job_import = JobImport(user_id=user_id, status='pending', total=len(urls))
+        db.session.add(job_import)
+        db.session.flush()
+        first_positions = {}
+        items = []
+        for position, url in enumerate(urls):
+            item = JobImportItem(import_id=job_import.id, position=position, url=url, status='queued')
+            parts = urlsplit(url)
+            if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+                item.status, item.error = 'failed', "Not an http(s) URL."
+            else:
+                item.canonical_url = canonicalize_job_url(url)
+                if item.canonical_url in first_positions:
+                    item.status, item.error = 'duplicate', f"Same posting as row {first_positions[item.canonical_url]}."
+                else:
+                    first_positions[item.canonical_url] = position
+            items.append(item)
+        db.session.add_all(items)
+        db.session.commit()
+        self.logger.info(f"Created job import {job_import.id} for user {user_id}: {len(urls)} URLs, {len(first_positions)} distinct.")
+        if start:
+            submit_background_task(_run_import, job_import.id)
+        return job_import
+
+    def get_import(self, user_id: int, import_id: int):
+        """The import with per-status counts and per-URL items, or None if it isn't this user's."""
+        job_import = db.session.scalar(db.select(JobImport).where(JobImport.id == import_id, JobImport.user_id == user_id))
+        if not job_import: return None
+        items = db.session.scalars(
+            db.select(JobImportItem).where(JobImportItem.import_id == import_id).order_by(JobImportItem.position)
+        ).all()
+        counts = {}
+        for item in items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return {**job_import.to_dict(), 'counts': counts, 'items': [item.to_dict() for item in items]}
+
+    def _set_item(self, item_id: int, status: str, **values):
+        db.session.execute(db.update(JobImportItem).where(JobImportItem.id == item_id).values(status=status, **values))
+        db.session.commit()
+
+    def run_import(self, import_id: int):
+        """
+        Runs the import's unfinished items through the pipeline. Only one process runs a given import at
+        a time; if another holds it, this returns None without doing anything. Returns the status counts.
+        """
+        with try_advisory_lock(JOB_IMPORT, import_id) as acquired:
+            if not acquired:
+                self.logger.info(f"Job import {import_id} is already running elsewhere. Skipping.")
+                return None
+            job_import = db.session.get(JobImport, import_id)
+            if not job_import or job_import.status in ('completed', 'failed'): return None
+            user_id = job_import.user_id
+            job_import.status = 'running'
+            job_import.started_at = job_import.started_at or get_utc_now()
+            # Items caught mid-stage by a dead worker start over from the top.
+            db.session.execute(
+                db.update(JobImportItem)
+                .where(JobImportItem.import_id == import_id, JobImportItem.status.not_in(FINISHED_ITEM_STATUSES))
+                .values(status='queued')
+            )
+            pending = db.session.execute(
+                db.select(JobImportItem.id, JobImportItem.url, JobImportItem.canonical_url)
+                .where(JobImportItem.import_id == import_id, JobImportItem.status == 'queued')
+                .order_by(JobImportItem.position)
+            ).all()
+            db.session.commit()
+
+            try:
+                # Loaded once for the whole import rather than per posting.
+                analysis_profile = JobService(self.logger).load_analysis_profile(user_id)
+                self._run_stages(user_id, [ImportWorkItem(row.id, row.url, row.canonical_url) for row in pending], analysis_profile)
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Job import {import_id} failed: {e}", exc_info=True)
+                job_import = db.session.get(JobImport, import_id)
+                job_import.status, job_import.error, job_import.finished_at = 'failed', str(e)[:2000], get_utc_now()
+                db.session.commit()
+                raise
+
+            counts = dict(db.session.execute(
+                db.select(JobImportItem.status, db.func.count())
+                .where(JobImportItem.import_id == import_id).group_by(JobImportItem.status)
+            ).all())
+            job_import = db.session.get(JobImport, import_id)
+            job_import.status, job_import.finished_at = 'completed', get_utc_now()
+            publish_user_event([user_id], JOB_IMPORT_COMPLETED, {"import_id": import_id, "counts": counts})
+            db.session.commit()
+            self.logger.info(f"Job import {import_id} completed: {counts}")
+            return counts
+
+    def _run_stages(self, user_id: int, items: list, analysis_profile):
+        deferred = [] # Items whose URL another submission is ingesting
+
+        def fail(item, error):
+            self._set_item(item.item_id, 'failed', error=str(error)[:2000])
+            if item.claimed:
+                JobService(self.logger).finish_url_submission(item.canonical_url, 'failed', error=str(error)[:2000])
+
+        def advance(item, status):
+            self._set_item(item.item_id, status)
+            JobService(self.logger).renew_url_submission(item.canonical_url)
+
+        def resolve(item):
+            # Already-ingested postings skip the pipeline entirely.
+            job_service = JobService(self.logger)
+            submission = job_service.track_known_url(item.url, item.canonical_url, user_id, True)
+            if submission:
+                self._set_item(item.item_id, 'succeeded', tracked_job_id=submission.tracked_job_id)
+                return None
+            claim = job_service.claim_url_submission(item.canonical_url, user_id, item.waiting_since)
+            if claim == 'failed':
+                return fail(item, "A concurrent submission of this URL failed.")
+            if claim == 'busy':
+                item.waiting_since = item.waiting_since or get_utc_now()
+                deferred.append(item) # Safe without a lock: resolve has a single worker
+                return None
+            item.claimed = True
+            return item
+
+        def fetch(item):
+            advance(item, 'fetching')
+            item.raw_html = JobService(self.logger).fetch_page(item.url)
+            if not item.raw_html: return fail(item, "Could not fetch the page.")
+            return item
+
+        def extract(item):
+            advance(item, 'extracting')
+            item.job_description = extract_text_from_html(item.raw_html)
+            if not item.job_description: return fail(item, "No job description text found on the page.")
+            return item
+
+        def spend_quota(item):
+            while True:
+                try:
+                    retry_after = consume_quota(user_id, 'job-submit')
+                except Exception as e:
+                    # Fail open, as the routes do.
+                    db.session.rollback()
+                    self.logger.error(f"Rate limit check for job-submit failed: {e}", exc_info=True)
+                    return
+                if not retry_after: return
+                time.sleep(min(retry_after, config.JOB_SUBMISSION_LEASE_SECONDS / 2))
+                JobService(self.logger).renew_url_submission(item.canonical_url)
+
+        def analyze(item):
+            spend_quota(item)
+            advance(item, 'analyzing')
+            with ai_work_for(user_id):
+                item.prepared = JobService(self.logger).prepare_posting(
+                    item.url, user_id, item.raw_html, item.job_description, lambda: analysis_profile
+                )
+            item.raw_html = item.job_description = None # The prepared posting holds its own references
+            if not item.prepared: return fail(item, "Could not extract the company and job title.")
+            return item
+
+        def store(item):
+            advance(item, 'storing')
+            job_service = JobService(self.logger)
+            submission = job_service.store_posting(item.url, user_id, item.prepared)
+            job_service.finish_url_submission(item.canonical_url, 'succeeded', submission.job_opportunity_id)
+            self._set_item(item.item_id, 'succeeded', tracked_job_id=submission.tracked_job_id)
+            return None
+
+        stages = [
+            ('resolve', resolve, 1),
+            ('fetch', fetch, config.JOB_IMPORT_FETCH_WORKERS),
+            ('extract', extract, config.JOB_IMPORT_EXTRACT_WORKERS),
+            ('analyze', analyze, config.JOB_IMPORT_ANALYZE_WORKERS),
+            ('store', store, 1),
+        ]
+        while items:
+            run_pipeline(stages, items, config.JOB_IMPORT_QUEUE_SIZE, fail)
+            items = deferred[:]
+            deferred.clear()
+            if items:
+                # Leases lapse, so a leader that died can't hold these back for long.
+                time.sleep(config.JOB_SUBMISSION_POLL_SECONDS)
+
+    def resume_unfinished_imports(self):
+        """Re-queues imports left pending or running, e.g. by a worker that died. Returns how many were queued."""
+        import_ids = db.session.scalars(
+            db.select(JobImport.id).where(JobImport.status.in_(('pending', 'running'))).order_by(JobImport.id)
+        ).all()
+        db.session.commit()
+        for import_id in import_ids:
+            submit_background_task(_run_import, import_id)
+        return len(import_ids)
@@ -1,18 +1,37 @@
 # Path: apps/backend/services/job_matching_service.py
 import re
+from dataclasses import dataclass
 from flask import current_app
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from ..app import db
-from ..models import JobAnalysis, UserProfile, Job, Company # Import necessary models
+from ..models import JobAnalysis, UserProfile, Job, Company, JobOpportunity # Import necessary models
+
+@dataclass(slots=True)
+class RankedJob:
+    """One recommendation list entry. orjson serializes it directly, both for responses and the JSONB cache."""
+    id: int
+    job_id: int
+    job_title: str
+    company_id: int
+    company_name: str
+    match_score: int
+    matrix_rating: str
+    job_modality: str
+    deduced_job_level: str
+    reasons: list
+    summary: str
+    job_url: str
 
 class JobMatchingService:
     def __init__(self, logger=None):
         self.logger = logger or current_app.logger
 
-    def calculate_match_score(self, job_analysis: JobAnalysis, user_profile: UserProfile):
+    def calculate_match_score(self, job_analysis, user_profile):
         """
         Calculates a comprehensive match score for a job based on AI analysis
-        and structured user preferences.
+        and structured user preferences. `job_analysis` is a row from _analyzed_jobs_select
+        (analysis scores plus flattened job and company columns); `user_profile` is any object
+        with the UserProfile preference attributes.
         """
         if not job_analysis or not user_profile:
             return 0, "Missing analysis or profile data."
@@ -30,96 +49,117 @@ class JobMatchingService:
         reasons.append(f"Base AI Relevance (Position: {position_relevance}, Environment: {environment_fit})")
 
         # --- Apply bonuses/penalties based on structured data ---
-        if job_analysis.job: # Ensure job object exists
-            # Work Modality Preference
-            if user_profile.preferred_work_style and job_analysis.job.job_modality:
-                if user_profile.preferred_work_style.value == job_analysis.job.job_modality.value:
-                    score += 10
-                    reasons.append(f"Bonus: Preferred work style ({user_profile.preferred_work_style.value}) matches job.")
-                else:
-                    score -= 5 # Minor penalty for mismatch
-                    reasons.append(f"Penalty: Work style mismatch ({user_profile.preferred_work_style.value} vs {job_analysis.job.job_modality.value}).")
-
-            # Salary Range Preference
-            if user_profile.desired_salary_min and user_profile.desired_salary_max and job_analysis.job.salary_min and job_analysis.job.salary_max:
-                if (job_analysis.job.salary_min >= user_profile.desired_salary_min and
-                    job_analysis.job.salary_max <= user_profile.desired_salary_max):
-                    score += 15
-                    reasons.append("Bonus: Job salary range perfectly within desired range.")
-                elif (job_analysis.job.salary_min <= user_profile.desired_salary_max and
-                      job_analysis.job.salary_max >= user_profile.desired_salary_min): # Overlap
-                    score += 5
-                    reasons.append("Small Bonus: Job salary range overlaps desired range.")
-                else:
-                    score -= 10
-                    reasons.append("Penalty: Job salary range outside desired range.")
-
-            # Company Size Preference
-            if user_profile.preferred_company_size and job_analysis.job.company and job_analysis.job.company.company_size_min:
-                user_pref = user_profile.preferred_company_size.value
-                company_size_min = job_analysis.job.company.company_size_min
-                company_size_max = job_analysis.job.company.company_size_max or company_size_min
-
-                if user_pref == 'STARTUP' and company_size_max and company_size_max <= 50:
-                    score += 10
-                    reasons.append("Bonus: Company is a Startup, matching preference.")
-                elif user_pref == 'SMALL_BUSINESS' and company_size_min and company_size_max and 1 <= company_size_max <= 50:
-                    score += 10
-                    reasons.append("Bonus: Company is Small Business, matching preference.")
-                elif user_pref == 'MEDIUM_BUSINESS' and company_size_min and company_size_max and 51 <= company_size_max <= 250:
-                    score += 10
-                    reasons.append("Bonus: Company is Medium Business, matching preference.")
-                elif user_pref == 'LARGE_ENTERPRISE' and company_size_min and company_size_min >= 251:
-                    score += 10
-                    reasons.append("Bonus: Company is Large Enterprise, matching preference.")
-                elif user_pref != 'NO_PREFERENCE':
-                    score -= 5
-                    reasons.append(f"Penalty: Company size mismatch.")
+        # Work Modality Preference
+        if user_profile.preferred_work_style and job_analysis.job_modality:
+            if user_profile.preferred_work_style.value == job_analysis.job_modality.value:
+                score += 10
+                reasons.append(f"Bonus: Preferred work style ({user_profile.preferred_work_style.value}) matches job.")
+            else:
+                score -= 5 # Minor penalty for mismatch
+                reasons.append(f"Penalty: Work style mismatch ({user_profile.preferred_work_style.value} vs {job_analysis.job_modality.value}).")
+
+        # Salary Range Preference
+        if user_profile.desired_salary_min and user_profile.desired_salary_max and job_analysis.salary_min and job_analysis.salary_max:
+            if (job_analysis.salary_min >= user_profile.desired_salary_min and
+                job_analysis.salary_max <= user_profile.desired_salary_max):
+                score += 15
+                reasons.append("Bonus: Job salary range perfectly within desired range.")
+            elif (job_analysis.salary_min <= user_profile.desired_salary_max and
+                  job_analysis.salary_max >= user_profile.desired_salary_min): # Overlap
+                score += 5
+                reasons.append("Small Bonus: Job salary range overlaps desired range.")
+            else:
+                score -= 10
+                reasons.append("Penalty: Job salary range outside desired range.")
+
+        # Company Size Preference
+        if user_profile.preferred_company_size and job_analysis.company_size_min:
+            user_pref = user_profile.preferred_company_size.value
+            company_size_min = job_analysis.company_size_min
+            company_size_max = job_analysis.company_size_max or company_size_min
+
+            if user_pref == 'STARTUP' and company_size_max and company_size_max <= 50:
+                score += 10
+                reasons.append("Bonus: Company is a Startup, matching preference.")
+            elif user_pref == 'SMALL_BUSINESS' and company_size_min and company_size_max and 1 <= company_size_max <= 50:
+                score += 10
+                reasons.append("Bonus: Company is Small Business, matching preference.")
+            elif user_pref == 'MEDIUM_BUSINESS' and company_size_min and company_size_max and 51 <= company_size_max <= 250:
+                score += 10
+                reasons.append("Bonus: Company is Medium Business, matching preference.")
+            elif user_pref == 'LARGE_ENTERPRISE' and company_size_min and company_size_min >= 251:
+                score += 10
+                reasons.append("Bonus: Company is Large Enterprise, matching preference.")
+            elif user_pref != 'NO_PREFERENCE':
+                score -= 5
+                reasons.append(f"Penalty: Company size mismatch.")
 
         final_score = max(0, min(100, int(score)))
         return final_score, reasons
 
+    def _analyzed_jobs_select(self, user_id: int):
+        """One flat row per analyzed job: the analysis scores plus the job, company and display-URL columns ranking needs."""
+        display_url = (
+            select(JobOpportunity.url)
+            .where(JobOpportunity.job_id == Job.id, JobOpportunity.is_active == True)
+            .order_by(JobOpportunity.id).limit(1)
+            .scalar_subquery()
+        )
+        return (
+            select(
+                JobAnalysis.job_id, JobAnalysis.position_relevance_score, JobAnalysis.environment_fit_score,
+                JobAnalysis.matrix_rating, JobAnalysis.summary,
+                Job.job_title, Job.company_id, Job.job_modality, Job.deduced_job_level, Job.salary_min, Job.salary_max,
+                Company.name.label('company_name'), Company.company_size_min, Company.company_size_max,
+                display_url.label('job_url')
+            )
+            .join(Job, Job.id == JobAnalysis.job_id)
+            .outerjoin(Company, Company.id == Job.company_id)
+            .where(JobAnalysis.user_id == user_id)
+        )
+
+    def rank_jobs_for_user(self, user_id: int):
+        """
+        Scores every analyzed job for the user and returns the full list of RankedJob, best match first.
+        Returns None if the user's profile is not complete enough to rank against.
+        Reads plain rows rather than ORM instances; nothing here needs the identity map.
+        """
+        user_profile = db.session.execute(
+            select(
+                UserProfile.has_completed_onboarding, UserProfile.preferred_work_style, UserProfile.preferred_company_size,
+                UserProfile.desired_salary_min, UserProfile.desired_salary_max
+            ).where(UserProfile.user_id == user_id)
+        ).first()
+        if not user_profile or not user_profile.has_completed_onboarding:
+            return None
+
+        recommended_jobs = []
+        for row in db.session.execute(self._analyzed_jobs_select(user_id)):
+            score, reasons = self.calculate_match_score(row, user_profile)
+            recommended_jobs.append(RankedJob(
+                id=row.job_id, # Use job_id as the key for the list
+                job_id=row.job_id,
+                job_title=row.job_title,
+                company_id=row.company_id,
+                company_name=row.company_name or "N/A",
+                match_score=score,
+                matrix_rating=row.matrix_rating,
+                job_modality=row.job_modality.value if row.job_modality else None,
+                deduced_job_level=row.deduced_job_level.value if row.deduced_job_level else None,
+                reasons=reasons,
+                summary=row.summary,
+                job_url=row.job_url
+            ))
+
+        recommended_jobs.sort(key=lambda x: x.match_score, reverse=True)
+        return recommended_jobs
+
     def get_job_recommendations(self, user_id: int, limit: int = 10):
         self.logger.info(f"Generating recommendations for user_id: {user_id}")
 
-        user_profile = UserProfile.query.filter_by(user_id=user_id).first()
-        if not user_profile or not user_profile.has_completed_onboarding:
+        recommended_jobs = self.rank_jobs_for_user(user_id)
+        if recommended_jobs is None:
             self.logger.warning(f"User {user_id} profile incomplete. Cannot generate recommendations.")
             return {"message": "Please complete your profile to receive recommendations.", "jobs": []}
 
-        analyses = db.session.query(JobAnalysis).options(
-            joinedload(JobAnalysis.job).joinedload(Job.company),
-            joinedload(JobAnalysis.job).joinedload(Job.opportunities)
-        ).filter(JobAnalysis.user_id == user_id).all()
-
-        recommended_jobs = []
-        for analysis in analyses:
-            if not analysis.job: continue
-
-            score, reasons = self.calculate_match_score(analysis, user_profile)
-            
-            display_url = None
-            if analysis.job.opportunities:
-                active_opportunities = [o for o in analysis.job.opportunities if o.is_active]
-                if active_opportunities:
-                    display_url = active_opportunities[0].url
-
-            recommended_jobs.append({
-                "id": analysis.job_id, # Use job_id as the key for the list
-                "job_id": analysis.job_id,
-                "job_title": analysis.job.job_title,
-                "company_id": analysis.job.company_id,
-                "company_name": analysis.job.company.name if analysis.job.company else "N/A",
-                "match_score": score,
-                # CORRECTED: Changed 'ai_grade' to 'matrix_rating' to match frontend type
-                "matrix_rating": analysis.matrix_rating,
-                "job_modality": analysis.job.job_modality.value if analysis.job.job_modality else None,
-                "deduced_job_level": analysis.job.deduced_job_level.value if analysis.job.deduced_job_level else None,
-                "reasons": reasons,
-                "summary": analysis.summary,
-                "job_url": display_url
-            })
-
-        recommended_jobs.sort(key=lambda x: x['match_score'], reverse=True)
-
-        return {"message": "Recommendations generated successfully.", "jobs": recommended_jobs[:limit]}
\ No newline at end of file
+        return {"message": "Recommendations generated successfully.", "jobs": recommended_jobs[:limit]}
@@ -4,17 +4,32 @@ from bs4 import BeautifulSoup
 import json
 import re
 from flask import current_app
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
-from datetime import datetime
-import pytz
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import literal_column
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import hashlib
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import pytz
 
 from ..app import db
-from ..models import Job, Company, JobAnalysis, User, JobOpportunity, TrackedJob
+from ..models import Job, JobAnalysis, User, JobOpportunity, TrackedJob, PendingReanalysis, JobUrlSubmission, get_utc_now
 from ..config import config
-from .profile_service import ProfileService
+from .profile_service import ProfileService, compute_fingerprint
 from .company_service import CompanyService
+from .recommendation_cache_service import RecommendationCacheService
+from .job_discovery_service import JobDiscoveryService
+from .job_triage_service import JobTriageService
+from .content_archive_service import ContentArchiveService
+from .tracked_job_service import TrackedJobService
+from ..background import submit_background_task
+from ..advisory_locks import try_advisory_lock, JOB_SUBMISSION
+from ..gemini_limits import gemini_limiter, ai_work_for
+from ..rate_limits import consume_quota
+from ..events import publish_user_event, ANALYSIS_UPDATED, REANALYSIS_COMPLETED
 
 MAX_RESUME_TEXT_LENGTH = 25000
 MAX_JOB_TEXT_LENGTH = 50000
@@ -22,11 +37,138 @@ MAX_JOB_TEXT_LENGTH = 50000
 GEMINI_FLASH_MODEL = "gemini-1.5-flash"
 GEMINI_PRO_MODEL = "gemini-1.5-pro"
 
+COMPANY_FACTS_SCHEMA = """- company_facts (object; only facts stated in the job posting itself, each null if not stated):
+          industry (string), description (string, what the company does), mission (string),
+          business_model (string), company_size_min (integer, employees), company_size_max (integer, employees),
+          headquarters (string, city, state, country), founded_year (integer), website_url (string)
+"""
+
+# JobAnalysis columns filled from an analysis response.
+ANALYSIS_RESULT_FIELDS = (
+    'position_relevance_score', 'environment_fit_score', 'hiring_manager_view', 'matrix_rating',
+    'summary', 'qualification_gaps', 'recommended_testimonials'
+)
+
+# Query parameters that only track where a click came from; they never change which posting a URL points at.
+TRACKING_QUERY_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi'}
+
+def canonicalize_job_url(url: str):
+    """
+    The key concurrent submissions of a URL are deduplicated under: lowercase scheme and host, no
+    tracking parameters and a sorted query. It is never fetched or stored as the opportunity's URL.
+    The path and fragment are kept as submitted, since hash-routed job boards put the posting id there.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith('utm_') and name.lower() not in TRACKING_QUERY_PARAMS
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), parts.fragment))
+
+def _submission_lock_key(canonical_url: str):
+    return zlib.crc32(canonical_url.encode('utf-8')) & 0x7fffffff
+
+@dataclass(slots=True)
+class JobSubmission:
+    job_id: int
+    job_opportunity_id: int
+    tracked_job_id: int = None
+    company_id: int = None
+    company_created: bool = False
+    job_created: bool = False
+
+@dataclass(slots=True)
+class PreparedPosting:
+    """A fetched and analyzed posting, ready to be written by JobService.store_posting."""
+    raw_html: str
+    job_description: str
+    job_desc_hash: str
+    company_name: str
+    job_title: str
+    alias_names: list
+    website_url: str = None
+    company_facts: dict = None
+    user_analysis: dict = None
+    fingerprint: str = None
+
+# Companies with an enrichment queued or running in this process; other processes are covered by the advisory lock.
+_pending_enrichments = set()
+_pending_enrichments_lock = threading.Lock()
+
+def _run_company_enrichment(company_id: int):
+    try:
+        JobService().enrich_company_and_refresh_analyses(company_id)
+    finally:
+        with _pending_enrichments_lock:
+            _pending_enrichments.discard(company_id)
+
+def _run_due_reanalyses(user_id: int = None):
+    JobService().run_due_reanalyses(user_id)
+
+def merge_duplicate_job(duplicate_id: int, keeper_id: int):
+    """
+    Folds a canonical job into another with the same (company, description hash), as the d47b2e8c6f31
+    migration did: its opportunities move to the keeper, a user with analyses of both keeps the keeper's,
+    and the duplicate is deleted. Does not commit.
+    """
+    db.session.execute(
+        db.update(JobOpportunity).where(JobOpportunity.job_id == duplicate_id)
+        .values(job_id=keeper_id, updated_at=datetime.now(pytz.utc))
+    )
+    keeper_analysis_users = db.select(JobAnalysis.user_id).where(JobAnalysis.job_id == keeper_id)
+    db.session.execute(db.delete(JobAnalysis).where(JobAnalysis.job_id == duplicate_id, JobAnalysis.user_id.in_(keeper_analysis_users)))
+    db.session.execute(db.update(JobAnalysis).where(JobAnalysis.job_id == duplicate_id).values(job_id=keeper_id))
+    db.session.execute(db.delete(Job).where(Job.id == duplicate_id))
+
+def analysis_fingerprint(profile_fingerprint: str, company_data: dict):
+    """Fingerprint of every input to one analysis besides the job text: the user's side plus the company context."""
+    company_context = {k: v for k, v in (company_data or {}).items() if k not in ('created_at', 'updated_at')}
+    return compute_fingerprint({"profile": profile_fingerprint, "company": company_context})
+
+def extract_text_from_html(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script_or_style in soup(['script', 'style']):
+        script_or_style.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def _iter_json_ld_nodes(data):
+    if isinstance(data, list):
+        for item in data: yield from _iter_json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        yield from _iter_json_ld_nodes(data.get('@graph', []))
+
+def extract_hiring_organization(html_content):
+    """Returns {'name', 'url'} from a schema.org JobPosting's hiringOrganization in the page's JSON-LD, or None."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for node in _iter_json_ld_nodes(data):
+            org = node.get('hiringOrganization') if node.get('@type') == 'JobPosting' else None
+            if isinstance(org, str):
+                return {'name': org, 'url': None}
+            if isinstance(org, dict) and org.get('name'):
+                same_as = org.get('sameAs')
+                url = same_as[0] if isinstance(same_as, list) and same_as else same_as
+                return {'name': org['name'], 'url': url or org.get('url')}
+    return None
+
 class JobService:
     def __init__(self, logger=None):
         self.logger = logger or current_app.logger
         self.profile_service = ProfileService(self.logger)
         self.company_service = CompanyService(self.logger)
+        self.recommendation_cache = RecommendationCacheService(self.logger)
+        self.job_discovery = JobDiscoveryService(self.logger)
+        self.job_triage = JobTriageService(self.logger)
+        self.content_archive = ContentArchiveService(self.logger)
+        self.tracked_jobs = TrackedJobService(self.logger)
 
     def _call_gemini_api(self, prompt, model_name=GEMINI_PRO_MODEL):
         api_key = config.GEMINI_API_KEY
@@ -38,7 +180,8 @@ class JobService:
         payload = { "contents": [{"parts": [{"text": prompt}]}] }
         try:
             self.logger.info(f"Calling Gemini with model {model_name} on endpoint {url}")
-            response = requests.post(url, headers=headers, json=payload, timeout=90)
+            with gemini_limiter:
+                response = requests.post(url, headers=headers, json=payload, timeout=90)
             response.raise_for_status()
             data = response.json()
             candidates = data.get('candidates', [])
@@ -66,23 +209,23 @@ class JobService:
             return None
 
     def _extract_text_from_html(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        for script_or_style in soup(['script', 'style']):
-            script_or_style.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        return '\n'.join(chunk for chunk in chunks if chunk)
+        # Module-level so the archive re-extraction can run it in worker processes.
+        return extract_text_from_html(html_content)
 
-    def _get_full_job_description(self, url):
+    def fetch_page(self, url: str):
+        """The posting page's HTML, or None if it couldn't be fetched."""
         try:
             response = requests.get(url, timeout=10)
             response.raise_for_status()
-            return self._extract_text_from_html(response.text)
+            return response.text
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error scraping full job description from {url}: {e}")
             return None
 
+    def _get_full_job_description(self, url):
+        raw_html = self.fetch_page(url)
+        return self._extract_text_from_html(raw_html) if raw_html else None
+
     def _parse_ai_response(self, ai_response_text):
         if not ai_response_text: return None
         try:
@@ -95,7 +238,11 @@ class JobService:
             self.logger.error(f"Failed to parse AI response: {e}. Raw: {ai_response_text[:500]}")
             return None
 
-    def analyze_job_posting(self, job_text, user_profile_data, company_profile_data=None):
+    def analyze_job_posting(self, job_text, user_profile_data, company_profile_data=None, include_company_facts=False):
+        """
+        With `include_company_facts`, the output also carries a `company_facts` object with whatever
+        the posting itself states about the employer (its "About us" block), used to seed new companies.
+        """
         if not job_text: return None
         if len(job_text) > MAX_JOB_TEXT_LENGTH: job_text = job_text[:MAX_JOB_TEXT_LENGTH]
         profile_str = json.dumps(user_profile_data, indent=2) if user_profile_data else "{}"
@@ -128,115 +275,468 @@ class JobService:
         - qualification_gaps (array of strings)
         - recommended_testimonials (array of strings)
         - hiring_manager_view (string)
-        
+        {COMPANY_FACTS_SCHEMA if include_company_facts else ""}
         Strictly conform to the JSON structure. Your response MUST be valid JSON wrapped in ```json ... ```.
         """
         ai_response = self._call_gemini_api(prompt, model_name=GEMINI_PRO_MODEL)
         return self._parse_ai_response(ai_response)
 
-    def create_or_get_canonical_job(self, url: str, user_id: int, commit: bool = True):
-        existing_opportunity = JobOpportunity.query.options(joinedload(JobOpportunity.job)).filter_by(url=url).first()
-        if existing_opportunity and existing_opportunity.job:
-            return existing_opportunity.job, existing_opportunity
+    def _upsert_canonical_job(self, company_id: int, company_name: str, job_title: str, job_desc_hash: str, job_description: str):
+        """Inserts the canonical job for (company, description hash) unless one exists. Returns (job_id, created). Does not commit."""
+        stmt = pg_insert(Job).values(
+            company_id=company_id, company_name=company_name, job_title=job_title,
+            status='Active', job_description_hash=job_desc_hash, notes=job_description
+        )
+        row = db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Job.company_id, Job.job_description_hash],
+                set_={'job_description_hash': stmt.excluded.job_description_hash} # No-op update so RETURNING yields the existing row
+            ).returning(Job.id, literal_column('xmax = 0').label('created'))
+        ).one()
+        return row.id, row.created
+
+    def _upsert_opportunity(self, url: str, job_id: int, raw_html_sha256: str):
+        """Points `url` at `job_id`, inserting the opportunity if needed. Returns its id. Does not commit."""
+        stmt = pg_insert(JobOpportunity).values(job_id=job_id, url=url, raw_html_sha256=raw_html_sha256)
+        return db.session.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[JobOpportunity.url],
+                set_={'job_id': stmt.excluded.job_id, 'raw_html_sha256': stmt.excluded.raw_html_sha256, 'updated_at': datetime.now(pytz.utc)}
+            ).returning(JobOpportunity.id)
+        )
 
-        job_description = self._get_full_job_description(url)
+    def track_known_url(self, url: str, canonical_url: str, user_id: int, track: bool):
+        """
+        Returns a JobSubmission for an already-ingested URL (tracking it with `track`), or None. A URL that
+        differs from an ingested one only in tracking parameters or query order matches through its
+        job_url_submissions record. Commits.
+        """
+        ingested_via = (
+            db.select(JobUrlSubmission.job_opportunity_id)
+            .where(JobUrlSubmission.url == canonical_url, JobUrlSubmission.status == 'succeeded').scalar_subquery()
+        )
+        existing = db.session.execute(
+            db.select(JobOpportunity.id, JobOpportunity.job_id)
+            .where(db.or_(JobOpportunity.url == url, JobOpportunity.id == ingested_via)).limit(1)
+        ).first()
+        tracked_job_id = self.tracked_jobs.track_job(user_id, existing.id, commit=False) if existing and track else None
+        db.session.commit() # Don't sit idle in a transaction through lease waits, fetches and Gemini calls.
+        return JobSubmission(existing.job_id, existing.id, tracked_job_id) if existing else None
+
+    def submit_job_url(self, url: str, user_id: int, track: bool = True):
+        """
+        Ingests a job posting URL and (with `track`) adds it to the user's tracked jobs.
+        Submissions are single-flight per canonical URL across all workers and bulk imports: the first
+        one claims the URL's job_url_submissions lease, and concurrent submissions of the same URL wait
+        for it and reuse its opportunity instead of scraping and analyzing the page again. If the leader
+        fails, its followers fail with it rather than retrying. The page is fetched and stored under the
+        URL as submitted. Returns a JobSubmission, or None if the page couldn't be fetched or understood.
+        Raises TimeoutError if another submission of the URL is still running after JOB_SUBMISSION_WAIT_SECONDS.
+        """
+        url = url.strip()
+        canonical_url = canonicalize_job_url(url)
+        submission = self.track_known_url(url, canonical_url, user_id, track)
+        if submission: return submission
+
+        waiting_since = get_utc_now()
+        deadline = time.monotonic() + config.JOB_SUBMISSION_WAIT_SECONDS
+        while True:
+            claim = self.claim_url_submission(canonical_url, user_id, waiting_since)
+            if claim == 'claimed':
+                return self._lead_submission(url, canonical_url, user_id, track)
+            if claim == 'failed':
+                self.logger.info(f"Concurrent submission of {canonical_url} failed; not retrying it.")
+                return None
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Another submission of {canonical_url} is still in progress.")
+            time.sleep(config.JOB_SUBMISSION_POLL_SECONDS)
+            submission = self.track_known_url(url, canonical_url, user_id, track)
+            if submission: return submission
+
+    def claim_url_submission(self, canonical_url: str, user_id: int, waiting_since=None):
+        """
+        Tries to become the leader ingesting `canonical_url`. Returns 'claimed' (the caller must ingest
+        it and then call finish_url_submission), 'busy' (another leader holds a live lease) or 'failed'
+        (a leader failed on it after `waiting_since`). Claims are serialized per URL by the JOB_SUBMISSION
+        advisory lock; a lease whose holder died without finishing lapses after JOB_SUBMISSION_LEASE_SECONDS.
+        Commits.
+        """
+        with try_advisory_lock(JOB_SUBMISSION, _submission_lock_key(canonical_url)) as acquired:
+            if not acquired: return 'busy'
+            if waiting_since is not None:
+                failed = db.session.scalar(
+                    db.select(JobUrlSubmission.url).where(
+                        JobUrlSubmission.url == canonical_url, JobUrlSubmission.status == 'failed',
+                        JobUrlSubmission.finished_at >= waiting_since
+                    )
+                )
+                if failed is not None:
+                    db.session.commit()
+                    return 'failed'
+            now = get_utc_now()
+            lease_expires_at = now + timedelta(seconds=config.JOB_SUBMISSION_LEASE_SECONDS)
+            stmt = pg_insert(JobUrlSubmission).values(
+                url=canonical_url, status='running', leader_user_id=user_id, started_at=now, lease_expires_at=lease_expires_at
+            )
+            claimed = db.session.scalar(
+                stmt.on_conflict_do_update(
+                    index_elements=[JobUrlSubmission.url],
+                    set_={'status': 'running', 'leader_user_id': user_id, 'started_at': now, 'lease_expires_at': lease_expires_at,
+                          'finished_at': None, 'job_opportunity_id': None, 'error': None},
+                    where=db.or_(
+                        JobUrlSubmission.status == 'failed',
+                        JobUrlSubmission.lease_expires_at == None,
+                        JobUrlSubmission.lease_expires_at < now,
+                        db.and_(JobUrlSubmission.status == 'succeeded', JobUrlSubmission.job_opportunity_id == None)
+                    )
+                ).returning(JobUrlSubmission.url)
+            )
+            db.session.commit()
+            return 'claimed' if claimed else 'busy'
+
+    def renew_url_submission(self, canonical_url: str):
+        """Extends a held lease, for leaders (like bulk imports) whose work outlasts one lease. Commits."""
+        db.session.execute(
+            db.update(JobUrlSubmission).where(JobUrlSubmission.url == canonical_url, JobUrlSubmission.status == 'running')
+            .values(lease_expires_at=get_utc_now() + timedelta(seconds=config.JOB_SUBMISSION_LEASE_SECONDS))
+        )
+        db.session.commit()
+
+    def finish_url_submission(self, canonical_url: str, status: str, job_opportunity_id: int = None, error: str = None):
+        """Records a claimed submission's outcome ('succeeded' or 'failed') for waiting followers. Commits."""
+        db.session.execute(
+            db.update(JobUrlSubmission).where(JobUrlSubmission.url == canonical_url)
+            .values(status=status, job_opportunity_id=job_opportunity_id, error=error, finished_at=get_utc_now())
+        )
+        db.session.commit()
+
+    def _lead_submission(self, url: str, canonical_url: str, user_id: int, track: bool):
+        """Ingests the URL under a claimed lease, recording the outcome for waiting followers."""
+        try:
+            submission = self._ingest_job_url(url, user_id, track)
+        except Exception as e:
+            db.session.rollback()
+            self.finish_url_submission(canonical_url, 'failed', error=str(e)[:2000])
+            raise
+        if submission:
+            self.finish_url_submission(canonical_url, 'succeeded', submission.job_opportunity_id)
+        else:
+            self.finish_url_submission(canonical_url, 'failed', error="Could not extract job details from the page.")
+        return submission
+
+    def _ingest_job_url(self, url: str, user_id: int, track: bool):
+        """
+        Fetches, analyzes and stores a URL that has no opportunity yet.
+        All network and Gemini work happens first, outside any transaction; every write (archive blobs,
+        company, canonical job, search document, opportunity, analysis, tracked job) then goes out as
+        INSERT ... ON CONFLICT upserts in a single transaction, so a failure leaves nothing half-created.
+        """
+        raw_html, job_description = self.fetch_posting(url)
+        if not job_description: return None
+        prepared = self.prepare_posting(url, user_id, raw_html, job_description, lambda: self.load_analysis_profile(user_id))
+        if not prepared: return None
+        return self.store_posting(url, user_id, prepared, track)
+
+    def fetch_posting(self, url: str):
+        """Fetches a posting page and extracts its text. Returns (raw_html, job_description), either possibly None."""
+        raw_html = self.fetch_page(url)
+        job_description = self._extract_text_from_html(raw_html) if raw_html else None
         if not job_description:
             self.logger.error(f"Failed to get any job description text from URL: {url}")
-            return None, None
+        return raw_html, job_description
 
-        initial_analysis = self.analyze_job_posting(job_description, {}, {})
+    def load_analysis_profile(self, user_id: int):
+        """The user's (profile data, profile fingerprint) for analyses, or None if their profile is incomplete. Commits."""
+        if not self.profile_service.has_completed_required_profile_fields(user_id):
+            db.session.commit()
+            return None
+        user_profile_data = self.profile_service.get_profile_for_analysis(user_id)
+        profile_fingerprint = self.profile_service.get_analysis_fingerprint(user_id, user_profile_data)
+        db.session.commit()
+        return user_profile_data, profile_fingerprint
+
+    def prepare_posting(self, url: str, user_id: int, raw_html: str, job_description: str, load_profile):
+        """
+        Runs the Gemini analyses for a fetched posting without writing anything. `load_profile()` returns
+        load_analysis_profile's result and is only called when a user-specific analysis is needed.
+        Returns a PreparedPosting, or None if the posting couldn't be understood.
+        """
+        initial_analysis = self.analyze_job_posting(job_description, {}, {}, include_company_facts=True)
         if not initial_analysis or not initial_analysis.get('company_name') or not initial_analysis.get('job_title'):
             self.logger.error(f"Initial AI analysis failed to extract company/title from URL: {url}")
-            return None, None
-            
+            return None
+
         company_name = initial_analysis.get('company_name')
         job_title = initial_analysis.get('job_title')
+        job_desc_hash = hashlib.sha256(job_description.encode('utf-8')).hexdigest() # Same key the archive stores it under
+        # Match on the normalized name, the page's JSON-LD hiring organization and its website domain,
+        # so "Acme, Inc." and "ACME" resolve to one company (and one research call).
+        hiring_org = extract_hiring_organization(raw_html) or {}
+        prepared = PreparedPosting(
+            raw_html, job_description, job_desc_hash, company_name, job_title,
+            [hiring_org.get('name')], hiring_org.get('url'), initial_analysis.get('company_facts')
+        )
 
-        company = Company.query.filter(db.func.lower(Company.name) == company_name.lower()).first()
-        if not company:
-            self.logger.info(f"Creating new company: {company_name}")
-            company = Company(name=company_name)
-            db.session.add(company)
-            if commit:
-                try:
-                    db.session.commit()
-                    self.logger.info(f"New company created (ID: {company.id}). Triggering profile enrichment.")
-                    self.company_service.research_and_update_company_profile(company.id)
-                except IntegrityError:
-                    db.session.rollback()
-                    company = Company.query.filter(db.func.lower(Company.name) == company_name.lower()).first()
-
-        job_desc_hash = hashlib.sha256(job_description.encode('utf-8')).hexdigest()
-        canonical_job = Job.query.filter_by(job_description_hash=job_desc_hash, company_id=company.id).first()
-
-        if not canonical_job:
-            self.logger.info(f"No canonical job found for hash. Creating new job for '{job_title}' at '{company_name}'.")
-            canonical_job = Job(
-                company_id=company.id,
-                company_name=company_name,
-                job_title=job_title,
-                status='Active',
-                job_description_hash=job_desc_hash,
-                notes=job_description
+        # A user-specific analysis is only needed when this posting is new.
+        known_company = self.company_service.resolve_company(company_name, prepared.alias_names, prepared.website_url)
+        known_job_id = db.session.scalar(
+            db.select(Job.id).where(Job.company_id == known_company.id, Job.job_description_hash == job_desc_hash)
+        ) if known_company else None
+        analysis_profile = load_profile() if not known_job_id else None
+        if analysis_profile:
+            user_profile_data, profile_fingerprint = analysis_profile
+            company_profile_data = self.company_service.get_company_profile(known_company.id) if known_company else {}
+            db.session.commit()
+            prepared.user_analysis = self.analyze_job_posting(job_description, user_profile_data, company_profile_data)
+            prepared.fingerprint = analysis_fingerprint(profile_fingerprint, company_profile_data)
+        db.session.commit()
+        return prepared
+
+    def store_posting(self, url: str, user_id: int, prepared: 'PreparedPosting', track: bool = True):
+        """Writes a prepared posting in one transaction of upserts and returns its JobSubmission."""
+        try:
+            company, company_created = self.company_service.get_or_create_company(
+                prepared.company_name, alias_names=prepared.alias_names, website_url=prepared.website_url
+            )
+            # Archive the fetched page and its extracted text so extractor changes can be replayed offline.
+            # Only once the company is resolved, so no rollback can separate the blobs from the opportunity that references them.
+            raw_html_sha256 = self.content_archive.store_html(prepared.raw_html)
+            self.content_archive.store_text(prepared.job_description)
+            # Facts from the posting fill empty columns for free; research then only chases what's still missing.
+            filled_fields = self.company_service.apply_company_facts(company, prepared.company_facts)
+            if filled_fields:
+                self.logger.info(f"Filled {filled_fields} for company {company.id} from the job posting.")
+
+            job_id, job_created = self._upsert_canonical_job(
+                company.id, prepared.company_name, prepared.job_title, prepared.job_desc_hash, prepared.job_description
             )
-            db.session.add(canonical_job)
-            if commit: db.session.commit()
-            
-            if self.profile_service.has_completed_required_profile_fields(user_id):
-                user_profile_data = self.profile_service.get_profile_for_analysis(user_id)
-                company_profile_data = company.to_dict() if company else {}
-                user_specific_ai_data = self.analyze_job_posting(job_description, user_profile_data, company_profile_data)
-                if user_specific_ai_data:
-                    self.create_or_update_job_analysis(user_id, canonical_job.id, user_specific_ai_data, commit=commit)
-
-        new_opportunity = JobOpportunity.query.filter_by(url=url).first()
-        if not new_opportunity:
-            new_opportunity = JobOpportunity(job_id=canonical_job.id, url=url)
-            db.session.add(new_opportunity)
-        elif new_opportunity.job_id != canonical_job.id:
-            new_opportunity.job_id = canonical_job.id
-        
-        if commit: db.session.commit()
-
-        return canonical_job, new_opportunity
-
-    def create_or_update_job_analysis(self, user_id, job_id, ai_analysis_data, commit=True):
-        if not ai_analysis_data: return None
-        analysis = JobAnalysis.query.filter_by(user_id=user_id, job_id=job_id).first()
-        if not analysis:
-            analysis = JobAnalysis(job_id=job_id, user_id=user_id)
-            db.session.add(analysis)
-
-        analysis.position_relevance_score = ai_analysis_data.get('position_relevance_score')
-        analysis.environment_fit_score = ai_analysis_data.get('environment_fit_score')
-        analysis.hiring_manager_view = ai_analysis_data.get('hiring_manager_view')
-        analysis.matrix_rating = ai_analysis_data.get('matrix_rating')
-        analysis.summary = ai_analysis_data.get('summary')
-        analysis.qualification_gaps = ai_analysis_data.get('qualification_gaps')
-        analysis.recommended_testimonials = ai_analysis_data.get('recommended_testimonials')
-        analysis.analysis_protocol_version = config.ANALYSIS_PROTOCOL_VERSION
-        
+            if job_created:
+                self.logger.info(f"Created canonical job {job_id} for '{prepared.job_title}' at '{prepared.company_name}'.")
+                self.job_discovery.index_document(job_id, prepared.job_title, prepared.company_name, prepared.job_description, commit=False)
+            opportunity_id = self._upsert_opportunity(url, job_id, raw_html_sha256)
+            if prepared.user_analysis:
+                self.create_or_update_job_analysis(user_id, job_id, prepared.user_analysis, commit=False, fingerprint=prepared.fingerprint)
+            tracked_job_id = self.tracked_jobs.track_job(user_id, opportunity_id, commit=False) if track else None
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if company_created:
+            self.logger.info(f"Created company {company.id} ({prepared.company_name}).")
+            if self.company_service.needs_research(company):
+                self.enqueue_company_enrichment(company.id)
+        return JobSubmission(job_id, opportunity_id, tracked_job_id, company.id, company_created, job_created)
+
+    def purge_finished_url_submissions(self):
+        """Deletes in-flight records finished more than JOB_SUBMISSION_RECORD_TTL_HOURS ago."""
+        cutoff = get_utc_now() - timedelta(hours=config.JOB_SUBMISSION_RECORD_TTL_HOURS)
+        purged = db.session.execute(db.delete(JobUrlSubmission).where(JobUrlSubmission.finished_at < cutoff)).rowcount
+        db.session.commit()
+        return purged
+
+    def create_or_get_canonical_job(self, url: str, user_id: int):
+        """submit_job_url without tracking, returning the (Job, JobOpportunity) instances or (None, None)."""
+        submission = self.submit_job_url(url, user_id, track=False)
+        if not submission: return None, None
+        return db.session.get(Job, submission.job_id), db.session.get(JobOpportunity, submission.job_opportunity_id)
+
+    def enqueue_company_enrichment(self, company_id: int):
+        """Starts background enrichment for a company unless one is already queued in this process."""
+        with _pending_enrichments_lock:
+            if company_id in _pending_enrichments: return False
+            _pending_enrichments.add(company_id)
+        submit_background_task(_run_company_enrichment, company_id)
+        return True
+
+    def enrich_company_and_refresh_analyses(self, company_id: int):
+        """
+        Enriches the company (single-flight), then re-runs analyses of its jobs that were written before
+        the enriched profile existed, so they pick up the company context. Returns the number refreshed.
+        """
+        company = self.company_service.enrich_company_single_flight(company_id)
+        if not company or not config.COMPANY_ENRICHMENT_REFRESH_ANALYSES:
+            return 0
+
+        stale_analyses = db.session.execute(
+            db.select(JobAnalysis.user_id, JobAnalysis.job_id)
+            .join(Job, Job.id == JobAnalysis.job_id)
+            .where(Job.company_id == company_id, JobAnalysis.updated_at < company.updated_at)
+            .order_by(JobAnalysis.updated_at.desc())
+            .limit(config.COMPANY_ENRICHMENT_MAX_REFRESHES)
+        ).all()
+        company_data = self.company_service.get_company_profile(company_id) or {}
+
+        refreshed = 0
+        for user_id, job_id in stale_analyses:
+            job = self.get_job_for_analysis(job_id)
+            if not job or not job.notes or not self.profile_service.has_completed_required_profile_fields(user_id):
+                continue
+            user_profile_data = self.profile_service.get_profile_for_analysis(user_id)
+            ai_analysis_data = self.analyze_job_posting(job.notes, user_profile_data, company_data)
+            if ai_analysis_data:
+                fingerprint = analysis_fingerprint(self.profile_service.get_analysis_fingerprint(user_id, user_profile_data), company_data)
+                self.create_or_update_job_analysis(user_id, job_id, ai_analysis_data, fingerprint=fingerprint)
+                refreshed += 1
+        self.logger.info(f"Refreshed {refreshed} analyses for company {company_id} after enrichment.")
+        return refreshed
+
+    def create_or_update_job_analysis(self, user_id, job_id, ai_analysis_data, commit=True, fingerprint=None):
+        """Writes the user's analysis of a job with a single upsert. Returns True if one was written."""
+        if not ai_analysis_data: return False
+        values = {field: ai_analysis_data.get(field) for field in ANALYSIS_RESULT_FIELDS}
+        values.update(analysis_protocol_version=config.ANALYSIS_PROTOCOL_VERSION, analysis_fingerprint=fingerprint)
+        stmt = pg_insert(JobAnalysis).values(job_id=job_id, user_id=user_id, **values)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[JobAnalysis.job_id, JobAnalysis.user_id],
+            set_={**{field: stmt.excluded[field] for field in values}, 'updated_at': datetime.now(pytz.utc)}
+        ))
+        self.recommendation_cache.invalidate_for_user(user_id)
+        publish_user_event([user_id], ANALYSIS_UPDATED, {"job_id": job_id})
+
         if commit:
             try:
                 db.session.commit()
             except Exception as e:
                 db.session.rollback()
                 raise e
-        return analysis
+        return True
 
-    def trigger_reanalysis_for_user(self, user_id: int):
+    def plan_reanalysis_for_user(self, user_id: int, budget: int = None):
+        """
+        Triage step of a re-analysis: returns (user_profile_data, [(job_id, triage_score), ...] to analyze,
+        summary). Jobs whose analysis already matches the current protocol version and input fingerprint
+        are unchanged and never re-sent to Gemini. Of the rest, jobs below the triage threshold are skipped
+        and jobs beyond `budget` are deferred; both keep their existing analysis.
+        user_profile_data is None if the user has no profile. Tracked jobs are streamed through triage
+        with a server-side cursor, so memory stays flat however many jobs the user tracks.
+        """
+        summary = {"analyzed": 0, "unchanged": 0, "deferred": 0, "skipped": 0}
         user_profile_data = self.profile_service.get_profile_for_analysis(user_id)
         if not user_profile_data:
             self.logger.warning(f"Skipping re-analysis for user {user_id}: no profile data.")
-            return
-
-        jobs_to_reanalyze = db.session.query(Job).join(JobOpportunity).join(TrackedJob).filter(TrackedJob.user_id == user_id).distinct().all()
-        
-        self.logger.info(f"Found {len(jobs_to_reanalyze)} jobs to re-analyze for user {user_id}.")
-        for job in jobs_to_reanalyze:
-            company_data = job.company.to_dict() if job.company else {}
-            if job.notes:
-                self.logger.info(f"Re-analyzing job {job.id} for user {user_id}")
-                ai_analysis_data = self.analyze_job_posting(job.notes, user_profile_data, company_data)
-                if ai_analysis_data:
-                    self.create_or_update_job_analysis(user_id, job.id, ai_analysis_data)
\ No newline at end of file
+            return None, [], summary
+
+        existing_analyses = {
+            row.job_id: row for row in db.session.execute(
+                db.select(JobAnalysis.job_id, JobAnalysis.analysis_protocol_version, JobAnalysis.analysis_fingerprint)
+                .where(JobAnalysis.user_id == user_id)
+            )
+        }
+        profile_fingerprint = self.profile_service.get_analysis_fingerprint(user_id, user_profile_data)
+
+        def is_current(job):
+            existing = existing_analyses.get(job.id)
+            if not existing or existing.analysis_protocol_version != config.ANALYSIS_PROTOCOL_VERSION: return False
+            company_data = self.company_service.get_company_profile(job.company_id) or {}
+            return existing.analysis_fingerprint == analysis_fingerprint(profile_fingerprint, company_data)
+
+        # Only the columns triage and the fingerprint read; rows are scored and dropped batch by batch.
+        tracked_jobs = db.session.execute(
+            db.select(Job.id, Job.company_id, Job.job_title, Job.deduced_job_level, Job.salary_max, Job.job_modality, Job.notes)
+            .where(Job.notes != None, Job.id.in_(
+                db.select(JobOpportunity.job_id).join(TrackedJob, TrackedJob.job_opportunity_id == JobOpportunity.id).where(TrackedJob.user_id == user_id)
+            ))
+            .order_by(Job.id)
+            .execution_options(yield_per=config.TRIAGE_STREAM_BATCH_SIZE)
+        )
+        tracked_count = 0
+        def changed_jobs():
+            nonlocal tracked_count
+            for job in tracked_jobs:
+                tracked_count += 1
+                if not is_current(job): yield job
+
+        to_analyze, deferred, skipped = self.job_triage.plan_analysis_queue(changed_jobs(), user_profile_data, budget, set(existing_analyses))
+        changed = len(to_analyze) + len(deferred) + len(skipped)
+        summary["unchanged"] = tracked_count - changed
+        summary["deferred"] = len(deferred)
+        summary["skipped"] = len(skipped)
+        self.logger.info(f"Found {changed} of {tracked_count} tracked jobs with changed inputs for user {user_id}: {len(to_analyze)} queued, {len(deferred)} deferred, {len(skipped)} skipped by triage.")
+        return user_profile_data, to_analyze, summary
+
+    def get_job_for_analysis(self, job_id: int):
+        """The id, company and description of a job as a plain row: no ORM instance, nothing left in the session."""
+        return db.session.execute(db.select(Job.id, Job.company_id, Job.notes).where(Job.id == job_id)).first()
+
+    def reanalyze_job_for_user(self, user_id: int, job_id: int, user_profile_data: dict):
+        """Runs and stores a fresh analysis of one job for the user. Returns True if an analysis was written."""
+        job = self.get_job_for_analysis(job_id)
+        if not job or not job.notes: return False
+        company_data = self.company_service.get_company_profile(job.company_id) or {}
+        ai_analysis_data = self.analyze_job_posting(job.notes, user_profile_data, company_data)
+        if not ai_analysis_data: return False
+        fingerprint = analysis_fingerprint(self.profile_service.get_analysis_fingerprint(user_id, user_profile_data), company_data)
+        self.create_or_update_job_analysis(user_id, job.id, ai_analysis_data, fingerprint=fingerprint)
+        return True
+
+    def finish_reanalysis_for_user(self, user_id: int, summary: dict):
+        """Tells the user's open clients the re-analysis is done and re-warms their recommendations."""
+        publish_user_event([user_id], REANALYSIS_COMPLETED, summary)
+        db.session.commit()
+        submit_background_task(self.recommendation_cache.warm_for_user, user_id)
+
+    def request_reanalysis_for_user(self, user_id: int, delay: int = None):
+        """
+        Debounced re-analysis: records (or pushes back) a pending request due `delay` (by default
+        REANALYSIS_DEBOUNCE_SECONDS) from now and arms a timer for it, so a burst of profile edits produces
+        one run after the last edit. Commits. The scheduler's run-due-reanalyses task picks up requests
+        whose timer died with its worker.
+        """
+        delay = delay or config.REANALYSIS_DEBOUNCE_SECONDS
+        now = datetime.now(pytz.utc)
+        stmt = pg_insert(PendingReanalysis).values(user_id=user_id, requested_at=now, due_at=now + timedelta(seconds=delay))
+        db.session.execute(stmt.on_conflict_do_update(index_elements=[PendingReanalysis.user_id], set_={"due_at": stmt.excluded.due_at}))
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        def fire():
+            with app.app_context():
+                submit_background_task(_run_due_reanalyses, user_id)
+        timer = threading.Timer(delay + 1, fire)
+        timer.daemon = True
+        timer.start()
+
+    def run_due_reanalyses(self, user_id: int = None):
+        """
+        Claims due re-analysis requests (all of them, or only `user_id`'s) and runs them. A request pushed
+        back by a later edit isn't due yet and is left for that edit's timer. A user over their reanalysis
+        quota has the request pushed back until the quota refills. Returns the number claimed.
+        """
+        claimed = db.session.scalars(
+            db.delete(PendingReanalysis)
+            .where(PendingReanalysis.due_at <= datetime.now(pytz.utc), *([PendingReanalysis.user_id == user_id] if user_id else []))
+            .returning(PendingReanalysis.user_id)
+        ).all()
+        db.session.commit()
+        for claimed_user_id in claimed:
+            try:
+                retry_after = consume_quota(claimed_user_id, 'reanalysis')
+                if retry_after:
+                    self.logger.info(f"User {claimed_user_id} is over the reanalysis quota; deferring {retry_after}s.")
+                    self.request_reanalysis_for_user(claimed_user_id, delay=retry_after)
+                    continue
+                self.trigger_reanalysis_for_user(claimed_user_id)
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Debounced re-analysis failed for user {claimed_user_id}: {e}", exc_info=True)
+        return len(claimed)
+
+    def trigger_reanalysis_for_user(self, user_id: int, budget: int = None):
+        """
+        Re-analyzes the user's tracked jobs whose inputs changed, most promising first according to local
+        triage, synchronously. Returns a summary of counts. Profile edits go through
+        request_reanalysis_for_user, and admin backfills use the reanalyze_user_jobs operation.
+        """
+        user_profile_data, to_analyze, summary = self.plan_reanalysis_for_user(user_id, budget)
+        if not user_profile_data:
+            return summary
+
+        with ai_work_for(user_id):
+            for job_id, triage_score in to_analyze:
+                self.logger.info(f"Re-analyzing job {job_id} for user {user_id} (triage score {triage_score})")
+                if self.reanalyze_job_for_user(user_id, job_id, user_profile_data):
+                    summary["analyzed"] += 1
+
+        self.finish_reanalysis_for_user(user_id, summary)
+        return summary
@@ -0,0 +1,105 @@
+# Path: apps/backend/services/job_triage_service.py
+import math
+from collections import Counter
+from flask import current_app
+
+from ..config import config
+from .job_discovery_service import JobDiscoveryService, tokenize, TITLE_WEIGHT
+
+# Ordered seniority ladder, matching JobLevelEnum.
+LEVEL_ORDER = ['ENTRY', 'ASSOCIATE', 'MID', 'SENIOR', 'LEAD', 'PRINCIPAL', 'DIRECTOR', 'VP', 'EXECUTIVE']
+TITLE_LEVEL_HINTS = {
+    'intern': 'ENTRY', 'junior': 'ENTRY', 'jr': 'ENTRY', 'entry': 'ENTRY', 'associate': 'ASSOCIATE',
+    'senior': 'SENIOR', 'sr': 'SENIOR', 'staff': 'LEAD', 'lead': 'LEAD', 'principal': 'PRINCIPAL',
+    'director': 'DIRECTOR', 'head': 'DIRECTOR', 'vp': 'VP', 'vice': 'VP', 'chief': 'EXECUTIVE'
+}
+
+class JobTriageService:
+    """
+    Cheap, local pre-scoring of a job against a user profile. Used to decide which jobs
+    are worth a Gemini analysis and in what order; it never replaces the AI analysis itself.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+        self.job_discovery = JobDiscoveryService(self.logger)
+
+    def _weighted_vector(self, tokens):
+        return {term: tf * self.job_discovery.idf(term) for term, tf in Counter(tokens).items()}
+
+    def _cosine(self, a, b):
+        if not a or not b: return 0.0
+        dot = sum(weight * b[term] for term, weight in a.items() if term in b)
+        if not dot: return 0.0
+        norm_a = math.sqrt(sum(w * w for w in a.values()))
+        norm_b = math.sqrt(sum(w * w for w in b.values()))
+        return dot / (norm_a * norm_b)
+
+    def _desired_level(self, desired_titles):
+        levels = [TITLE_LEVEL_HINTS[t] for t in tokenize(desired_titles) if t in TITLE_LEVEL_HINTS]
+        return max(levels, key=LEVEL_ORDER.index) if levels else None
+
+    def score_job(self, job, user_profile_data: dict):
+        """Returns (score 0-100, reasons) for a Job against the dict from ProfileService.get_profile_for_analysis."""
+        reasons = []
+        desired_titles = user_profile_data.get('desired_job_titles')
+        profile_tokens = tokenize(desired_titles) * TITLE_WEIGHT
+        profile_tokens += tokenize(user_profile_data.get('current_role'))
+        profile_tokens += tokenize(user_profile_data.get('skills'))
+        job_tokens = tokenize(job.job_title) * TITLE_WEIGHT
+        job_tokens += tokenize(job.notes)[:config.JOB_INDEX_MAX_DESCRIPTION_TOKENS]
+
+        similarity = self._cosine(self._weighted_vector(profile_tokens), self._weighted_vector(job_tokens))
+        # Raw cosines between a short profile and a long posting rarely exceed ~0.5, so stretch the range.
+        score = min(70.0, similarity * 140)
+        reasons.append(f"Text similarity {similarity:.2f}")
+
+        if set(tokenize(desired_titles)) & set(tokenize(job.job_title)):
+            score += 15
+            reasons.append("Bonus: Job title overlaps a desired title.")
+
+        desired_level = self._desired_level(desired_titles)
+        if desired_level and job.deduced_job_level:
+            gap = abs(LEVEL_ORDER.index(desired_level) - LEVEL_ORDER.index(job.deduced_job_level.value))
+            if gap == 0:
+                score += 10
+                reasons.append("Bonus: Seniority matches desired titles.")
+            elif gap >= 2:
+                score -= 10 * (gap - 1)
+                reasons.append(f"Penalty: Seniority is {gap} levels from desired titles.")
+
+        desired_min = user_profile_data.get('desired_salary_min')
+        if desired_min and job.salary_max and job.salary_max < desired_min:
+            score -= 20
+            reasons.append("Penalty: Job salary ceiling below desired minimum.")
+
+        preferred_style = user_profile_data.get('preferred_work_style')
+        if preferred_style and preferred_style != 'NO_PREFERENCE' and job.job_modality:
+            if preferred_style == job.job_modality.value:
+                score += 5
+                reasons.append("Bonus: Work modality matches preference.")
+            elif preferred_style == 'REMOTE' and job.job_modality.value == 'ON_SITE':
+                score -= 15
+                reasons.append("Penalty: On-site job for a remote-only preference.")
+
+        return max(0, min(100, int(score))), reasons
+
+    def plan_analysis_queue(self, jobs, user_profile_data: dict, budget: int = None, analyzed_job_ids=None):
+        """
+        Orders jobs by triage score and splits them into (to_analyze, deferred, skipped).
+        Each entry is a (job_id, score) tuple. Already-analyzed jobs below TRIAGE_MIN_SCORE are
+        skipped outright (they keep their current analysis); jobs beyond the budget are deferred.
+        `jobs` may be any iterable of Job-like rows, e.g. a streamed result: each is scored as it
+        arrives and only its id is kept, so job text is never held for the whole set.
+        """
+        analyzed_job_ids = analyzed_job_ids or set()
+        budget = config.TRIAGE_MAX_ANALYSES_PER_RUN if budget is None else budget
+        self.job_discovery.sync_index()
+        scored = sorted(
+            ((job.id, self.score_job(job, user_profile_data)[0]) for job in jobs),
+            key=lambda x: x[1], reverse=True
+        )
+        is_hopeless = lambda entry: entry[1] < config.TRIAGE_MIN_SCORE and entry[0] in analyzed_job_ids
+        viable = [entry for entry in scored if not is_hopeless(entry)]
+        skipped = [entry for entry in scored if is_hopeless(entry)]
+        return viable[:budget], viable[budget:], skipped
@@ -1,16 +1,37 @@
 # Path: apps/backend/services/profile_service.py
 from flask import current_app
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import decimal
+import enum
+import hashlib
+import orjson
 import pytz
 
 from ..app import db
 from ..models import User, UserProfile, ResumeSubmission
+from .recommendation_cache_service import RecommendationCacheService
+
+# Profile fields that shape an analysis. Contact details, coordinates and bookkeeping columns stay out of
+# the prompt and the fingerprint, so editing them never triggers a re-analysis.
+ANALYSIS_PROFILE_FIELDS = (
+    'location', 'current_role', 'desired_job_titles', 'desired_salary_min', 'desired_salary_max',
+    'target_industries', 'career_goals', 'preferred_company_size', 'work_style_preference',
+    'conflict_resolution_style', 'communication_preference', 'change_tolerance', 'preferred_work_style',
+    'is_remote_preferred', 'skills', 'education', 'work_experience', 'personality_16_personalities',
+    'other_personal_attributes'
+)
+
+def compute_fingerprint(value):
+    """SHA-256 of a JSON-serializable value with sorted keys, so equal inputs always hash equally."""
+    return hashlib.sha256(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
 class ProfileService:
     def __init__(self, logger=None):
         self.logger = logger or current_app.logger
+        self.recommendation_cache = RecommendationCacheService(self.logger)
         self.allowed_fields = [
             'full_name', 'email',
             'phone_number', 'linkedin_url', 'github_url', 'portfolio_url', 'location',
@@ -46,15 +67,37 @@ class ProfileService:
                 profile = UserProfile.query.filter_by(user_id=user_id).first()
         return profile
 
+    def _select_profile_row(self, user_id: int):
+        return db.session.execute(
+            select(*UserProfile.__table__.columns, User.full_name, User.email.label('login_email'))
+            .outerjoin(User, User.id == UserProfile.user_id)
+            .where(UserProfile.user_id == user_id)
+        ).first()
+
     def get_profile(self, user_id: int):
-        profile = self._get_or_create_profile(user_id)
-        user = User.query.get(user_id) # Separate, efficient query for the user
-        profile_dict = profile.to_dict()
-        if user:
-            profile_dict['full_name'] = user.full_name
-            profile_dict['login_email'] = user.email 
+        """
+        The profile as plain JSON types (same shape as UserProfile.to_dict plus full_name and login_email),
+        read as a single row without building ORM instances. The dict also feeds AI prompts, so enums
+        and timestamps are converted here rather than left to the response encoder.
+        """
+        row = self._select_profile_row(user_id)
+        if row is None:
+            self._get_or_create_profile(user_id)
+            row = self._select_profile_row(user_id)
+        profile_dict = {}
+        for key, value in row._mapping.items():
+            if isinstance(value, enum.Enum): value = value.value
+            elif isinstance(value, decimal.Decimal): value = float(value)
+            elif isinstance(value, datetime): value = value.isoformat()
+            profile_dict[key] = value
         return profile_dict
 
+    def get_profile_version(self, user_id: int):
+        """Returns a stamp for the profile payload, or None if the profile row doesn't exist yet."""
+        row = db.session.query(UserProfile.id, UserProfile.updated_at, User.updated_at) \
+            .join(User, User.id == UserProfile.user_id).filter(UserProfile.user_id == user_id).first()
+        return tuple(row) if row else None
+
     def update_profile(self, user_id: int, data: dict):
         profile = self._get_or_create_profile(user_id)
         user = User.query.get(user_id)
@@ -82,6 +125,7 @@ class ProfileService:
         
         profile.updated_at = datetime.now(pytz.utc)
         user.updated_at = datetime.now(pytz.utc)
+        self.recommendation_cache.invalidate_for_user(user_id)
 
         try:
             db.session.commit()
@@ -105,13 +149,20 @@ class ProfileService:
 
     def get_profile_for_analysis(self, user_id: int):
         profile_dict = self.get_profile(user_id)
-        profile_dict.pop('id', None)
-        profile_dict.pop('user_id', None)
-        return profile_dict
+        return {field: profile_dict[field] for field in ANALYSIS_PROFILE_FIELDS if field in profile_dict}
+
+    def get_analysis_fingerprint(self, user_id: int, user_profile_data: dict = None):
+        """Fingerprint of everything on the user's side of an analysis: the analysis fields and the active resume."""
+        if user_profile_data is None:
+            user_profile_data = self.get_profile_for_analysis(user_id)
+        active_resume_id = db.session.scalar(
+            select(ResumeSubmission.id).where(ResumeSubmission.user_id == user_id, ResumeSubmission.is_active == True)
+        )
+        return compute_fingerprint({"profile": user_profile_data, "active_resume_id": active_resume_id})
 
     def has_completed_required_profile_fields(self, user_id: int):
         profile = UserProfile.query.filter_by(user_id=user_id).first()
         if not profile: return False
         has_title = profile.desired_job_titles and profile.desired_job_titles.strip()
-        has_resume = ResumeSubmission.query.filter_by(user_id=user_id, is_active=True).first() is not None
+        has_resume = db.session.query(ResumeSubmission.id).filter_by(user_id=user_id, is_active=True).first() is not None
         return has_title and has_resume
\ No newline at end of file
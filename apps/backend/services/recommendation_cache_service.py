@@ -0,0 +1,119 @@
+# Path: apps/backend/services/recommendation_cache_service.py
+from flask import current_app
+from sqlalchemy import select, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
+import pytz
+
+from ..app import db
+from ..models import RecommendationCache, JobAnalysis
+from ..config import config
+from .job_matching_service import JobMatchingService
+
+class RecommendationCacheService:
+    """
+    Per-user cache of the ranked recommendation list.
+
+    Invalidation bumps `version` and clears the payload inside the caller's transaction,
+    so it commits (or rolls back) together with the change that caused it. A freshly
+    computed list is only written back if the version is still the one it was computed
+    against, so a recompute racing with an invalidation can never resurrect stale data.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or current_app.logger
+        self.job_matching_service = JobMatchingService(self.logger)
+
+    def _invalidate_statement(self, values_or_select):
+        return values_or_select.on_conflict_do_update(
+            index_elements=[RecommendationCache.user_id],
+            set_={
+                'version': RecommendationCache.version + 1,
+                'payload': None,
+                'computed_at': None,
+                'updated_at': datetime.now(pytz.utc)
+            }
+        )
+
+    def invalidate_for_user(self, user_id: int):
+        """Marks the user's cached recommendations stale. Does not commit."""
+        stmt = pg_insert(RecommendationCache).values(user_id=user_id, version=1, updated_at=datetime.now(pytz.utc))
+        db.session.execute(self._invalidate_statement(stmt))
+
+    def invalidate_for_jobs(self, job_ids):
+        """Marks stale the cache of every user holding an analysis for any of `job_ids`. Does not commit."""
+        job_ids = list(job_ids)
+        if not job_ids: return
+        affected_users = select(
+            JobAnalysis.user_id, literal(1), literal(datetime.now(pytz.utc))
+        ).where(JobAnalysis.job_id.in_(job_ids)).distinct()
+        stmt = pg_insert(RecommendationCache).from_select(['user_id', 'version', 'updated_at'], affected_users)
+        db.session.execute(self._invalidate_statement(stmt))
+
+    def _get_entry(self, user_id: int):
+        # A plain row, not an ORM instance: always current, and no identity-map bookkeeping for a large JSONB payload.
+        return db.session.execute(
+            select(RecommendationCache.version, RecommendationCache.payload, RecommendationCache.computed_at)
+            .where(RecommendationCache.user_id == user_id)
+        ).first()
+
+    def _is_fresh(self, entry):
+        if entry.payload is None or not entry.computed_at:
+            return False
+        max_age = timedelta(seconds=config.RECOMMENDATION_CACHE_TTL_SECONDS)
+        return entry.computed_at > datetime.now(pytz.utc) - max_age
+
+    def _compute_and_store(self, user_id: int, version: int):
+        ranked_jobs = self.job_matching_service.rank_jobs_for_user(user_id)
+        if ranked_jobs is None:
+            return None
+
+        now = datetime.now(pytz.utc)
+        stmt = pg_insert(RecommendationCache).values(
+            user_id=user_id, version=version, payload=ranked_jobs, computed_at=now, updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RecommendationCache.user_id],
+            set_={'payload': stmt.excluded.payload, 'computed_at': stmt.excluded.computed_at, 'updated_at': now},
+            where=(RecommendationCache.version == version)
+        )
+        try:
+            db.session.execute(stmt)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Failed to store recommendation cache for user {user_id}: {e}", exc_info=True)
+        return ranked_jobs
+
+    def get_version_stamp(self, user_id: int):
+        """Returns (version, computed_at) if the user has a fresh cached list, else None. Never loads the payload."""
+        row = db.session.execute(
+            select(RecommendationCache.version, RecommendationCache.computed_at)
+            .where(RecommendationCache.user_id == user_id, RecommendationCache.computed_at != None)
+        ).first()
+        if not row: return None
+        max_age = timedelta(seconds=config.RECOMMENDATION_CACHE_TTL_SECONDS)
+        if row.computed_at <= datetime.now(pytz.utc) - max_age:
+            return None
+        return tuple(row)
+
+    def get_recommendations(self, user_id: int, limit: int = 10):
+        entry = self._get_entry(user_id)
+        if entry and self._is_fresh(entry):
+            self.logger.info(f"Serving cached recommendations for user {user_id} (version {entry.version}).")
+            return {"message": "Recommendations generated successfully.", "jobs": entry.payload[:limit]}
+
+        self.logger.info(f"Recommendation cache miss for user {user_id}. Recomputing.")
+        ranked_jobs = self._compute_and_store(user_id, entry.version if entry else 0)
+        if ranked_jobs is None:
+            self.logger.warning(f"User {user_id} profile incomplete. Cannot generate recommendations.")
+            return {"message": "Please complete your profile to receive recommendations.", "jobs": []}
+        return {"message": "Recommendations generated successfully.", "jobs": ranked_jobs[:limit]}
+
+    def warm_for_user(self, user_id: int):
+        """Recomputes and stores the user's recommendations if the cache is stale. Intended for background use."""
+        entry = self._get_entry(user_id)
+        if entry and self._is_fresh(entry):
+            return
+        self.logger.info(f"Warming recommendation cache for user {user_id}.")
+        self._compute_and_store(user_id, entry.version if entry else 0)
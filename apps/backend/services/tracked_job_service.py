@@ -1,25 +1,65 @@
 # Path: apps/backend/services/tracked_job_service.py
 from flask import current_app
 from sqlalchemy.orm import joinedload, contains_eager
-from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
 import pytz
 
 from ..app import db
-from ..models import TrackedJob, JobOpportunity, Job, Company, JobAnalysis
+from ..models import TrackedJob, JobOpportunity, Job, Company, JobAnalysis, TrackedJobTombstone, TrackedJobStatusEnum
+from ..config import config
+
+# Columns that can be requested per section of a tracked-jobs list item via `fields=`.
+LIST_FIELD_COLUMNS = {
+    'tracked_job': {c.key: c for c in TrackedJob.__table__.columns},
+    'job': {c.key: c for c in Job.__table__.columns if c.key != 'notes'},
+    'job_opportunity': {c.key: c for c in JobOpportunity.__table__.columns},
+    'company': {c.key: c for c in Company.__table__.columns},
+    'job_analysis': {c.key: c for c in JobAnalysis.__table__.columns},
+}
+
+# What the dashboard table renders. Heavy text (analysis narrative, company description) is left out;
+# the detail view fetches it on demand.
+COMPACT_LIST_FIELDS = {
+    'tracked_job': list(LIST_FIELD_COLUMNS['tracked_job']),
+    'job': ['id', 'company_id', 'company_name', 'job_title', 'status'],
+    'job_opportunity': ['id', 'job_id', 'url', 'is_active'],
+    'company': ['id', 'name'],
+    'job_analysis': ['job_id', 'user_id', 'matrix_rating'],
+}
+
+def parse_list_fields(fields_param: str = None):
+    """
+    Parses a `fields=` query value into {section: [column, ...]} on top of the compact projection.
+    Entries are either `section.column` or a bare `section` for all of its columns.
+    Raises ValueError on unknown names.
+    """
+    fields = {section: list(columns) for section, columns in COMPACT_LIST_FIELDS.items()}
+    for entry in filter(None, (part.strip() for part in (fields_param or '').split(','))):
+        section, _, column = entry.partition('.')
+        if section not in LIST_FIELD_COLUMNS:
+            raise ValueError(f"Unknown field section '{section}'.")
+        requested = [column] if column else list(LIST_FIELD_COLUMNS[section])
+        for name in requested:
+            if name not in LIST_FIELD_COLUMNS[section]:
+                raise ValueError(f"Unknown field '{section}.{name}'.")
+            if name not in fields[section]:
+                fields[section].append(name)
+    return fields
 
 class TrackedJobService:
     def __init__(self, logger=None):
         self.logger = logger or current_app.logger
 
-    def get_tracked_jobs(self, user_id: int, status_filter: str = None, search_query: str = None,
-                         page: int = 1, limit: int = 10, job_id_filter: int = None):
+    def _base_tracked_jobs_query(self, user_id: int):
         query = db.session.query(TrackedJob).filter(TrackedJob.user_id == user_id)
         query = query.join(TrackedJob.job_opportunity).join(JobOpportunity.job).outerjoin(Job.company)
         query = query.outerjoin(
             JobAnalysis,
             (JobAnalysis.job_id == Job.id) & (JobAnalysis.user_id == user_id)
         )
-        query = query.options(
+        return query.options(
             contains_eager(TrackedJob.job_opportunity)
                 .contains_eager(JobOpportunity.job)
                 .contains_eager(Job.company),
@@ -28,6 +68,78 @@ class TrackedJobService:
                 .joinedload(Job.analyses)
         )
 
+    def _serialize_tracked_job(self, tj: TrackedJob, user_id: int):
+        item = tj.to_dict()
+        if tj.job_opportunity and tj.job_opportunity.job:
+            job_obj = tj.job_opportunity.job
+            item['job'] = job_obj.to_dict()
+            item['company'] = job_obj.company.to_dict() if job_obj.company else None
+            user_analysis = next((a for a in job_obj.analyses if a.user_id == user_id), None)
+            if user_analysis:
+                item['job_analysis'] = user_analysis.to_dict()
+                item['ai_grade'] = user_analysis.matrix_rating
+            else:
+                item['job_analysis'] = None
+                item['ai_grade'] = None
+        if tj.job_opportunity:
+            item['job_opportunity'] = tj.job_opportunity.to_dict()
+        return item
+
+    def _list_select(self, user_id: int, fields: dict):
+        """
+        Core select over exactly the projected columns, labelled `section__column`. No ORM instances are
+        built, so list reads pay neither for unused columns nor for identity-map hydration.
+        """
+        fields = fields or COMPACT_LIST_FIELDS
+        columns = [
+            LIST_FIELD_COLUMNS[section][name].label(f"{section}__{name}")
+            for section, names in fields.items() for name in names
+        ]
+        return (
+            select(*columns)
+            .select_from(TrackedJob)
+            .join(JobOpportunity, JobOpportunity.id == TrackedJob.job_opportunity_id)
+            .join(Job, Job.id == JobOpportunity.job_id)
+            .outerjoin(Company, Company.id == Job.company_id)
+            .outerjoin(JobAnalysis, (JobAnalysis.job_id == Job.id) & (JobAnalysis.user_id == user_id))
+            .where(TrackedJob.user_id == user_id)
+        )
+
+    def _row_to_list_item(self, row, fields: dict):
+        """
+        Nests a labelled row into the same shape _serialize_tracked_job produces, restricted to `fields`.
+        Datetimes and enums are left as-is for the orjson provider to encode.
+        """
+        fields = fields or COMPACT_LIST_FIELDS
+        mapping = row._mapping
+        sections = {
+            section: {name: mapping[f"{section}__{name}"] for name in names}
+            for section, names in fields.items()
+        }
+        item = sections.pop('tracked_job')
+        # Outer-joined sections come back as all-NULL columns when there is no matching row.
+        for section in ('company', 'job_analysis'):
+            if all(value is None for value in sections[section].values()):
+                sections[section] = None
+        item.update(sections)
+        item['ai_grade'] = sections['job_analysis']['matrix_rating'] if sections['job_analysis'] else None
+        return item
+
+    def _next_sync_cursor(self):
+        # Rows committed slightly late can carry an updated_at just before "now", so the cursor trails the
+        # clock by a safety window. Clients upsert by id, so re-sending rows inside the window is harmless.
+        return (datetime.now(pytz.utc) - timedelta(seconds=config.DELTA_SYNC_SAFETY_WINDOW_SECONDS)).isoformat()
+
+    def get_tracked_jobs(self, user_id: int, status_filter: str = None, search_query: str = None,
+                         page: int = 1, limit: int = 10, job_id_filter: int = None, fields: dict = None):
+        """
+        Lists tracked jobs using the projection in `fields` (see parse_list_fields); defaults to the
+        compact table projection. Use get_tracked_job for the full record.
+        """
+        fields = fields or COMPACT_LIST_FIELDS
+        cursor = self._next_sync_cursor()
+        query = self._list_select(user_id, fields)
+
         if job_id_filter:
             query = query.filter(TrackedJob.id == job_id_filter)
 
@@ -48,30 +160,85 @@ class TrackedJobService:
                 )
             )
         
+        if job_id_filter:
+            total_count = 1
+        else:
+            total_count = db.session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
         query = query.order_by(TrackedJob.updated_at.desc(), TrackedJob.id.desc())
-        total_count = query.count() if not job_id_filter else 1
         offset = (page - 1) * limit
-        tracked_jobs = query.offset(offset).limit(limit).all()
-
-        results = []
-        for tj in tracked_jobs:
-            item = tj.to_dict()
-            if tj.job_opportunity and tj.job_opportunity.job:
-                job_obj = tj.job_opportunity.job
-                item['job'] = job_obj.to_dict()
-                item['company'] = job_obj.company.to_dict() if job_obj.company else None
-                user_analysis = next((a for a in job_obj.analyses if a.user_id == user_id), None)
-                if user_analysis:
-                    item['job_analysis'] = user_analysis.to_dict()
-                    item['ai_grade'] = user_analysis.matrix_rating
-                else:
-                    item['job_analysis'] = None
-                    item['ai_grade'] = None
-            if tj.job_opportunity:
-                item['job_opportunity'] = tj.job_opportunity.to_dict()
-            results.append(item)
-
-        return {"jobs": results, "total_count": total_count, "page": page, "limit": limit}
+        rows = db.session.execute(query.offset(offset).limit(limit)).all()
+
+        results = [self._row_to_list_item(row, fields) for row in rows]
+        return {"jobs": results, "total_count": total_count, "page": page, "limit": limit, "cursor": cursor}
+
+    def get_tracked_job(self, user_id: int, tracked_job_id: int):
+        """Returns a single serialized tracked job, without the list's count or pagination."""
+        tracked_job = self._base_tracked_jobs_query(user_id).filter(TrackedJob.id == tracked_job_id).first()
+        return self._serialize_tracked_job(tracked_job, user_id) if tracked_job else None
+
+    def get_tracked_job_changes(self, user_id: int, since: datetime, fields: dict = None):
+        """
+        Returns tracked jobs whose row, opportunity, company or analysis changed after `since`,
+        plus the ids of tracked jobs deleted since then. If `since` predates the tombstone
+        retention window, `reset` is True and the client must refetch the full list.
+        Changed jobs use the same projection as get_tracked_jobs so clients can merge them in place.
+        """
+        fields = fields or COMPACT_LIST_FIELDS
+        cursor = self._next_sync_cursor()
+        retention_start = datetime.now(pytz.utc) - timedelta(days=config.DELTA_SYNC_TOMBSTONE_RETENTION_DAYS)
+        if since < retention_start:
+            return {"jobs": [], "deleted_ids": [], "cursor": cursor, "reset": True}
+
+        changed = db.session.execute(self._list_select(user_id, fields).where(db.or_(
+            TrackedJob.updated_at > since,
+            JobOpportunity.updated_at > since,
+            Company.updated_at > since,
+            JobAnalysis.updated_at > since
+        )).order_by(TrackedJob.id)).all()
+
+        deleted_ids = db.session.scalars(
+            select(TrackedJobTombstone.tracked_job_id)
+            .where(TrackedJobTombstone.user_id == user_id, TrackedJobTombstone.deleted_at > since)
+        ).all()
+
+        return {
+            "jobs": [self._row_to_list_item(row, fields) for row in changed],
+            "deleted_ids": deleted_ids,
+            "cursor": cursor,
+            "reset": False
+        }
+
+    def purge_expired_tombstones(self):
+        """
+        Deletes tombstones older than the retention window. Clients syncing from before it get `reset`
+        and refetch everything, so nothing reads them. Returns the number deleted.
+        """
+        retention_start = datetime.now(pytz.utc) - timedelta(days=config.DELTA_SYNC_TOMBSTONE_RETENTION_DAYS)
+        purged = db.session.execute(
+            db.delete(TrackedJobTombstone).where(TrackedJobTombstone.deleted_at < retention_start)
+        ).rowcount
+        db.session.commit()
+        return purged
+
+    def get_tracked_jobs_version(self, user_id: int):
+        """
+        A cheap stamp that changes whenever anything rendered by get_tracked_jobs changes for the user:
+        row count (catches deletions) plus the newest update across tracked jobs, opportunities,
+        companies and the user's analyses.
+        """
+        latest_analysis = select(func.max(JobAnalysis.updated_at)).where(JobAnalysis.user_id == user_id).scalar_subquery()
+        row = db.session.execute(
+            select(
+                func.count(TrackedJob.id), func.max(TrackedJob.updated_at),
+                func.max(JobOpportunity.updated_at), func.max(Company.updated_at), latest_analysis
+            )
+            .select_from(TrackedJob)
+            .join(JobOpportunity, JobOpportunity.id == TrackedJob.job_opportunity_id)
+            .join(Job, Job.id == JobOpportunity.job_id)
+            .outerjoin(Company, Company.id == Job.company_id)
+            .where(TrackedJob.user_id == user_id)
+        ).one()
+        return tuple(row)
 
     def update_tracked_job(self, user_id: int, tracked_job_id: int, payload: dict):
         tracked_job = db.session.query(TrackedJob).filter_by(id=tracked_job_id, user_id=user_id).first()
@@ -98,9 +265,7 @@ class TrackedJobService:
 
         try:
             db.session.commit()
-            db.session.refresh(tracked_job)
-            full_job_data = self.get_tracked_jobs(user_id, job_id_filter=tracked_job_id)
-            return full_job_data['jobs'][0] if full_job_data.get('jobs') else None
+            return self.get_tracked_job(user_id, tracked_job_id)
         except Exception as e:
             db.session.rollback()
             raise e
@@ -110,6 +275,7 @@ class TrackedJobService:
         if not tracked_job:
             return False
         try:
+            db.session.add(TrackedJobTombstone(user_id=user_id, tracked_job_id=tracked_job.id))
             db.session.delete(tracked_job)
             db.session.commit()
             return True
@@ -117,19 +283,22 @@ class TrackedJobService:
             db.session.rollback()
             raise e
 
-    def track_job(self, user_id: int, job_opportunity_id: int):
-        existing_tracked_job = db.session.query(TrackedJob).filter_by(user_id=user_id, job_opportunity_id=job_opportunity_id).first()
-        if existing_tracked_job:
-            return existing_tracked_job
-        
-        new_tracked_job = TrackedJob(user_id=user_id, job_opportunity_id=job_opportunity_id, status='SAVED')
-        db.session.add(new_tracked_job)
-        try:
-            db.session.commit()
-            return new_tracked_job
-        except Exception as e:
-            db.session.rollback()
-            raise e
+    def track_job(self, user_id: int, job_opportunity_id: int, commit: bool = True):
+        """Tracks the opportunity for the user unless it already is, in one upsert. Returns the tracked job id."""
+        stmt = pg_insert(TrackedJob).values(user_id=user_id, job_opportunity_id=job_opportunity_id, status=TrackedJobStatusEnum.SAVED)
+        tracked_job_id = db.session.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[TrackedJob.user_id, TrackedJob.job_opportunity_id],
+                set_={'job_opportunity_id': stmt.excluded.job_opportunity_id} # No-op update so RETURNING yields the existing row
+            ).returning(TrackedJob.id)
+        )
+        if commit:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
+        return tracked_job_id
 
     def get_tracked_job_by_opportunity_id(self, user_id: int, job_opportunity_id: int):
         return db.session.query(TrackedJob).filter_by(user_id=user_id, job_opportunity_id=job_opportunity_id).first()
\ No newline at end of file
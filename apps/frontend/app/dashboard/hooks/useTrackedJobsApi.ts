@@ -1,9 +1,9 @@
 // Path: apps/frontend/app/dashboard/hooks/useTrackedJobsApi.ts
 'use client';
 
-import { useState, useCallback, useEffect } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import { useAuth } from '@clerk/nextjs';
-import { type TrackedJob, type UpdatePayload, type Profile, type CompanyProfile } from '../types'; // Ensure CompanyProfile is imported
+import { type TrackedJob, type TrackedJobChanges, type UpdatePayload, type Profile, type CompanyProfile } from '../types'; // Ensure CompanyProfile is imported
 
 export function useTrackedJobsApi() {
   const { getToken, isLoaded: isUserLoaded } = useAuth();
@@ -13,6 +13,8 @@ export function useTrackedJobsApi() {
   const [totalCount, setTotalCount] = useState<number>(0);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // High-water mark from the last full fetch or delta sync; lets us ask the server only for changes.
+  const syncCursor = useRef<string | null>(null);
 
   const authedFetch = useCallback(async (url: string, options: RequestInit = {}) => {
     const token = await getToken();
@@ -38,6 +40,7 @@ export function useTrackedJobsApi() {
       .then(data => {
           setTrackedJobs(data.jobs || []);
           setTotalCount(data.total_count || 0);
+          syncCursor.current = data.cursor || null;
       })
       .catch(err => {
           console.error("Error fetching tracked jobs:", err); 
@@ -50,11 +53,41 @@ export function useTrackedJobsApi() {
 
   useEffect(() => { fetchJobs(); }, [fetchJobs]);
 
-  const submitNewJob = useCallback(async (jobUrl: string) => {
-    await authedFetch(`${apiBaseUrl}/api/jobs/submit`, { method: 'POST', body: JSON.stringify({ job_url: jobUrl }) });
-    fetchJobs();
+  const syncChanges = useCallback(async () => {
+    if (!syncCursor.current) return fetchJobs();
+    try {
+      const res = await authedFetch(`${apiBaseUrl}/api/tracked-jobs/changes?since=${encodeURIComponent(syncCursor.current)}`);
+      if (!res.ok) throw new Error(`Server responded with ${res.status}`);
+      const changes: TrackedJobChanges = await res.json();
+      if (changes.reset) return fetchJobs();
+
+      const deleted = new Set(changes.deleted_ids);
+      setTrackedJobs(prev => {
+        const changedById = new Map(changes.jobs.map(job => [job.id, job]));
+        const kept = prev.filter(job => !deleted.has(job.id)).map(job => changedById.get(job.id) ?? job);
+        const keptIds = new Set(kept.map(job => job.id));
+        const added = changes.jobs.filter(job => !keptIds.has(job.id));
+        const next = [...added, ...kept];
+        setTotalCount(next.length);
+        return next;
+      });
+      syncCursor.current = changes.cursor;
+    } catch (err) {
+      console.error("Error syncing tracked jobs:", err);
+      fetchJobs();
+    }
   }, [apiBaseUrl, authedFetch, fetchJobs]);
 
+  const submitNewJob = useCallback(async (jobUrl: string) => {
+    // One key per submission, so a retried request returns the first one's result instead of redoing it.
+    await authedFetch(`${apiBaseUrl}/api/jobs/submit`, {
+      method: 'POST',
+      headers: { 'Idempotency-Key': crypto.randomUUID() },
+      body: JSON.stringify({ job_url: jobUrl })
+    });
+    syncChanges();
+  }, [apiBaseUrl, authedFetch, syncChanges]);
+
   const updateTrackedJob = useCallback(async (trackedJobId: number, payload: UpdatePayload) => {
     setTrackedJobs(prev => prev.map(job => (job.id === trackedJobId ? { ...job, ...payload } : job)));
     
@@ -106,6 +139,7 @@ export function useTrackedJobsApi() {
     isLoading,
     error,
     refetch: fetchJobs,
+    sync: syncChanges,
     actions: {
       submitNewJob,
       updateTrackedJob,
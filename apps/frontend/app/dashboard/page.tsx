@@ -7,6 +7,7 @@ import Link from 'next/link';
 
 import { useJobRecommendationsApi } from '../../hooks/useJobRecommendationsApi';
 import { useTrackedJobsApi } from './hooks/useTrackedJobsApi';
+import { useEventStream } from '../../hooks/useEventStream';
 
 import { JobSubmissionForm } from './components/JobSubmissionForm';
 import JobsForYou from './components/JobsForYou';
@@ -23,7 +24,13 @@ export default function UserDashboard() {
   
   // CRITICAL FIX: Pass the profile state into the recommendations hook.
   const { data: recommendedJobs, isLoading: isLoadingRecs, error: recsError, refetch: refetchRecommendations } = useJobRecommendationsApi(profile);
-  const { trackedJobs, totalCount, isLoading: isLoadingTrackedJobs, error: trackedJobsError, actions: trackedJobsActions } = useTrackedJobsApi();
+  const { trackedJobs, totalCount, isLoading: isLoadingTrackedJobs, error: trackedJobsError, sync: syncTrackedJobs, actions: trackedJobsActions } = useTrackedJobsApi();
+
+  // Pull only what changed when the backend reports finished AI work, instead of polling.
+  useEventStream(useCallback((event) => {
+    syncTrackedJobs();
+    if (event.type === 'analysis.updated' || event.type === 'reanalysis.completed') refetchRecommendations();
+  }, [syncTrackedJobs, refetchRecommendations]));
   
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submissionError, setSubmissionError] = useState<string | null>(null);
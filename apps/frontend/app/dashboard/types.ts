@@ -10,6 +10,9 @@ export interface CompanyProfile {
     company_size_max: number | null;
 }
 
+// The tracked-jobs list only carries these company columns; the full profile is fetched on demand.
+export type TrackedJobCompany = Pick<CompanyProfile, 'id' | 'name'>;
+
 export interface Job {
     id: number;
     company_id: number;
@@ -47,11 +50,18 @@ export interface TrackedJob {
     next_action_notes: string | null;
     job_opportunity: JobOpportunity;
     job: Job;
-    company: CompanyProfile | null;
+    company: TrackedJobCompany | null;
     job_analysis: AIAnalysis | null;
     ai_grade: string | null;
 }
 
+export interface TrackedJobChanges {
+    jobs: TrackedJob[];
+    deleted_ids: number[];
+    cursor: string;
+    reset: boolean;
+}
+
 export interface Profile {
   id: number;
   user_id: number;
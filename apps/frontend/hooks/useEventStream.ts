@@ -0,0 +1,59 @@
+// Path: apps/frontend/hooks/useEventStream.ts
+'use client';
+
+import { useEffect, useRef } from 'react';
+import { useAuth } from '@clerk/nextjs';
+
+export type ServerEvent = { type: string; data: any };
+
+// Subscribes to /api/events/stream. Uses fetch rather than EventSource because the stream needs the
+// Clerk bearer token. The server closes streams periodically; we reconnect after a short delay.
+export function useEventStream(onEvent: (event: ServerEvent) => void) {
+  const { getToken, isLoaded } = useAuth();
+  const apiBaseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  useEffect(() => {
+    if (!isLoaded) return;
+    const controller = new AbortController();
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const connect = async () => {
+      try {
+        const token = await getToken();
+        if (!token) return;
+        const response = await fetch(`${apiBaseUrl}/api/events/stream`, {
+          headers: { 'Authorization': `Bearer ${token}`, 'Accept': 'text/event-stream' },
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) throw new Error(`Event stream responded with ${response.status}`);
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          const frames = buffer.split('\n\n');
+          buffer = frames.pop() ?? '';
+          for (const frame of frames) {
+            const type = frame.match(/^event: (.*)$/m)?.[1];
+            const data = frame.match(/^data: (.*)$/m)?.[1];
+            if (type && data) onEventRef.current({ type, data: JSON.parse(data) });
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        console.error("[useEventStream] Stream error:", err);
+      }
+      if (!controller.signal.aborted) retryTimer = setTimeout(connect, 3000);
+    };
+
+    connect();
+    return () => {
+      controller.abort();
+      if (retryTimer) clearTimeout(retryTimer);
+    };
+  }, [isLoaded, getToken, apiBaseUrl]);
+}